@@ -1,12 +1,41 @@
 # snippet to paste into src/api.py (replace existing /ocr/file and /ocr/url handlers)
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header
 from fastapi.responses import JSONResponse
-import tempfile, shutil, os, logging, requests
+import tempfile, shutil, os, logging, requests, asyncio
 
-from .pipeline import process_image
-from .parser import parse_contact_fields
+from .pipeline import process_array
+from .parser import parse_contact_fields, normalize_fields
+from .dedup import index_from_config
+from .workers import pool_from_config
+from .utils import load_config
+import cv2
 
 app = FastAPI(title="OCR Text Detection API", version="1.0")
+# result reuse for repeated uploads (dedup.enabled); entries are scoped per X-Client-Id, and
+# uploads without one never use it, so one client cannot get another client's response back
+DEDUP = index_from_config(load_config())
+# OCR worker processes (workers.processes > 0), started with the app; None = OCR in this process
+WORKERS = None
+
+@app.on_event("startup")
+def start_workers():
+    global WORKERS
+    WORKERS = pool_from_config(load_config())
+
+@app.on_event("shutdown")
+def stop_workers():
+    if WORKERS is not None:
+        WORKERS.close()
+
+async def run_pipeline(img, image_name, out_dir, fields=None):
+    # (results, page info such as "deskew"): in-process, or handed to a worker through shared memory
+    if WORKERS is None:
+        info = {}
+        return process_array(img, image_name, out_dir, fields=fields, info=info), info
+    # submit blocks while every shared-memory slot is in flight: keep that wait off the event loop
+    loop = asyncio.get_running_loop()
+    future = await loop.run_in_executor(None, lambda: WORKERS.submit(img, image_name, out_dir, fields=fields))
+    return await asyncio.wrap_future(future)
 
 def save_upload_tmp(file_obj: UploadFile) -> str:
     suffix = os.path.splitext(file_obj.filename)[1] if file_obj.filename else ".png"
@@ -32,26 +61,55 @@ def download_image_to_tmp(url: str) -> str:
                 f.write(chunk)
     return tmp.name
 
-@app.post("/ocr/file")
-async def ocr_file(file: UploadFile = File(...)):
-    tmp_path = save_upload_tmp(file)
+def requested_fields(fields):
+    # ?fields=email,mobile -> set for the pipeline/parser; None = full parse
+    try:
+        return normalize_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def dedup_lookup(img, client):
+    # (fingerprint, earlier response or None); (None, None) when dedup is off or the caller has no key
+    if DEDUP is None or not client:
+        return None, None
+    fp = DEDUP.fingerprint(img)
+    hit = DEDUP.lookup(fp, scope=client)
+    if hit is not None:
+        logging.info(f"Repeated upload, reusing result for {hit['image']} ({DEDUP.stats()})")
+    return fp, hit
+
+@app.get("/dedup/stats")
+async def dedup_stats():
+    return DEDUP.stats() if DEDUP is not None else {"enabled": False}
+
+async def ocr_response(tmp_path, wanted, client):
     out_dir = tempfile.mkdtemp(prefix="ocr_out_")
+    name = os.path.basename(tmp_path)
     try:
-        resp = process_image(tmp_path, out_dir)
-        # If pipeline returned dict with parsed already, use it; else compute parsed
-        if isinstance(resp, dict):
-            results = resp.get("results", []) or []
-            parsed = resp.get("parsed")
-            if parsed is None:
-                parsed = parse_contact_fields(results)
-        else:
-            results = resp or []
-            parsed = parse_contact_fields(results)
+        # decoded once: the same array is fingerprinted and run through the pipeline
+        img = cv2.imread(tmp_path)
+        if img is None:
+            raise FileNotFoundError(f"Cannot read image: {name}")
+        fp, hit = dedup_lookup(img, client)
+        if hit is not None:
+            final = dict(hit, image=name, duplicate_of=hit["image"])
+            if wanted is not None:
+                final["parsed"] = parse_contact_fields(hit["results"], fields=wanted)
+                final["fields"] = sorted(wanted)
+            return JSONResponse(final)
+        results, info = await run_pipeline(img, name, out_dir, fields=wanted)
+        results = results or []
         final = {
-            "image": os.path.basename(tmp_path),
+            "image": name,
             "results": results,
-            "parsed": parsed
+            "parsed": parse_contact_fields(results, fields=wanted)
         }
+        # boxes are on the deskewed page; "deskew" (when the page was rotated) maps them back
+        final.update(info)
+        if wanted is not None:
+            final["fields"] = sorted(wanted)
+        if fp is not None and wanted is None:  # partial results must not answer later full requests
+            DEDUP.add(fp, final, scope=client)
         return JSONResponse(final)
     except Exception as e:
         logging.exception("Processing failed")
@@ -62,33 +120,15 @@ async def ocr_file(file: UploadFile = File(...)):
         except Exception:
             pass
 
+@app.post("/ocr/file")
+async def ocr_file(file: UploadFile = File(...), fields: str = None, x_client_id: str = Header(None)):
+    # fields: optional comma-separated parsed fields (e.g. "email,mobile"); OCR stops once they are found
+    wanted = requested_fields(fields)
+    return await ocr_response(save_upload_tmp(file), wanted, x_client_id)
+
 @app.post("/ocr/url")
-async def ocr_url(payload: dict):
+async def ocr_url(payload: dict, x_client_id: str = Header(None)):
     if "url" not in payload:
         raise HTTPException(status_code=400, detail="Missing 'url' in payload")
-    tmp_path = download_image_to_tmp(payload["url"])
-    out_dir = tempfile.mkdtemp(prefix="ocr_out_")
-    try:
-        resp = process_image(tmp_path, out_dir)
-        if isinstance(resp, dict):
-            results = resp.get("results", []) or []
-            parsed = resp.get("parsed")
-            if parsed is None:
-                parsed = parse_contact_fields(results)
-        else:
-            results = resp or []
-            parsed = parse_contact_fields(results)
-        final = {
-            "image": os.path.basename(tmp_path),
-            "results": results,
-            "parsed": parsed
-        }
-        return JSONResponse(final)
-    except Exception as e:
-        logging.exception("Processing failed")
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+    wanted = requested_fields(payload.get("fields"))
+    return await ocr_response(download_image_to_tmp(payload["url"]), wanted, x_client_id)
@@ -1,7 +1,11 @@
 # src/parser.py
 import re
-from typing import List, Dict, Any
+from itertools import islice
+from multiprocessing import Pool
+from typing import List, Dict, Any, Iterable, Iterator
 from statistics import mean
+from .keywords import load_keyword_matcher
+from .scripts import languages_for
 
 EMAIL_RE = re.compile(r'[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}', re.I)
 PHONE_RE = re.compile(
@@ -18,7 +22,15 @@ DESIGNATION_KEYWORDS = [
     r'\bpresident\b', r'\blead\b', r'\bsenior\b', r'\bjunior\b', r'\bintern\b',
     r'\bconsultant\b', r'\banalyst\b', r'\bspecialist\b', r'\bsales\b', r'\bmarketing\b'
 ]
-DESIGNATION_RE = re.compile('|'.join(DESIGNATION_KEYWORDS), re.I)
+COMPANY_KEYWORDS = ['pvt','ltd','limited','inc','llc','corporation','corp','co']
+ADDRESS_KEYWORDS = ['street','st','road','rd','lane','block','sector','area','city','state','pincode','zip','house','landmark','near','plot','colony','chennai','coimbatore','bangalore','bengaluru']
+
+# keyword lists live in keywords/*.txt (one category per file); the lists above are the fallback
+KEYWORDS = load_keyword_matcher(fallback={
+    "designation": [k.replace(r'\b', '') for k in DESIGNATION_KEYWORDS],
+    "company": COMPANY_KEYWORDS,
+    "address": ADDRESS_KEYWORDS,
+})
 
 def is_likely_name(line: str) -> bool:
     if not line or any(ch.isdigit() for ch in line):
@@ -29,10 +41,10 @@ def is_likely_name(line: str) -> bool:
     capital_words = sum(1 for w in words if w[0].isupper())
     return capital_words >= max(1, len(words)//2)
 
-def is_likely_address(line: str) -> bool:
-    address_tokens = ['street','st','road','rd','lane','block','sector','area','city','state','pincode','zip','house','landmark','near','plot','colony','chennai','coimbatore','bangalore','bengaluru']
-    ln = line.lower()
-    if any(tok in ln for tok in address_tokens):
+def is_likely_address(line: str, keyword_hits: Dict[str,Any] = None) -> bool:
+    if keyword_hits is None:
+        keyword_hits = KEYWORDS.classify(line)
+    if "address" in keyword_hits:
         return True
     if PINCODE_RE.search(line):
         return True
@@ -72,7 +84,90 @@ def lines_from_rows(rows):
             lines.append(" ".join(pieces))
     return lines
 
-def parse_contact_fields(results: List[Dict[str,Any]]) -> Dict[str,Any]:
+# parsed fields a caller can request; the contact ones can be settled line by line, the layout
+# ones need the keyword/name/address heuristics over every line
+PARSED_FIELDS = ("name", "designation", "company", "mobile", "email", "address", "location",
+                 "website", "social", "extras", "language_detected")
+CONTACT_FIELDS = ("mobile", "email", "website", "social", "extras")
+
+def normalize_fields(fields) -> Any:
+    # None (everything) or a set of PARSED_FIELDS; accepts "email,mobile" or an iterable
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = {f.strip() for f in fields if f and f.strip()}
+    unknown = fields - set(PARSED_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))} (choose from {', '.join(PARSED_FIELDS)})")
+    return fields or None
+
+def line_features(line: str, layout: bool = True) -> Dict[str,Any]:
+    # everything the field heuristics need to know about one line, computed once;
+    # layout=False skips the keyword/name/address checks that only name/company/address need
+    phones = []
+    for p in PHONE_RE.findall(line):
+        if isinstance(p, tuple):
+            pstr = ''.join(p)
+        else:
+            pstr = p
+        pstr = re.sub(r'[^\d\+]', '', pstr)
+        if pstr and len(re.sub(r'\D', '', pstr)) >= 6:
+            phones.append(pstr)
+    li = LINKEDIN_RE.search(line)
+    gst = GSTIN_RE.search(line)
+    cin = CIN_RE.search(line)
+    hits = KEYWORDS.classify(line) if layout else {}
+    has_email = EMAIL_RE.search(line) is not None
+    has_phone = PHONE_RE.search(line) is not None
+    has_website = WEBSITE_RE.search(line) is not None
+    return {
+        "emails": EMAIL_RE.findall(line),
+        "phones": phones,
+        "websites": [w.strip().rstrip(',.') for w in WEBSITE_RE.findall(line)],
+        "linkedin": li.group(1) if li else None,
+        "gstin": gst.group(0) if gst else None,
+        "cin": cin.group(0) if cin else None,
+        "keywords": hits,
+        "has_contact": has_email or has_phone or has_website,
+        "is_name": is_likely_name(line) if layout else False,
+        "is_address": is_likely_address(line, hits) if layout else False,
+    }
+
+def contact_fields_in(features: Dict[str,Any]) -> set:
+    # which CONTACT_FIELDS one line's features already settle
+    found = set()
+    if features["emails"]:
+        found.add("email")
+    if features["phones"]:
+        found.add("mobile")
+    if features["websites"]:
+        found.add("website")
+    if features["linkedin"]:
+        found.add("social")
+    if features["gstin"] or features["cin"]:
+        found.add("extras")
+    return found
+
+def results_confidence(results: List[Dict[str,Any]]):
+    # global confidence from results confidences (if present)
+    confs = []
+    for r in results:
+        c = r.get("confidence", None)
+        if isinstance(c, (int, float)) and c >= 0:
+            confs.append(float(c))
+    if not confs:
+        return None
+    # normalize to 0-1 if confidences appear as 0-100 ints
+    avg = mean(confs)
+    if avg > 1.1:
+        return round(avg / 100.0, 2)
+    return round(avg, 2)
+
+def assemble_fields(lines: List[str], features: List[Dict[str,Any]], confidence=None, fields=None) -> Dict[str,Any]:
+    # fields (a set from normalize_fields) limits the output to those keys and skips the stages
+    # nothing requested depends on; None assembles everything
+    want = set(PARSED_FIELDS) if fields is None else fields
     parsed = {
         "name": None,
         "designation": None,
@@ -84,54 +179,43 @@ def parse_contact_fields(results: List[Dict[str,Any]]) -> Dict[str,Any]:
         "website": [],
         "social": {},
         "extras": {},
-        "language_detected": [],  # placeholder (can be filled with langdetect if added)
+        "language_detected": languages_for("\n".join(lines)) if "language_detected" in want else [],  # Tesseract codes of the scripts present
         "confidence": None,
         "raw_text": "",
         "notes": []
     }
 
     # raw_text: concatenate all text_clean in reading order
-    rows = group_lines_by_vertical_position(results, y_margin=12)
-    lines = lines_from_rows(rows)
     parsed["raw_text"] = "\n".join(lines)
     parsed["raw_lines"] = lines.copy()  # keep raw lines too
 
     # collect emails, phones, websites, socials, extras (gstin/cin)
-    for ln in lines:
-        for m in EMAIL_RE.findall(ln):
+    for feat in features:
+        for m in feat["emails"]:
             if m not in parsed["email"]:
                 parsed["email"].append(m)
-        for p in PHONE_RE.findall(ln):
-            if isinstance(p, tuple):
-                pstr = ''.join(p)
-            else:
-                pstr = p
-            pstr = re.sub(r'[^\d\+]', '', pstr)
-            if pstr and len(re.sub(r'\D', '', pstr)) >= 6:
-                if pstr not in parsed["mobile"]:
-                    parsed["mobile"].append(pstr)
-        for w in WEBSITE_RE.findall(ln):
-            w = w.strip().rstrip(',.')
+        for pstr in feat["phones"]:
+            if pstr not in parsed["mobile"]:
+                parsed["mobile"].append(pstr)
+        for w in feat["websites"]:
             if w not in parsed["website"]:
                 parsed["website"].append(w)
-        li = LINKEDIN_RE.search(ln)
-        if li:
-            parsed["social"]["linkedin"] = li.group(1)
-        gst = GSTIN_RE.search(ln)
-        if gst:
-            parsed["extras"]["gstin"] = gst.group(0)
-        cin = CIN_RE.search(ln)
-        if cin:
-            parsed["extras"]["cin"] = cin.group(0)
+        if feat["linkedin"]:
+            parsed["social"]["linkedin"] = feat["linkedin"]
+        if feat["gstin"]:
+            parsed["extras"]["gstin"] = feat["gstin"]
+        if feat["cin"]:
+            parsed["extras"]["cin"] = feat["cin"]
 
     # name and designation heuristics: top lines are prime candidates
+    want_names = bool(want & {"name", "designation", "company"})
     candidate_names = []
-    for i, ln in enumerate(lines[:6]):
+    for i, ln in enumerate(lines[:6] if want_names else []):
         if not ln:
             continue
-        if EMAIL_RE.search(ln) or PHONE_RE.search(ln) or WEBSITE_RE.search(ln):
+        if features[i]["has_contact"]:
             continue
-        if is_likely_name(ln):
+        if features[i]["is_name"]:
             candidate_names.append((i, ln))
     if candidate_names:
         parsed["name"] = candidate_names[0][1]
@@ -139,7 +223,8 @@ def parse_contact_fields(results: List[Dict[str,Any]]) -> Dict[str,Any]:
         # next lines could be designation and/or company
         if name_idx + 1 < len(lines):
             nxt = lines[name_idx + 1]
-            if DESIGNATION_RE.search(nxt):
+            nxt_hits = features[name_idx + 1]["keywords"]
+            if "designation" in nxt_hits:
                 parsed["designation"] = nxt
                 # company maybe next
                 if name_idx + 2 < len(lines):
@@ -148,18 +233,18 @@ def parse_contact_fields(results: List[Dict[str,Any]]) -> Dict[str,Any]:
                         parsed["company"] = cand_company
             else:
                 # if next line contains company-like tokens (Pvt Ltd, Ltd, Inc, LLC), treat as company
-                if re.search(r'\b(pvt|ltd|limited|inc|llc|corporation|corp|co)\b', nxt, re.I):
+                if "company" in nxt_hits:
                     parsed["company"] = nxt
                 else:
                     # maybe designation in same line
-                    if DESIGNATION_RE.search(nxt):
+                    if "designation" in nxt_hits:
                         parsed["designation"] = nxt
-    else:
+    elif want_names:
         # fallback: find designation anywhere
         for i, ln in enumerate(lines[:8]):
-            if DESIGNATION_RE.search(ln):
+            if "designation" in features[i]["keywords"]:
                 parsed["designation"] = ln
-                if i - 1 >= 0 and is_likely_name(lines[i-1]):
+                if i - 1 >= 0 and features[i-1]["is_name"]:
                     parsed["name"] = lines[i-1]
                 # company guess: line above or below
                 if i + 1 < len(lines):
@@ -167,58 +252,111 @@ def parse_contact_fields(results: List[Dict[str,Any]]) -> Dict[str,Any]:
                 break
 
     # address detection: prefer middle->bottom blocks
-    address_lines = []
-    for ln in lines:
-        if is_likely_address(ln):
-            address_lines.append(ln)
-    if address_lines:
-        parsed["address"] = ", ".join(address_lines)
-        # try to extract city, state from address (very heuristic: last comma-separated tokens)
-        parts = parsed["address"].split(',')
-        if len(parts) >= 2:
-            parsed["location"] = ", ".join([p.strip() for p in parts[-2:]])
-    else:
-        # fallback: bottom lines (excluding email/phone)
-        fallback = []
-        for ln in reversed(lines[-6:]):
-            if not ln:
-                continue
-            if ln in parsed["email"] or any(ln in m for m in parsed["mobile"]):
-                continue
-            fallback.append(ln)
-            if len(fallback) >= 3:
-                break
-        if fallback:
-            parsed["address"] = ", ".join(reversed(fallback))
-            parsed["location"] = parsed["address"].split(',')[-1].strip()
+    if want & {"address", "location"}:
+        address_lines = [ln for ln, feat in zip(lines, features) if feat["is_address"]]
+        if address_lines:
+            parsed["address"] = ", ".join(address_lines)
+            # try to extract city, state from address (very heuristic: last comma-separated tokens)
+            parts = parsed["address"].split(',')
+            if len(parts) >= 2:
+                parsed["location"] = ", ".join([p.strip() for p in parts[-2:]])
+        else:
+            # fallback: bottom lines (excluding email/phone)
+            fallback = []
+            for ln in reversed(lines[-6:]):
+                if not ln:
+                    continue
+                if ln in parsed["email"] or any(ln in m for m in parsed["mobile"]):
+                    continue
+                fallback.append(ln)
+                if len(fallback) >= 3:
+                    break
+            if fallback:
+                parsed["address"] = ", ".join(reversed(fallback))
+                parsed["location"] = parsed["address"].split(',')[-1].strip()
 
     # ensure unique email/mobile/website arrays
     parsed["email"] = list(dict.fromkeys(parsed["email"]))
     parsed["mobile"] = list(dict.fromkeys(parsed["mobile"]))
     parsed["website"] = list(dict.fromkeys(parsed["website"]))
 
-    # compute global confidence from results confidences (if present)
-    confs = []
-    for r in results:
-        c = r.get("confidence", None)
-        if isinstance(c, (int, float)) and c >= 0:
-            confs.append(float(c))
-    if confs:
-        # normalize to 0-1 if confidences appear as 0-100 ints
-        avg = mean(confs)
-        if avg > 1.1:
-            parsed["confidence"] = round(avg / 100.0, 2)
-        else:
-            parsed["confidence"] = round(avg, 2)
-    else:
-        parsed["confidence"] = None
+    parsed["confidence"] = confidence
 
     # notes: light heuristics
-    if not parsed["name"]:
-        parsed["notes"].append("name_not_detected")
-    if not parsed["email"]:
-        parsed["notes"].append("email_not_detected")
-    if not parsed["mobile"]:
-        parsed["notes"].append("mobile_not_detected")
+    parsed["notes"].extend(detection_notes(parsed))
 
+    if fields is not None:
+        parsed = {k: v for k, v in parsed.items()
+                  if k in fields or k not in PARSED_FIELDS}
+        parsed["notes"] = [n for n in parsed["notes"] if n.split("_not_detected")[0] in fields]
     return parsed
+
+def parse_contact_fields(results: List[Dict[str,Any]], fields=None) -> Dict[str,Any]:
+    # fields: optional subset of PARSED_FIELDS ("email,mobile" or a list); others are not computed
+    fields = normalize_fields(fields)
+    rows = group_lines_by_vertical_position(results, y_margin=12)
+    lines = lines_from_rows(rows)
+    layout = fields is None or not fields <= set(CONTACT_FIELDS)
+    features = [line_features(ln, layout=layout) for ln in lines]
+    return assemble_fields(lines, features, results_confidence(results), fields)
+
+def detection_notes(parsed: Dict[str,Any]) -> List[str]:
+    # "<field>_not_detected" for name/email/mobile when present in parsed but empty
+    return [f"{f}_not_detected" for f in ("name", "email", "mobile") if f in parsed and not parsed[f]]
+
+def merge_parsed(parsed_pages: List[Dict[str,Any]]) -> Dict[str,Any]:
+    """
+    Document-level summary of per-page parsed dicts: list fields are unioned in page order,
+    scalar fields keep the first page that has them, dict fields keep the first value per key,
+    confidence is the mean of the pages that have one, raw_text and raw_lines are joined page
+    by page and notes are recomputed from the merged fields (a name found on page 2 clears
+    page 1's name_not_detected).
+    """
+    merged: Dict[str,Any] = {}
+    confs = []
+    for page in parsed_pages:
+        for key, value in page.items():
+            if key == "confidence":
+                if value is not None:
+                    confs.append(value)
+            elif key == "raw_text":
+                merged[key] = (merged[key] + "\n\f\n" + value) if merged.get(key) else value
+            elif key == "raw_lines":
+                merged.setdefault(key, []).extend(value)
+            elif key == "notes":
+                merged.setdefault(key, [])
+            elif isinstance(value, list):
+                bucket = merged.setdefault(key, [])
+                for v in value:
+                    if v not in bucket:
+                        bucket.append(v)
+            elif isinstance(value, dict):
+                bucket = merged.setdefault(key, {})
+                for k, v in value.items():
+                    bucket.setdefault(k, v)
+            elif merged.get(key) is None:
+                merged[key] = value
+    merged["confidence"] = round(sum(confs) / len(confs), 2) if confs else None
+    if "notes" in merged:
+        merged["notes"] = detection_notes(merged)
+    return merged
+
+def parse_many(results_iter: Iterable[List[Dict[str,Any]]], workers: int = 0, chunksize: int = 64) -> Iterator[Dict[str,Any]]:
+    """
+    Stream parse_contact_fields over many OCR result lists, yielding parsed dicts in input order.
+    With workers > 1 the input is read in bounded windows and fanned out to a process pool,
+    so memory stays flat no matter how many cards are re-parsed.
+    """
+    if workers <= 1:
+        for results in results_iter:
+            yield parse_contact_fields(results)
+        return
+    it = iter(results_iter)
+    window = workers * chunksize * 4
+    with Pool(processes=workers) as pool:
+        while True:
+            batch = list(islice(it, window))
+            if not batch:
+                break
+            for parsed in pool.imap(parse_contact_fields, batch, chunksize=chunksize):
+                yield parsed
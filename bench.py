@@ -0,0 +1,514 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from .utils import ensure_dir, load_config
+
+cfg = load_config()
+
+# Benchmarks for the serving path, kept out of the production modules:
+#   python -m src.bench <name> [options]
+# Each one runs the real pipeline/detector/recognizer code on the configured backends.
+
+
+def benchmark_crop_path(image_path, output_dir='outputs'):
+    """
+    Time and Python-visible allocations of one page through pipeline.process_array (stage
+    timings come from the pipeline itself), plus every recognize_from_crop call it makes.
+    The zero-copy crop handoff (gray views passed as a raw buffer to SetImageBytes) only exists
+    on the tesserocr path: under pytesseract each call still writes the crop to a temporary
+    image for the tesseract binary, and the crnn backend never calls recognize_from_crop.
+    tracemalloc does not see PIL's or Tesseract's own buffers.
+    """
+    from . import recognizer
+    from .pipeline import process_array
+    ensure_dir(output_dir)
+    img = cv2.imread(image_path)
+    if img is None:
+        raise FileNotFoundError(f"Cannot read image: {image_path}")
+    backend = cfg['recognizer'].get('backend', 'tesseract').lower()
+    engine = 'crnn' if backend == 'crnn' else ('tesserocr' if recognizer.tesserocr is not None else 'pytesseract')
+    calls = []
+    real = recognizer.recognize_from_crop
+
+    def traced(crop, *args, **kwargs):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        t = time.perf_counter()
+        out = real(crop, *args, **kwargs)
+        calls.append((time.perf_counter() - t, tracemalloc.get_traced_memory()[1] - base))
+        return out
+
+    timings = {}
+    recognizer.recognize_from_crop = traced
+    tracemalloc.start()
+    try:
+        t = time.perf_counter()
+        results = process_array(img, os.path.basename(image_path), output_dir, timings=timings)
+        elapsed = time.perf_counter() - t
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        recognizer.recognize_from_crop = real
+    report = {"engine": engine, "crops": len(results), "ms": round(1000.0 * elapsed, 1),
+              "peak_kb": round(peak / 1024.0, 1),
+              "stage_ms": {k: round(1000.0 * v, 1) for k, v in timings.items()},
+              "recognize_from_crop_calls": len(calls)}
+    if calls:
+        report["ms_per_call"] = round(1000.0 * sum(c[0] for c in calls) / len(calls), 2)
+        report["kb_per_call"] = round(sum(c[1] for c in calls) / 1024.0 / len(calls), 1)
+    return report
+
+
+def synthetic_document(width=2480, height=3508, n_words=120, seed=0, words_per_line=1):
+    # white page with random small/large words (or short lines of words); returns (BGR image, gt word boxes)
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 255, np.uint8)
+    gt = []
+    for _ in range(max(1, n_words // words_per_line)):
+        words = [''.join(rng.choice(list('ABCDEFGHKLMNPRSTabcdehkmnoprstuw0123456789'), int(rng.integers(3, 10))))
+                 for _ in range(words_per_line)]
+        scale = float(rng.choice([0.6, 0.9, 1.4, 2.5]))
+        thick = max(1, int(scale * 1.5))
+        sizes = [cv2.getTextSize(w, cv2.FONT_HERSHEY_SIMPLEX, scale, thick) for w in words]
+        space = cv2.getTextSize(' ', cv2.FONT_HERSHEY_SIMPLEX, scale, thick)[0][0]
+        line_w = sum(sz[0][0] for sz in sizes) + space * (len(words) - 1)
+        th = max(sz[0][1] for sz in sizes)
+        base = max(sz[1] for sz in sizes)
+        x = int(rng.integers(0, max(1, width - line_w)))
+        y = int(rng.integers(th + 1, max(th + 2, height - base)))
+        line_box = (x, y - th, x + line_w, y + base)
+        if any(not (line_box[2] < g[0] or g[2] < line_box[0] or line_box[3] < g[1] or g[3] < line_box[1]) for g in gt):
+            continue
+        for word, ((tw, _), _) in zip(words, sizes):
+            cv2.putText(img, word, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thick, cv2.LINE_AA)
+            gt.append((x, y - th, x + tw, y + base))
+            x += tw + space
+    return img, gt
+
+
+def detection_recall(boxes, gt, min_cover=0.5):
+    # share of ground-truth boxes with at least min_cover of their area inside one detection
+    found = 0
+    for (gx0, gy0, gx1, gy1) in gt:
+        area = max(1, (gx1 - gx0) * (gy1 - gy0))
+        for (x0, y0, x1, y1) in boxes:
+            iw = min(gx1, x1) - max(gx0, x0)
+            ih = min(gy1, y1) - max(gy0, y0)
+            if iw > 0 and ih > 0 and iw * ih >= min_cover * area:
+                found += 1
+                break
+    return found / max(1, len(gt))
+
+
+def benchmark_east(east_path, sizes=((2480, 3508), (1240, 1754), (4000, 3000)), n_docs=3, settings=None):
+    # latency vs recall of the fixed 320x320 pass against tiled settings on synthetic pages
+    from .detector import get_east_net, east_detect_fixed, east_detect_tiled
+    net = get_east_net(east_path)
+    settings = settings or {
+        'fixed 320': lambda img: east_detect_fixed(img, net),
+        'tiled 1280': lambda img: east_detect_tiled(img, net, max_side=1280),
+        'tiled 2560': lambda img: east_detect_tiled(img, net, max_side=2560),
+    }
+    rows = []
+    for (w, h) in sizes:
+        docs = [synthetic_document(w, h, seed=s) for s in range(n_docs)]
+        for name, fn in settings.items():
+            fn(docs[0][0])  # warm-up
+            t0 = time.perf_counter()
+            detected = [fn(img) for img, _ in docs]
+            elapsed = time.perf_counter() - t0
+            recalls = [detection_recall(boxes, gt) for boxes, (_, gt) in zip(detected, docs)]
+            rows.append({"size": f"{w}x{h}", "setting": name, "ms_per_page": 1000.0 * elapsed / n_docs,
+                         "recall": float(np.mean(recalls))})
+    return rows
+
+
+def synthetic_blank(width=2480, height=3508, seed=0):
+    # scanned empty backside: off-white paper, sensor noise, uneven lighting, dust, faint bleed-through
+    rng = np.random.default_rng(seed)
+    tone = float(rng.uniform(225, 250))
+    light = np.linspace(-8, 8, width, dtype=np.float32)[None, :]
+    page = tone + light + rng.normal(0, 3, (height, width)).astype(np.float32)
+    ghost, _ = synthetic_document(width, height, n_words=40, seed=seed + 1000)
+    page -= (255 - ghost[:, :, 0].astype(np.float32)) * 0.05
+    for _ in range(int(rng.integers(0, 15))):
+        cv2.circle(page, (int(rng.integers(0, width)), int(rng.integers(0, height))), 1, tone - 60, -1)
+    page = np.clip(page, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(page, cv2.COLOR_GRAY2BGR)
+
+
+def benchmark_predetect(n_text=4, n_blank=4, size=(1240, 1754), method=None):
+    # mixed corpus of text pages (wide margins) and blank backsides: per-page latency, blanks skipped, recall
+    from . import detector
+    from .detector import detect_text_boxes
+    dcfg = detector.cfg['detector']  # the detector's own config dict, which detect_text_boxes reads
+    method = method or dcfg.get('method', 'auto')
+    w, h = size
+    corpus = []
+    for s in range(n_text):
+        img, gt = synthetic_document(w // 2, h // 2, n_words=30, seed=s, words_per_line=3)
+        page = np.full((h, w, 3), 255, np.uint8)
+        page[h // 4:h // 4 + h // 2, w // 4:w // 4 + w // 2] = img
+        corpus.append((page, [(x0 + w // 4, y0 + h // 4, x1 + w // 4, y1 + h // 4) for (x0, y0, x1, y1) in gt]))
+    corpus += [(synthetic_blank(w, h, seed=s), None) for s in range(n_blank)]
+    rows = []
+    saved = dcfg.get('predetect', True)
+    try:
+        for flag in (False, True):
+            dcfg['predetect'] = flag
+            detect_text_boxes(corpus[0][0], method)  # warm-up
+            t0 = time.perf_counter()
+            results = [detect_text_boxes(img, method) for img, _ in corpus]
+            elapsed = time.perf_counter() - t0
+            recall = [detection_recall(b, gt) for b, (_, gt) in zip(results, corpus) if gt is not None]
+            rows.append({"predetect": flag, "ms_per_page": 1000.0 * elapsed / len(corpus),
+                         "blank_skipped": sum(1 for b, (_, gt) in zip(results, corpus) if gt is None and not b),
+                         "text_missed": sum(1 for b, (_, gt) in zip(results, corpus) if gt is not None and not b),
+                         "recall": float(np.mean(recall))})
+    finally:
+        dcfg['predetect'] = saved
+    return rows
+
+
+def benchmark_line_merge(pages, detect_fn, recognize_fn):
+    # crops per page and detect+recognize latency with raw detector boxes vs merged lines
+    from .detector import postprocess_boxes
+    rows = []
+    for name, post in (('raw boxes', lambda b: b), ('merged lines', postprocess_boxes)):
+        crops_total, t0 = 0, time.perf_counter()
+        for img in pages:
+            boxes = post(detect_fn(img))
+            crops = [img[y0:y1 + 1, x0:x1 + 1] for (x0, y0, x1, y1) in boxes if x1 > x0 and y1 > y0]
+            recognize_fn(crops)
+            crops_total += len(crops)
+        rows.append({"setting": name, "crops_per_page": crops_total / max(1, len(pages)),
+                     "ms_per_page": 1000.0 * (time.perf_counter() - t0) / max(1, len(pages))})
+    return rows
+
+
+def benchmark_edits(results, edits, repeat=1):
+    # compare per-edit latency of IncrementalParser.update_box against a full re-parse
+    from .incremental import IncrementalParser
+    from .parser import parse_contact_fields
+    state = IncrementalParser(results)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for index, text in edits:
+            state.update_box(index, text)
+    inc = (time.perf_counter() - t0) / max(1, repeat * len(edits))
+
+    work = [dict(r) for r in results]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for index, text in edits:
+            work[index]["text_clean"] = text
+            parse_contact_fields(work)
+    full = (time.perf_counter() - t0) / max(1, repeat * len(edits))
+    return {"incremental_ms": inc * 1000, "full_ms": full * 1000, "speedup": full / max(inc, 1e-12)}
+
+
+def labeled_crops(n=200, seed=0):
+    # [(gray crop, text)]: rendered words/numbers with scan damage from none to heavy (blur, noise, low contrast)
+    rng = np.random.default_rng(seed)
+    alphabet = list('ABCDEFGHKLMNPRSTabcdehkmnoprstuw0123456789@.-')
+    out = []
+    for i in range(n):
+        text = ''.join(rng.choice(alphabet, int(rng.integers(4, 14))))
+        scale = float(rng.uniform(0.5, 1.6))
+        thick = max(1, int(round(scale * 1.5)))
+        (tw, th), base = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thick)
+        img = np.full((th + base + 12, tw + 12), 255, np.uint8)
+        cv2.putText(img, text, (6, th + 6), cv2.FONT_HERSHEY_SIMPLEX, scale, 0, thick, cv2.LINE_AA)
+        damage = i % 4  # a quarter each: clean, blurred, noisy, faded + blurred + noisy
+        if damage in (1, 3):
+            img = cv2.GaussianBlur(img, (0, 0), float(rng.uniform(0.6, 1.4)))
+        if damage == 3:
+            img = (140 + img.astype(np.float32) * 0.45).astype(np.uint8)
+        if damage in (2, 3):
+            img = np.clip(img.astype(np.float32) + rng.normal(0, 22, img.shape), 0, 255).astype(np.uint8)
+        out.append((img, text))
+    return out
+
+
+
+def benchmark_cascade(samples=None, thresholds=(-1, 40, 60, 75, 90, 101), lang=None, ccfg=None):
+    """
+    Latency/accuracy trade-off of the cascade per threshold. Both paths are timed once per crop;
+    each threshold's row then charges the fast pass for every crop plus the expensive path for the
+    crops it escalates (-1 = never escalate, 101 = always), with the CER of the text it keeps.
+    """
+    from .cascade import _ccfg, fast_pass, escalate
+    from .eval import cer
+    ccfg = dict(ccfg or _ccfg())
+    lang = lang or cfg['recognizer'].get('lang', 'eng')
+    samples = samples or labeled_crops()
+    crops = [c for c, _ in samples]
+    fast_pass(crops[:4], lang, ccfg)  # warm-up (model load / traineddata)
+    fast, slow = [], []
+    for crop in crops:
+        t0 = time.perf_counter()
+        f = fast_pass([crop], lang, ccfg)[0]
+        t1 = time.perf_counter()
+        e = escalate(crop, lang, ccfg)
+        t2 = time.perf_counter()
+        fast.append((f, t1 - t0))
+        slow.append((e, t2 - t1))
+    rows = []
+    for thr in thresholds:
+        ms, errs, n_esc = 0.0, [], 0
+        for ((ftext, fconf), ft), ((stext, sconf, _), st), (_, gt) in zip(fast, slow, samples):
+            ms += ft
+            text = ftext
+            if fconf < thr:
+                n_esc += 1
+                ms += st
+                text = stext if sconf >= fconf else ftext
+            errs.append(cer(text, gt))
+        rows.append({"threshold": thr, "escalation_rate": n_esc / max(1, len(samples)),
+                     "ms_per_crop": 1000.0 * ms / max(1, len(samples)), "cer": float(np.mean(errs))})
+    return rows
+
+
+def benchmark_transport(sizes=((1240, 1754), (2480, 3508), (4000, 3000)), n_requests=40,
+                        transports=('pickle', 'shm'), in_flight=1):
+    """
+    Per-request overhead of handing a decoded BGR page to a worker and getting a result back,
+    with a no-op task so only the transport is measured. in_flight > 1 keeps that many requests
+    queued (the API under load). Returns rows of {size, transport, MB, ms_per_request, oneoff_blocks}.
+    """
+    from .workers import OCRWorkerPool
+    rows = []
+    for transport in transports:
+        with OCRWorkerPool(processes=1, transport=transport, slots=max(2, in_flight), slot_mb=64,
+                           kind='noop') as pool:
+            for (w, h) in sizes:
+                img = np.random.default_rng(0).integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+                pool.submit(img).result()  # warm-up: worker import, slot mapping
+                t0 = time.perf_counter()
+                window = []
+                for _ in range(n_requests):
+                    window.append(pool.submit(img))
+                    if len(window) >= in_flight:
+                        window.pop(0).result()
+                for f in window:
+                    f.result()
+                elapsed = time.perf_counter() - t0
+                rows.append({"size": f"{w}x{h}", "transport": transport, "MB": round(img.nbytes / 2 ** 20, 1),
+                             "ms_per_request": round(1000.0 * elapsed / n_requests, 3),
+                             "oneoff_blocks": pool.oneoff_blocks})
+    return rows
+
+
+def synthetic_crops(n=256, seed=0):
+    # word/line-like gray crops with widths from short words to long lines
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(n):
+        h = int(rng.integers(20, 48))
+        w = int(h * rng.uniform(1.0, 14.0))
+        crops.append(rng.integers(0, 255, size=(h, w), dtype=np.uint8))
+    return crops
+
+
+def max_rss_mb():
+    # peak resident set size of this process (ru_maxrss is KiB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure_backend(runtime, model_path, n_crops=256, batch_size=32):
+    # meant to run in a fresh process: import + load time, peak RSS, crops/sec
+    from .runtime import make_recognizer
+    t0 = time.perf_counter()
+    rec = make_recognizer(runtime, model_path, batch_size=batch_size)
+    load_s = time.perf_counter() - t0
+    crops = synthetic_crops(n_crops)
+    rec.recognize(crops[:8])  # warm-up
+    t0 = time.perf_counter()
+    rec.recognize(crops)
+    cps = len(crops) / (time.perf_counter() - t0)
+    return {"runtime": runtime, "load_s": round(load_s, 3), "rss_mb": round(max_rss_mb(), 1),
+            "crops_per_s": round(cps, 1), "torch_imported": 'torch' in sys.modules}
+
+
+def compare_backends(models, n_crops=256, batch_size=32):
+    # models: {runtime: model_path}; each backend is measured in its own interpreter
+    rows = []
+    for runtime, path in models.items():
+        cmd = [sys.executable, '-m', __package__ + '.bench', 'measure', runtime, path,
+               '--n', str(n_crops), '--batch_size', str(batch_size)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            rows.append({"runtime": runtime, "error": proc.stderr.strip().splitlines()[-1:]})
+            continue
+        rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return rows
+
+
+def benchmark_batch_sizes(recognizer, crops, batch_sizes=(1, 4, 16, 32, 64), repeat=3):
+    # crops/sec of a CRNN recognizer for each batch size, best of `repeat` runs
+    results = {}
+    for bs in batch_sizes:
+        recognizer.batch_size = bs
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            recognizer.recognize(crops)
+            best = min(best, time.perf_counter() - t0)
+        results[bs] = len(crops) / best
+    return results
+
+
+def benchmark_loading(datasets, batch_size=16, n_batches=50):
+    # samples/sec pulled through a DataLoader for each {name: dataset}
+    from torch.utils.data import DataLoader
+    from .dataset import ocr_collate
+    out = {}
+    for name, ds in datasets.items():
+        loader = DataLoader(ds, batch_size=batch_size, shuffle=True, collate_fn=ocr_collate)
+        t0 = time.perf_counter()
+        seen = 0
+        for i, (images, _, _, _) in enumerate(loader):
+            seen += images.size(0)
+            if i + 1 >= n_batches:
+                break
+        out[name] = seen / (time.perf_counter() - t0)
+    return out
+
+
+CLEAN_SAMPLE = ["  Ravi  Kumar\t", "Mob: +91 98O76 543210 ,", "\u201cAcme\u201d Pvt. Ltd .",
+                "ravi@acme.c0m", "No. 12 , MG Road\r\nChennai - 6OOO01", "\x0cSenior\u00a0Manager ;", ""]
+
+
+def benchmark_clean(repeat=2000):
+    # reference vs compiled text cleaner on typical crop texts, in us/text
+    from .cleaner import final_clean_reference, final_clean, final_clean_many
+    sample = CLEAN_SAMPLE * repeat
+    out = {}
+    for fn in (final_clean_reference, final_clean, final_clean_many):
+        t0 = time.perf_counter()
+        if fn is final_clean_many:
+            fn(sample)
+        else:
+            for t in sample:
+                fn(t)
+        out[fn.__name__] = (time.perf_counter() - t0) * 1e6 / len(sample)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serving-path benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("crops", help="crop -> recognizer handoff on one page (process_array)")
+    p.add_argument("image")
+    p.add_argument("--output_dir", default="outputs")
+    p = sub.add_parser("east", help="EAST latency vs recall: fixed 320x320 pass against tiled settings")
+    p.add_argument("--east", default=cfg['detector'].get('east_model_path'))
+    sub.add_parser("merge", help="crops per page and detect+recognize latency: raw detector boxes vs merged lines")
+    sub.add_parser("predetect", help="text pages and blank backsides with and without the pre-detector")
+    p = sub.add_parser("edits", help="per-edit latency of IncrementalParser.update_box vs a full re-parse")
+    p.add_argument("--repeat", type=int, default=50)
+    p = sub.add_parser("cascade", help="recognition cascade: escalation rate vs latency vs CER per threshold")
+    p.add_argument("--n", type=int, default=200, help="Synthetic labeled crops")
+    p.add_argument("--fast", choices=["tesseract", "crnn"], default=None)
+    p = sub.add_parser("transport", help="image handoff to OCR worker processes: pickle vs shared memory")
+    p.add_argument("--n", type=int, default=40, help="Requests per size and transport")
+    p.add_argument("--in_flight", type=int, default=1)
+    p = sub.add_parser("batch", help="CRNN crops/sec per batch size, padded to max_w vs width-bucketed")
+    p.add_argument("--checkpoint", default=None, help="Checkpoint (default: random weights)")
+    p = sub.add_parser("backends", help="CRNN serving backends: load time, peak RSS, crops/sec, torch imported")
+    p.add_argument("checkpoint")
+    p.add_argument("onnx")
+    p.add_argument("torchscript")
+    p = sub.add_parser("measure", help="one backend in this process (compare_backends runs it per backend)")
+    p.add_argument("runtime")
+    p.add_argument("model_path")
+    p.add_argument("--n", type=int, default=256)
+    p.add_argument("--batch_size", type=int, default=32)
+    p = sub.add_parser("loading", help="training data loading: decoded images vs the preprocessed cache")
+    p.add_argument("--annotations", required=True)
+    p.add_argument("--img_root", required=True)
+    p.add_argument("--cache_dir", required=True, help="Built here first when it does not exist yet")
+    p.add_argument("--chars", default='abcdefghijklmnopqrstuvwxyz0123456789')
+    p.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    p = sub.add_parser("clean", help="text cleaner: reference vs compiled implementation")
+    p.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    if args.bench == "east":
+        for row in benchmark_east(args.east):
+            print(f"{row['size']:>10} {row['setting']:>11}: {row['ms_per_page']:8.1f} ms/page, recall {row['recall']:.3f}")
+    elif args.bench == "merge":
+        # recognition through the configured backend, so the numbers include the per-crop OCR cost
+        from .detector import detect_raw_boxes
+        from .recognizer import recognize_crops
+        pages = [synthetic_document(1240, 1754, n_words=80, seed=s, words_per_line=4)[0] for s in range(3)]
+        for row in benchmark_line_merge(pages, lambda img: detect_raw_boxes(img, cfg['detector'].get('method', 'auto')),
+                                        recognize_crops):
+            print(f"{row['setting']:>12}: {row['crops_per_page']:7.1f} crops/page, {row['ms_per_page']:8.1f} ms/page")
+    elif args.bench == "predetect":
+        for row in benchmark_predetect():
+            print(f"predetect={row['predetect']!s:>5}: {row['ms_per_page']:8.1f} ms/page, "
+                  f"blank pages skipped {row['blank_skipped']}, text pages missed {row['text_missed']}, "
+                  f"recall {row['recall']:.3f}")
+    elif args.bench == "edits":
+        # synthetic dense card: 60 boxes over 30 rows, edit a handful of them
+        res = []
+        for row in range(30):
+            for col in range(2):
+                res.append({"box": [10 + col * 200, row * 30, 190 + col * 200, row * 30 + 20],
+                            "text_clean": f"Line {row} part {col} road {row * 7}", "confidence": 80})
+        edits = [(i, f"edited{i}@example.com") for i in range(0, 60, 7)]
+        print(benchmark_edits(res, edits, repeat=args.repeat))
+    elif args.bench == "cascade":
+        from .cascade import _ccfg
+        ccfg = _ccfg()
+        if args.fast:
+            ccfg["fast"] = args.fast
+        for row in benchmark_cascade(labeled_crops(args.n), ccfg=ccfg):
+            print(f"min_conf {row['threshold']:>4}: escalated {100 * row['escalation_rate']:5.1f}%, "
+                  f"{row['ms_per_crop']:7.2f} ms/crop, CER {row['cer']:.3f}")
+    elif args.bench == "transport":
+        for row in benchmark_transport(n_requests=args.n, in_flight=args.in_flight):
+            print(f"{row['size']:>10} {row['MB']:6.1f} MB {row['transport']:>6}: {row['ms_per_request']:8.3f} ms/request"
+                  f" (one-off blocks {row['oneoff_blocks']})")
+    elif args.bench == "batch":
+        from .infer import CRNNRecognizer
+        chars = None if args.checkpoint else 'abcdefghijklmnopqrstuvwxyz0123456789'
+        crops = synthetic_crops()
+        for step in (320, 32):
+            rec = CRNNRecognizer(args.checkpoint, chars=chars, bucket_step=step)
+            for bs, cps in benchmark_batch_sizes(rec, crops).items():
+                print(f"bucket_step={step:>3} batch={bs:>3}: {cps:8.1f} crops/s")
+    elif args.bench == "backends":
+        models = {'torch': args.checkpoint, 'torchscript': args.torchscript, 'onnx': args.onnx, 'opencv': args.onnx}
+        for row in compare_backends(models):
+            print(row)
+    elif args.bench == "measure":
+        print(json.dumps(measure_backend(args.runtime, args.model_path, args.n, args.batch_size)))
+    elif args.bench == "clean":
+        for name, us in benchmark_clean(args.repeat).items():
+            print(f"{name:>22}: {us:.2f} us/text")
+    elif args.bench == "loading":
+        from .dataset import OCRDataset, CachedOCRDataset, build_dataset_cache
+        from .utils import Tokenizer
+        tok = Tokenizer(args.chars)
+        if not os.path.exists(os.path.join(args.cache_dir, "meta.json")):
+            t0 = time.perf_counter()
+            build_dataset_cache(args.annotations, args.img_root, tok, args.cache_dir, dtype=args.dtype)
+            print(f"cache built in {time.perf_counter() - t0:.1f}s")
+        speeds = benchmark_loading({"OCRDataset": OCRDataset(args.annotations, args.img_root, tok),
+                                    "CachedOCRDataset": CachedOCRDataset(args.cache_dir)})
+        for name, sps in speeds.items():
+            print(f"{name:>18}: {sps:8.1f} samples/s")
+    elif args.bench == "crops":
+        print(json.dumps(benchmark_crop_path(args.image, args.output_dir), indent=2))
+
+
+if __name__ == '__main__':
+    main()
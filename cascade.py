@@ -0,0 +1,101 @@
+import threading
+import cv2
+from .recognizer import recognize_from_crop, get_crnn_recognizer, route_lang
+from .cleaner import preprocess_image
+from .utils import load_config
+import logging
+
+cfg = load_config()
+
+# Confidence-gated recognition: every crop gets a cheap first pass, and only crops whose
+# first-pass confidence is below recognizer.cascade_min_conf pay for the expensive re-OCR.
+
+_STATS = {"crops": 0, "escalated": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _ccfg():
+    rcfg = cfg['recognizer']
+    return {
+        "fast": rcfg.get('cascade_fast', 'tesseract'),
+        "fast_max_height": rcfg.get('cascade_fast_max_height', 32),
+        "fast_psm": rcfg.get('cascade_fast_psm', 7),
+        "min_conf": rcfg.get('cascade_min_conf', 75),
+        "psms": rcfg.get('cascade_psms') or [6, 7, 11],
+        "binarize": rcfg.get('cascade_binarize', True),
+        "routing": rcfg.get('lang_routing', False),
+    }
+
+
+def fast_pass(crops, lang, ccfg=None):
+    # [(text, conf)]: batched CRNN, or Tesseract single-line mode on a crop shrunk to fast_max_height
+    ccfg = ccfg or _ccfg()
+    if ccfg['fast'] == 'crnn':
+        return get_crnn_recognizer().recognize(crops)
+    max_h = ccfg['fast_max_height']
+    out = []
+    for crop in crops:
+        h, w = crop.shape[:2]
+        if max_h and h > max_h:
+            crop = cv2.resize(crop, (max(1, int(round(w * max_h / float(h)))), max_h), interpolation=cv2.INTER_AREA)
+        out.append(recognize_from_crop(crop, lang=lang, psm=ccfg['fast_psm']))
+    return out
+
+
+def escalate(crop, lang, ccfg=None):
+    """
+    The expensive path for one crop: full resolution, the crop as is and (cascade_binarize) the
+    adaptive-threshold copy from preprocess_image, each read with every PSM in cascade_psms.
+    Returns (text, conf, lang) of the most confident reading; with lang_routing the winner is
+    re-read once more in the routed language set if that helps.
+    """
+    ccfg = ccfg or _ccfg()
+    variants = [crop]
+    if ccfg['binarize']:
+        variants.append(preprocess_image(crop, {'preprocess': {'gray': crop.ndim == 3, 'bilateral_filter': True,
+                                                              'adaptive_thresh': True}}))
+    best = ("", -1, lang, None, None)
+    for variant in variants:
+        for psm in ccfg['psms']:
+            text, conf = recognize_from_crop(variant, lang=lang, psm=psm)
+            if conf > best[1]:
+                best = (text, conf, lang, variant, psm)
+    text, conf, _, variant, psm = best
+    if ccfg['routing'] and variant is not None:
+        routed = route_lang(text, conf, lang, crop)
+        if routed:
+            text2, conf2 = recognize_from_crop(variant, lang=routed, psm=psm)
+            if conf2 > conf:
+                return text2, conf2, routed
+    return text, conf, lang
+
+
+def cascade_recognize(crops, lang=None, ccfg=None):
+    # [(text, conf, lang, stage)] in input order; stage is "fast" or "escalated"
+    ccfg = ccfg or _ccfg()
+    lang = lang or cfg['recognizer'].get('lang', 'eng')
+    fast_lang = 'crnn' if ccfg['fast'] == 'crnn' else lang
+    results = []
+    for crop, (text, conf) in zip(crops, fast_pass(crops, lang, ccfg)):
+        if conf >= ccfg['min_conf']:
+            results.append((text, conf, fast_lang, "fast"))
+            continue
+        text2, conf2, lang2 = escalate(crop, lang, ccfg)
+        if conf2 >= conf:
+            results.append((text2, conf2, lang2, "escalated"))
+        else:
+            results.append((text, conf, fast_lang, "escalated"))
+    n_esc = sum(r[3] == "escalated" for r in results)
+    with _STATS_LOCK:
+        _STATS["crops"] += len(results)
+        _STATS["escalated"] += n_esc
+    logging.debug(f"cascade: {n_esc}/{len(results)} crops escalated")
+    return results
+
+
+def cascade_stats():
+    # running totals for this process, with the escalation rate
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    stats["escalation_rate"] = stats["escalated"] / max(1, stats["crops"])
+    return stats
@@ -0,0 +1,145 @@
+import os
+import re
+import queue
+import threading
+import logging
+import torch
+from .utils import load_checkpoint
+
+CKPT_RE = re.compile(r'^ckpt_epoch_(\d+)\.pth$')
+
+
+def snapshot(obj):
+    # detached CPU copy of every tensor in a (nested) state dict, so training can keep mutating
+    # the live tensors while the copy is written in the background
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return obj
+
+
+def atomic_save(state, path):
+    # write next to the target and rename, so a crash never leaves a truncated checkpoint
+    tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    torch.save(state, tmp)
+    os.replace(tmp, path)
+
+
+class CheckpointManager:
+    """
+    Rotating checkpoints for train.py: ckpt_epoch_N.pth for the last `keep_last` epochs plus
+    best.pth (lowest validation CER). Writes happen on one background thread; save() only pays
+    for a CPU snapshot. weights_only drops the optimizer state (smaller, but resume then restarts
+    the optimizer).
+    """
+
+    def __init__(self, out_dir, keep_last=3, weights_only=False, async_save=True):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.keep_last = max(1, int(keep_last))
+        self.weights_only = weights_only
+        self.best_metric = None
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if async_save:
+            self._queue = queue.Queue(maxsize=2)
+            self._thread = threading.Thread(target=self._worker, name="ckpt-writer", daemon=True)
+            self._thread.start()
+
+    def path_for(self, epoch):
+        return os.path.join(self.out_dir, f'ckpt_epoch_{epoch}.pth')
+
+    def epochs_on_disk(self):
+        found = []
+        for name in os.listdir(self.out_dir):
+            m = CKPT_RE.match(name)
+            if m:
+                found.append(int(m.group(1)))
+        return sorted(found)
+
+    def latest(self):
+        epochs = self.epochs_on_disk()
+        return self.path_for(epochs[-1]) if epochs else None
+
+    def save(self, epoch, model, optimizer=None, tokenizer=None, metric=None, extra=None):
+        if self._error is not None:
+            raise RuntimeError("previous checkpoint write failed") from self._error
+        is_best = metric is not None and (self.best_metric is None or metric < self.best_metric)
+        if is_best:
+            self.best_metric = metric
+        state = {
+            'epoch': epoch,
+            'model_state': snapshot(model.state_dict()),
+            'tokenizer': dict(tokenizer.__dict__) if tokenizer is not None else None,
+            'val_cer': metric,
+            'best_cer': self.best_metric,
+        }
+        if optimizer is not None and not self.weights_only:
+            state['optim_state'] = snapshot(optimizer.state_dict())
+        if extra:
+            state.update(extra)
+        if self._queue is not None:
+            self._queue.put((epoch, state, is_best))
+        else:
+            self._write(epoch, state, is_best)
+
+    def _write(self, epoch, state, is_best):
+        path = self.path_for(epoch)
+        atomic_save(state, path)
+        if is_best:
+            atomic_save(state, os.path.join(self.out_dir, 'best.pth'))
+        for old in self.epochs_on_disk()[:-self.keep_last]:
+            try:
+                os.remove(self.path_for(old))
+            except OSError:
+                pass
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                logging.exception("Checkpoint write failed")
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        # block until every queued checkpoint is on disk
+        if self._queue is not None:
+            self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("checkpoint write failed") from self._error
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise RuntimeError("checkpoint write failed") from self._error
+
+    def resume(self, model, optimizer=None, path=None, device='cpu'):
+        """
+        Restore model (and optimizer when saved) from `path` or the latest epoch checkpoint.
+        Returns the epoch to start from (1 when there is nothing to resume).
+        """
+        path = path or self.latest()
+        if not path or not os.path.exists(path):
+            return 1
+        ckpt = load_checkpoint(path, device)
+        model.load_state_dict(ckpt['model_state'])
+        if optimizer is not None and ckpt.get('optim_state'):
+            optimizer.load_state_dict(ckpt['optim_state'])
+        elif optimizer is not None:
+            logging.warning(f"{path} has no optimizer state (weights-only); optimizer starts fresh")
+        self.best_metric = ckpt.get('best_cer')
+        logging.info(f"Resumed from {path} (epoch {ckpt.get('epoch')})")
+        return int(ckpt.get('epoch') or 0) + 1
@@ -1,8 +1,11 @@
 import os
+import json
+import numpy as np
 import pandas as pd
+from PIL import Image
 from torch.utils.data import Dataset
 import torch
-from .utils import load_image_gray, resize_and_pad
+from .utils import Tokenizer, load_image_gray, resize_and_pad
 
 class OCRDataset(Dataset):
     def __init__(self, annotations_file, img_root, tokenizer, target_h=32, max_w=320):
@@ -11,26 +14,202 @@ class OCRDataset(Dataset):
         self.tokenizer = tokenizer
         self.target_h = target_h
         self.max_w = max_w
+        # plain lists: df.iloc per item is far slower than list indexing
+        self.image_paths = self.df['image_path'].tolist()
+        self.transcriptions = self.df['transcription'].tolist()
 
     def __len__(self):
         return len(self.df)
 
     def __getitem__(self, idx):
-        row = self.df.iloc[idx]
-        img_path = os.path.join(self.img_root, row['image_path'])
+        img_path = os.path.join(self.img_root, self.image_paths[idx])
         img = load_image_gray(img_path)
         arr = resize_and_pad(img, target_h=self.target_h, max_w=self.max_w)
         tensor = torch.from_numpy(arr).unsqueeze(0).float()  # 1, H, W
-        label = row['transcription']
+        label = self.transcriptions[idx]
         label_ids = self.tokenizer.encode(label)
         return tensor, torch.tensor(label_ids, dtype=torch.long)
 
+    def sample_widths(self):
+        # resized (pre-padding) width per sample; PIL only reads the header here, no decode
+        widths = np.zeros(len(self), dtype=np.int32)
+        for i, rel in enumerate(self.image_paths):
+            with Image.open(os.path.join(self.img_root, rel)) as im:
+                w, h = im.size
+            widths[i] = min(self.max_w, max(1, int(w * (self.target_h / float(h)))))
+        return widths
+
+
+def build_dataset_cache(annotations_file, img_root, tokenizer, cache_dir, target_h=32, max_w=320, dtype='float32'):
+    """
+    One-time preprocessing of an annotations CSV into memory-mappable arrays:
+    images.npy (N x H x W normalized, same values OCRDataset yields), labels.npy (all label ids
+    concatenated), label_offsets.npy (N+1), widths.npy (resized width before padding).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    src = OCRDataset(annotations_file, img_root, tokenizer, target_h=target_h, max_w=max_w)
+    n = len(src)
+    images = np.lib.format.open_memmap(os.path.join(cache_dir, "images.npy"), mode="w+",
+                                       dtype=np.dtype(dtype), shape=(n, target_h, max_w))
+    widths = np.zeros(n, dtype=np.int32)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    labels = []
+    for i in range(n):
+        img = load_image_gray(os.path.join(img_root, src.image_paths[i]))
+        w, h = img.size
+        widths[i] = min(max_w, max(1, int(w * (target_h / float(h)))))
+        images[i] = resize_and_pad(img, target_h=target_h, max_w=max_w)
+        ids = tokenizer.encode(src.transcriptions[i])
+        labels.extend(ids)
+        offsets[i + 1] = offsets[i] + len(ids)
+    images.flush()
+    del images
+    np.save(os.path.join(cache_dir, "labels.npy"), np.asarray(labels, dtype=np.int64))
+    np.save(os.path.join(cache_dir, "label_offsets.npy"), offsets)
+    np.save(os.path.join(cache_dir, "widths.npy"), widths)
+    with open(os.path.join(cache_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"count": n, "chars": tokenizer.chars, "target_h": target_h, "max_w": max_w,
+                   "dtype": dtype, "source": os.path.abspath(annotations_file)}, f, indent=2)
+    return cache_dir
+
+
+class CachedOCRDataset(Dataset):
+    """
+    Reads the arrays written by build_dataset_cache. Images are memory-mapped copy-on-write,
+    so __getitem__ hands out zero-copy views; items match OCRDataset (tensor 1xHxW, label ids).
+    """
+
+    def __init__(self, cache_dir):
+        with open(os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.tokenizer = Tokenizer(self.meta["chars"])
+        self.target_h = self.meta["target_h"]
+        self.max_w = self.meta["max_w"]
+        self.images = np.load(os.path.join(cache_dir, "images.npy"), mmap_mode="c")
+        self.labels = np.load(os.path.join(cache_dir, "labels.npy"))
+        self.offsets = np.load(os.path.join(cache_dir, "label_offsets.npy"))
+        self.widths = np.load(os.path.join(cache_dir, "widths.npy"))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def label_lengths(self):
+        return np.diff(self.offsets)
+
+    def sample_widths(self):
+        return self.widths
+
+    def __getitem__(self, idx):
+        tensor = torch.from_numpy(self.images[idx]).unsqueeze(0)
+        if tensor.dtype != torch.float32:
+            tensor = tensor.float()
+        lo, hi = self.offsets[idx], self.offsets[idx + 1]
+        return tensor, torch.from_numpy(self.labels[lo:hi])
+
 
 def ocr_collate(batch):
+    # items are (image, label ids) or, through WithWidths, (image, label ids, resized width);
+    # returns images, concatenated labels, label lengths and per-sample true widths (the padded
+    # width when the items carry none)
     images = [b[0] for b in batch]
     labels = [b[1] for b in batch]
     images = torch.stack(images, dim=0)
     # Convert labels to concatenated vector + lengths (needed for CTC)
     label_lengths = torch.tensor([len(l) for l in labels], dtype=torch.long)
     concatenated = torch.cat(labels) if len(labels) > 0 else torch.tensor([], dtype=torch.long)
-    return images, concatenated, label_lengths
+    widths = torch.tensor([int(b[2]) if len(b) > 2 else images.size(-1) for b in batch], dtype=torch.long)
+    return images, concatenated, label_lengths, widths
+
+
+class WithWidths(Dataset):
+    """
+    Wraps OCRDataset / CachedOCRDataset so items also carry the sample's resized (pre-padding)
+    width. The model packs the padding out of its recurrent layer with those widths, as the
+    recognizers do at inference, and train uses output_lengths(widths) as the CTC input lengths.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.widths = np.asarray(dataset.sample_widths())
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def sample_widths(self):
+        return self.widths
+
+    def __getitem__(self, idx):
+        image, label = self.dataset[idx]
+        return image, label, int(self.widths[idx])
+
+
+class BucketBatchSampler:
+    """
+    Batches of samples with similar resized width: indices are grouped into width buckets
+    (multiples of bucket_step), shuffled inside each bucket, cut into batches, and the batch
+    order is shuffled every epoch. Pair with TrimCollate so batches pad only to the bucket.
+    """
+
+    def __init__(self, widths, batch_size, bucket_step=32, shuffle=True, drop_last=False, seed=0):
+        self.widths = np.asarray(widths)
+        self.batch_size = batch_size
+        self.bucket_step = bucket_step
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        keys = (self.widths + bucket_step - 1) // bucket_step
+        self.buckets = [np.flatnonzero(keys == k) for k in np.unique(keys)]
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        batches = []
+        for idxs in self.buckets:
+            if self.shuffle:
+                idxs = rng.permutation(idxs)
+            for k in range(0, len(idxs), self.batch_size):
+                batch = idxs[k:k + self.batch_size]
+                if self.drop_last and len(batch) < self.batch_size:
+                    continue
+                batches.append(batch.tolist())
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return iter(batches)
+
+    def __len__(self):
+        if self.drop_last:
+            return sum(len(b) // self.batch_size for b in self.buckets)
+        return sum((len(b) + self.batch_size - 1) // self.batch_size for b in self.buckets)
+
+
+class TrimCollate:
+    """
+    ocr_collate, then cut the batch's shared right padding down to a multiple of bucket_step.
+    resize_and_pad pads with white (1.0 after normalization), so trailing all-white columns are
+    identical to padding and dropping them only shortens the CTC sequence.
+    """
+
+    def __init__(self, bucket_step=32, pad_value=1.0):
+        self.bucket_step = bucket_step
+        self.pad_value = pad_value
+
+    def __call__(self, batch):
+        images, labels, label_lengths, widths = ocr_collate(batch)
+        cols = (images < self.pad_value).flatten(0, 2).any(0).nonzero()
+        used = int(cols[-1]) + 1 if len(cols) else 1
+        width = min(images.size(-1), -(-used // self.bucket_step) * self.bucket_step)
+        return images[..., :width].contiguous(), labels, label_lengths, widths.clamp(max=width)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the preprocessed dataset cache (python -m src.bench loading compares speed)")
+    parser.add_argument("--annotations", required=True)
+    parser.add_argument("--img_root", required=True)
+    parser.add_argument("--cache_dir", required=True)
+    parser.add_argument("--chars", default='abcdefghijklmnopqrstuvwxyz0123456789')
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = parser.parse_args()
+    build_dataset_cache(args.annotations, args.img_root, Tokenizer(args.chars), args.cache_dir, dtype=args.dtype)
+    print(f"cache written to {args.cache_dir}")
@@ -0,0 +1,174 @@
+import math
+import re
+from collections import namedtuple
+import numpy as np
+
+# numpy-only so every CRNN backend (torch, onnx, cv2.dnn) can share it
+
+Decoded = namedtuple("Decoded", ["text", "char_confidences", "confidence"])
+
+
+def softmax(logits, axis=-1):
+    x = np.asarray(logits, dtype=np.float32)
+    x = x - x.max(axis=axis, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=axis, keepdims=True)
+    return x
+
+
+def _finish(text, confs):
+    # sequence confidence = mean per-character confidence, on the 0-100 scale tesseract uses
+    conf = int(round(100.0 * float(np.mean(confs)))) if len(confs) else -1
+    return Decoded(text, [round(float(c), 4) for c in confs], conf)
+
+
+def ctc_greedy_decode(probs, tokenizer, lengths=None):
+    """
+    Greedy CTC decode of a whole batch with array ops.
+    probs: T x B x C softmax output (the CRNN layout); lengths: valid time steps per sample.
+    A character's confidence is the max probability over the frames of its run.
+    """
+    probs = np.asarray(probs)
+    T, B, _ = probs.shape
+    if B == 0 or T == 0:
+        return [_finish('', []) for _ in range(B)]
+    idx = probs.argmax(2).T  # B x T
+    conf = probs.max(2).T
+    if lengths is not None:
+        valid = np.arange(T)[None, :] < np.asarray(lengths).reshape(B, 1)
+        idx = np.where(valid, idx, tokenizer.blank_idx)
+    # run starts: first frame of every row plus every label change
+    change = np.ones((B, T), dtype=bool)
+    change[:, 1:] = idx[:, 1:] != idx[:, :-1]
+    starts = np.flatnonzero(change.ravel())
+    run_label = idx.ravel()[starts]
+    run_conf = np.maximum.reduceat(conf.ravel(), starts)
+    run_row = starts // T
+    keep = (run_label != tokenizer.blank_idx) & (run_label != tokenizer.pad_idx)
+    labels, confs, rows = run_label[keep], run_conf[keep], run_row[keep]
+    bounds = np.searchsorted(rows, np.arange(B + 1))
+    idx2char = tokenizer.idx2char
+    out = []
+    for b in range(B):
+        lo, hi = bounds[b], bounds[b + 1]
+        out.append(_finish(''.join(idx2char[i] for i in labels[lo:hi]), confs[lo:hi]))
+    return out
+
+
+EMAIL_PARTIAL_RE = re.compile(r'^[\w.+\-]+@[\w\-]*(\.[\w\-]*)*$')
+PHONE_PARTIAL_RE = re.compile(r'^\+?[\d\-]{3,}$')
+
+
+class LexiconScorer:
+    """
+    Ranking bonus for beam prefixes (log domain): the word being typed is a known word,
+    a prefix of one, a partial email address or a run of phone digits.
+    """
+
+    def __init__(self, words=(), word_bonus=2.0, prefix_bonus=0.5, pattern_bonus=1.0):
+        self.words = set()
+        self.prefixes = set()
+        self.word_bonus = word_bonus
+        self.prefix_bonus = prefix_bonus
+        self.pattern_bonus = pattern_bonus
+        self.add_words(words)
+
+    def add_words(self, words):
+        for w in words:
+            w = w.strip().lower()
+            if not w:
+                continue
+            self.words.add(w)
+            for k in range(1, len(w)):
+                self.prefixes.add(w[:k])
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([line.split('#', 1)[0] for line in f], **kwargs)
+
+    def score(self, text):
+        token = text.rsplit(' ', 1)[-1].lower()
+        if not token:
+            return 0.0
+        if token in self.words:
+            return self.word_bonus
+        if token in self.prefixes:
+            return self.prefix_bonus
+        if '@' in token and EMAIL_PARTIAL_RE.match(token):
+            return self.pattern_bonus
+        if PHONE_PARTIAL_RE.match(token):
+            return self.pattern_bonus
+        return 0.0
+
+
+def _logsumexp(a, b):
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    m = max(a, b)
+    return m + math.log1p(math.exp(-abs(a - b)))
+
+
+def ctc_beam_decode(probs, tokenizer, lengths=None, beam_width=8, scorer=None, prune=1e-3):
+    """
+    CTC prefix beam search per sample, T x B x C probs in, Decoded per sample out.
+    Prefixes are ranked by log P(prefix) + scorer.score(text); only characters above
+    `prune` probability (plus each frame's most likely class) are expanded at each frame.
+    """
+    probs = np.asarray(probs)
+    T, B, _ = probs.shape
+    blank, pad = tokenizer.blank_idx, tokenizer.pad_idx
+    idx2char = tokenizer.idx2char
+
+    def rank(kv):
+        prefix, (pb, pnb, _) = kv
+        score = _logsumexp(pb, pnb)
+        if scorer is not None:
+            score += scorer.score(''.join(idx2char[i] for i in prefix))
+        return score
+
+    out = []
+    for b in range(B):
+        n = T if lengths is None else int(lengths[b])
+        logp = np.log(np.maximum(probs[:n, b, :], 1e-12))
+        # prefix (tuple of labels) -> [log p ending in blank, log p ending in non-blank, char confs]
+        beams = {(): [0.0, -math.inf, ()]}
+        for t in range(n):
+            cands = np.flatnonzero(probs[t, b] >= prune)
+            # the frame's most likely non-pad class is always expanded, so a flat distribution
+            # with nothing above `prune` cannot empty the beam
+            row = probs[t, b]
+            top = int(np.argmax(np.where(np.arange(row.size) == pad, -np.inf, row)))
+            if top not in cands:
+                cands = np.append(cands, top)
+            nxt = {}
+            for prefix, (pb, pnb, confs) in beams.items():
+                total = _logsumexp(pb, pnb)
+                for c in cands:
+                    if c == pad:
+                        continue
+                    lp = logp[t, c]
+                    if c == blank:
+                        e = nxt.setdefault(prefix, [-math.inf, -math.inf, confs])
+                        e[0] = _logsumexp(e[0], total + lp)
+                        continue
+                    p_c = float(probs[t, b, c])
+                    new = prefix + (c,)
+                    if prefix and prefix[-1] == c:
+                        # repeat without a blank in between stays on the same prefix
+                        e = nxt.setdefault(prefix, [-math.inf, -math.inf, confs])
+                        e[1] = _logsumexp(e[1], pnb + lp)
+                        if e[2] and p_c > e[2][-1]:
+                            e[2] = e[2][:-1] + (p_c,)
+                        e_new = nxt.setdefault(new, [-math.inf, -math.inf, confs + (p_c,)])
+                        e_new[1] = _logsumexp(e_new[1], pb + lp)
+                    else:
+                        e_new = nxt.setdefault(new, [-math.inf, -math.inf, confs + (p_c,)])
+                        e_new[1] = _logsumexp(e_new[1], total + lp)
+            beams = dict(sorted(nxt.items(), key=rank, reverse=True)[:beam_width])
+        best = max(beams.items(), key=rank)
+        prefix, (_, _, confs) = best
+        out.append(_finish(''.join(idx2char[i] for i in prefix), confs))
+    return out
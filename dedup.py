@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import cv2
+import numpy as np
+
+# Result reuse for repeated batch/API inputs. The default key is an exact content hash of the
+# decoded pixels, so only byte-identical images share a result. Perceptual hashes ("phash",
+# "dhash") also catch rescans/re-encodes, but cards printed from one template hash within a few
+# bits of each other, so a perceptual hit is only accepted after a block-wise comparison of
+# thumbnails (confirm_block_diff) that a changed name or number fails.
+
+
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+
+def _bits_to_int(bits):
+    value = 0
+    for b in bits.ravel():
+        value = (value << 1) | int(b)
+    return value
+
+
+def dhash(img, size=8):
+    # difference hash: sign of horizontal gradient on a (size+1) x size thumbnail
+    small = cv2.resize(_gray(img), (size + 1, size), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(img, size=8, factor=4):
+    # DCT hash: low-frequency DCT coefficients of a 32x32 thumbnail against their median
+    n = size * factor
+    small = cv2.resize(_gray(img), (n, n), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:size, :size]
+    return _bits_to_int(low > np.median(low[1:, 1:] if size > 1 else low))
+
+
+HASHES = {'dhash': dhash, 'phash': phash}
+METHODS = ('exact',) + tuple(HASHES)
+
+
+def content_hash(img):
+    # sha256 over shape, dtype and pixels: equal only for identical decoded images
+    h = hashlib.sha256(f"{img.shape}|{img.dtype}".encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def thumbnail(img, width=512):
+    gray = _gray(img)
+    h, w = gray.shape[:2]
+    return cv2.resize(gray, (width, max(1, int(round(h * width / float(w))))), interpolation=cv2.INTER_AREA)
+
+
+def thumbnails_match(a, b, block=4, max_block_diff=12.0):
+    # same layout and no block (block x block px of the thumbnail) differing by more than max_block_diff on average
+    if abs(a.shape[0] - b.shape[0]) > 2:
+        return False
+    if a.shape != b.shape:
+        b = cv2.resize(b, (a.shape[1], a.shape[0]), interpolation=cv2.INTER_AREA)
+    diff = cv2.absdiff(a, b).astype(np.float32)
+    grid = cv2.resize(diff, (max(1, a.shape[1] // block), max(1, a.shape[0] // block)), interpolation=cv2.INTER_AREA)
+    return float(grid.max()) <= max_block_diff
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance: a lookup only descends
+    into children whose edge distance lies within [d - max_dist, d + max_dist].
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, value, {distance: child}]
+        self.size = 0
+
+    def add(self, h, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [h, value, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(h, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, value, {}]
+                return
+            node = child
+
+    def search(self, h, max_dist):
+        # [(distance, hash, value)] sorted by distance
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= max_dist:
+                found.append((d, node[0], node[1]))
+            for edge, child in node[2].items():
+                if d - max_dist <= edge <= d + max_dist:
+                    stack.append(child)
+        return sorted(found, key=lambda f: f[0])
+
+    def __len__(self):
+        return self.size
+
+
+class NearDuplicateIndex:
+    """
+    Thread-safe image -> result store. fingerprint(img) once per decoded input, then lookup()
+    returns the value stored for the same image (None if there is none) and add() records a
+    processed one. Entries live in separate scopes (e.g. one per API client) and a lookup
+    never crosses scopes.
+    """
+
+    def __init__(self, max_distance=10, method='exact', confirm_block_diff=12.0):
+        if method not in METHODS:
+            raise ValueError(f"Unknown hash method: {method} (choose from {', '.join(METHODS)})")
+        self.max_distance = max_distance
+        self.method = method
+        self.confirm_block_diff = confirm_block_diff
+        self.scopes = {}  # scope -> ({content hash: value}, BKTree of (content hash, thumbnail, value))
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.rejected = 0  # perceptual candidates the thumbnail check turned down
+
+    def fingerprint(self, img):
+        if self.method == 'exact':
+            return content_hash(img), None, None
+        return content_hash(img), HASHES[self.method](img), thumbnail(img)
+
+    def _scope(self, scope):
+        if scope not in self.scopes:
+            self.scopes[scope] = ({}, BKTree())
+        return self.scopes[scope]
+
+    def lookup(self, fp, scope=None):
+        exact_hash, phash_value, thumb = fp
+        with self.lock:
+            self.lookups += 1
+            exact, tree = self._scope(scope)
+            value = exact.get(exact_hash)
+            if value is None and phash_value is not None:
+                for _, _, (_, other, candidate) in tree.search(phash_value, self.max_distance):
+                    if thumbnails_match(thumb, other, max_block_diff=self.confirm_block_diff):
+                        value = candidate
+                        break
+                    self.rejected += 1
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def add(self, fp, value, scope=None):
+        exact_hash, phash_value, thumb = fp
+        with self.lock:
+            exact, tree = self._scope(scope)
+            exact[exact_hash] = value
+            if phash_value is not None:
+                tree.add(phash_value, (exact_hash, thumb, value))
+
+    def stats(self):
+        with self.lock:
+            return {"method": self.method, "scopes": len(self.scopes),
+                    "indexed": sum(len(e) for e, _ in self.scopes.values()),
+                    "lookups": self.lookups, "hits": self.hits, "rejected": self.rejected}
+
+
+def index_from_config(cfg):
+    # None unless dedup.enabled is set in config.yaml
+    dcfg = cfg.get('dedup') or {}
+    if not dcfg.get('enabled', False):
+        return None
+    return NearDuplicateIndex(max_distance=dcfg.get('max_distance', 10), method=dcfg.get('hash', 'exact'),
+                              confirm_block_diff=dcfg.get('confirm_block_diff', 12.0))
@@ -1,4 +1,5 @@
 import os
+import threading
 import cv2
 import numpy as np
 import pytesseract
@@ -7,53 +8,64 @@ import logging
 
 cfg = load_config()
 
-def decode_predictions(scores, geometry, score_thresh=0.5):
-    # Standard EAST decode
-    detections = []
-    confidences = []
-
-    (numRows, numCols) = scores.shape[2:4]
-    for y in range(0, numRows):
-        scoresData = scores[0,0,y]
-        x0_data = geometry[0,0,y]
-        x1_data = geometry[0,1,y]
-        x2_data = geometry[0,2,y]
-        x3_data = geometry[0,3,y]
-        anglesData = geometry[0,4,y]
-        for x in range(0, numCols):
-            score = scoresData[x]
-            if score < score_thresh:
-                continue
-            offsetX = x * 4.0
-            offsetY = y * 4.0
-            angle = anglesData[x]
-            cos = np.cos(angle)
-            sin = np.sin(angle)
-            h = x0_data[x] + x2_data[x]
-            w = x1_data[x] + x3_data[x]
-            endX = int(offsetX + (cos * x1_data[x]) + (sin * x2_data[x]))
-            endY = int(offsetY - (sin * x1_data[x]) + (cos * x2_data[x]))
-            startX = int(endX - w)
-            startY = int(endY - h)
-            detections.append((startX, startY, endX, endY))
-            confidences.append(float(score))
+EAST_OUTPUTS = ["feature_fusion/Conv_7/Sigmoid", "feature_fusion/concat_3"]
+EAST_MEAN = (123.68, 116.78, 103.94)
+
+def decode_predictions(scores, geometry, score_thresh=0.5, index=0):
+    # Standard EAST decode (vectorized); index picks the image in a batched forward
+    score_map = scores[index, 0]
+    geo = geometry[index]
+    ys, xs = np.nonzero(score_map >= score_thresh)
+    offsetX = xs * 4.0
+    offsetY = ys * 4.0
+    x0, x1, x2, x3, angle = (geo[k, ys, xs] for k in range(5))
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    h = x0 + x2
+    w = x1 + x3
+    endX = np.trunc(offsetX + (cos * x1) + (sin * x2))
+    endY = np.trunc(offsetY - (sin * x1) + (cos * x2))
+    startX = np.trunc(endX - w)
+    startY = np.trunc(endY - h)
+    detections = list(zip(startX.astype(int).tolist(), startY.astype(int).tolist(),
+                          endX.astype(int).tolist(), endY.astype(int).tolist()))
+    confidences = score_map[ys, xs].astype(float).tolist()
     return (detections, confidences)
 
-def east_detect(image, east_path=None, min_confidence=0.5):
-    if not east_path:
-        east_path = cfg['detector'].get('east_model_path')
-    if not east_path or not os.path.exists(east_path):
-        raise FileNotFoundError("EAST model not found. Provide a valid path or use pytesseract fallback.")
-    orig_h, orig_w = image.shape[:2]
-    newW, newH = (320, 320)
-    rW = orig_w / float(newW)
-    rH = orig_h / float(newH)
-    blob = cv2.dnn.blobFromImage(image, 1.0, (newW, newH),
-                                 (123.68, 116.78, 103.94), swapRB=True, crop=False)
-    net = cv2.dnn.readNet(east_path)
-    net.setInput(blob)
-    (scores, geometry) = net.forward(["feature_fusion/Conv_7/Sigmoid","feature_fusion/concat_3"])
-    (rects, confidences) = decode_predictions(scores, geometry, score_thresh=min_confidence)
+_EAST_NETS = {}
+# a cv2.dnn.Net must not run two forwards at once (documents.py may process pages on threads)
+_EAST_LOCK = threading.Lock()
+
+def get_east_net(east_path):
+    # the frozen graph is ~95 MB; read it once per process instead of once per image
+    net = _EAST_NETS.get(east_path)
+    if net is None:
+        with _EAST_LOCK:  # concurrent first calls must not each read the graph
+            net = _EAST_NETS.get(east_path)
+            if net is None:
+                net = _EAST_NETS[east_path] = cv2.dnn.readNet(east_path)
+    return net
+
+def round32(v):
+    return max(32, int(round(v / 32.0)) * 32)
+
+def plan_tiles(length, tile, overlap):
+    # tile origins along one axis; the last tile is shifted back so every tile is full size
+    if length <= tile:
+        return [0]
+    stride = max(32, tile - overlap)
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+def nms_boxes(boxes, confidences, score_thresh=0.5, nms_thresh=0.4):
+    if not boxes:
+        return [], []
+    rects = [[x0, y0, x1 - x0, y1 - y0] for (x0, y0, x1, y1) in boxes]
+    keep = np.asarray(cv2.dnn.NMSBoxes(rects, confidences, score_thresh, nms_thresh)).reshape(-1)
+    return [boxes[i] for i in keep], [confidences[i] for i in keep]
+
+def _scale_boxes(rects, rW, rH, orig_w, orig_h):
     boxes = []
     for (startX, startY, endX, endY) in rects:
         # scale back
@@ -67,6 +79,67 @@ def east_detect(image, east_path=None, min_confidence=0.5):
         boxes.append((sX, sY, eX, eY))
     return boxes
 
+def east_detect_fixed(image, net, min_confidence=0.5, size=320):
+    # original behaviour: whole image squashed to one size x size blob, no NMS
+    orig_h, orig_w = image.shape[:2]
+    newW, newH = (size, size)
+    rW = orig_w / float(newW)
+    rH = orig_h / float(newH)
+    blob = cv2.dnn.blobFromImage(image, 1.0, (newW, newH), EAST_MEAN, swapRB=True, crop=False)
+    with _EAST_LOCK:
+        net.setInput(blob)
+        (scores, geometry) = net.forward(EAST_OUTPUTS)
+    (rects, confidences) = decode_predictions(scores, geometry, score_thresh=min_confidence)
+    return _scale_boxes(rects, rW, rH, orig_w, orig_h)
+
+def east_detect_tiled(image, net, min_confidence=0.5, max_side=2560, tile=640, overlap=96, nms_thresh=0.4):
+    """
+    Aspect-preserving EAST: the image is scaled so its long side is at most max_side, padded to a
+    multiple of 32 and, if larger than `tile`, cut into overlapping tile x tile windows that run as
+    ONE batched blob. Boxes from all tiles are mapped back to image coordinates and merged with NMS.
+    """
+    orig_h, orig_w = image.shape[:2]
+    scale = min(1.0, max_side / float(max(orig_h, orig_w)))
+    w, h = max(1, int(round(orig_w * scale))), max(1, int(round(orig_h * scale)))
+    scaled = cv2.resize(image, (w, h), interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+    # pad (not stretch) up to multiples of 32; small images become a single tile of their own size
+    pw, ph = -(-w // 32) * 32, -(-h // 32) * 32
+    tile = round32(tile)
+    if (pw, ph) != (w, h):
+        scaled = cv2.copyMakeBorder(scaled, 0, ph - h, 0, pw - w, cv2.BORDER_REPLICATE)
+    tw, th = min(tile, pw), min(tile, ph)
+    origins = [(x, y) for y in plan_tiles(ph, th, overlap) for x in plan_tiles(pw, tw, overlap)]
+    tiles = [scaled[y:y + th, x:x + tw] for (x, y) in origins]
+    blob = cv2.dnn.blobFromImages(tiles, 1.0, (tw, th), EAST_MEAN, swapRB=True, crop=False)
+    with _EAST_LOCK:
+        net.setInput(blob)
+        (scores, geometry) = net.forward(EAST_OUTPUTS)
+    rects, confidences = [], []
+    for i, (x, y) in enumerate(origins):
+        r, c = decode_predictions(scores, geometry, score_thresh=min_confidence, index=i)
+        rects.extend((sx + x, sy + y, ex + x, ey + y) for (sx, sy, ex, ey) in r)
+        confidences.extend(c)
+    rects, confidences = nms_boxes(rects, confidences, min_confidence, nms_thresh)
+    return _scale_boxes(rects, 1.0 / scale, 1.0 / scale, orig_w, orig_h)
+
+def east_detect(image, east_path=None, min_confidence=0.5, mode=None):
+    dcfg = cfg['detector']
+    if not east_path:
+        east_path = dcfg.get('east_model_path')
+    if not east_path or not os.path.exists(east_path):
+        raise FileNotFoundError("EAST model not found. Provide a valid path or use pytesseract fallback.")
+    net = get_east_net(east_path)
+    mode = (mode or dcfg.get('east_mode', 'fixed')).lower()
+    if mode == 'fixed':
+        return east_detect_fixed(image, net, min_confidence)
+    if mode == 'tiled':
+        return east_detect_tiled(image, net, min_confidence,
+                                 max_side=dcfg.get('east_max_side', 2560),
+                                 tile=dcfg.get('east_tile', 640),
+                                 overlap=dcfg.get('east_tile_overlap', 96),
+                                 nms_thresh=dcfg.get('east_nms_thresh', 0.4))
+    raise ValueError(f"Unknown EAST mode: {mode}")
+
 def pytesseract_detect(image, lang='eng', conf_thresh=50):
     # returns list of boxes from pytesseract.image_to_data
     data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
@@ -79,7 +152,107 @@ def pytesseract_detect(image, lang='eng', conf_thresh=50):
             boxes.append((x, y, x + w, y + h))
     return boxes
 
+def remove_nested_boxes(boxes, overlap=0.9):
+    # drop duplicates and fragments lying (>= overlap of their area) inside a bigger kept box
+    if not boxes:
+        return []
+    arr = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    areas = np.maximum(1, (arr[:, 2] - arr[:, 0]) * (arr[:, 3] - arr[:, 1]))
+    kept = []
+    for i in np.argsort(-areas, kind='stable'):
+        if kept:
+            k = arr[kept]
+            iw = np.minimum(k[:, 2], arr[i, 2]) - np.maximum(k[:, 0], arr[i, 0])
+            ih = np.minimum(k[:, 3], arr[i, 3]) - np.maximum(k[:, 1], arr[i, 1])
+            if np.any((iw > 0) & (ih > 0) & (iw * ih >= overlap * areas[i])):
+                continue
+        kept.append(i)
+    return [tuple(int(v) for v in arr[i]) for i in sorted(kept)]
+
+def merge_boxes_to_lines(boxes, gap=1.0, y_overlap=0.5):
+    """
+    Left-to-right sweep joining boxes into text lines: a box joins a line when they overlap
+    vertically by >= y_overlap of the smaller height and the horizontal gap is at most
+    gap x the taller height. Returns line boxes in reading order (top-to-bottom, left-to-right).
+    """
+    lines = []  # [x0, y0, x1, y1]
+    for (x0, y0, x1, y1) in sorted(boxes, key=lambda b: (b[0], b[1])):
+        h = max(1, y1 - y0)
+        for line in reversed(lines):
+            lh = max(1, line[3] - line[1])
+            v = min(y1, line[3]) - max(y0, line[1])
+            if v >= y_overlap * min(h, lh) and x0 - line[2] <= gap * max(h, lh):
+                line[0], line[1] = min(line[0], x0), min(line[1], y0)
+                line[2], line[3] = max(line[2], x1), max(line[3], y1)
+                break
+        else:
+            lines.append([x0, y0, x1, y1])
+    return sorted((tuple(l) for l in lines), key=lambda b: (b[1], b[0]))
+
+def postprocess_boxes(boxes, dcfg=None):
+    # detector output -> de-duplicated line boxes (detector.merge_lines: false keeps raw boxes)
+    dcfg = cfg['detector'] if dcfg is None else dcfg
+    if not dcfg.get('merge_lines', True):
+        return boxes
+    # nested/duplicate boxes already fold into their line during the sweep; the nested check
+    # runs on the (few) merged lines, e.g. a small line swallowed by a taller neighbour
+    lines = merge_boxes_to_lines(boxes, gap=dcfg.get('line_gap', 1.0), y_overlap=dcfg.get('line_y_overlap', 0.5))
+    return remove_nested_boxes(lines, overlap=dcfg.get('nested_overlap', 0.9))
+
+def find_text_region(image, max_side=800, grad_thresh=40, min_components=1, margin=0.02, min_char=7):
+    """
+    Cheap classical pre-detector: morphological gradient on a downscaled gray page, split into
+    connected components at character level (no closing, so one word or even one letter counts).
+    A component is character-sized when its longer side is at least min_char px at analysis
+    resolution; dust specks and sensor noise stay below that. Returns None only when fewer than
+    min_components such components exist (an empty page), else the (x0, y0, x1, y1) region
+    holding them, padded by `margin` of the page.
+    """
+    h, w = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    scale = min(1.0, max_side / float(max(h, w)))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    sh, sw = gray.shape[:2]
+    grad = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    mask = (grad >= grad_thresh).astype(np.uint8)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    bw, bh, area = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_AREA]
+    # character-sized, not a full-width/height scanner edge, reasonably filled
+    keep = ((np.maximum(bw, bh) >= min_char) & (np.minimum(bw, bh) >= 2)
+            & (bw < 0.95 * sw) & (bh < 0.95 * sh) & (area >= 0.1 * bw * bh))
+    if int(keep.sum()) < max(1, min_components):
+        return None
+    st = stats[1:][keep]
+    x0 = st[:, cv2.CC_STAT_LEFT].min()
+    y0 = st[:, cv2.CC_STAT_TOP].min()
+    x1 = (st[:, cv2.CC_STAT_LEFT] + st[:, cv2.CC_STAT_WIDTH]).max()
+    y1 = (st[:, cv2.CC_STAT_TOP] + st[:, cv2.CC_STAT_HEIGHT]).max()
+    pad_x, pad_y = int(margin * sw), int(margin * sh)
+    x0, y0 = max(0, x0 - pad_x), max(0, y0 - pad_y)
+    x1, y1 = min(sw, x1 + pad_x), min(sh, y1 + pad_y)
+    return (int(x0 / scale), int(y0 / scale), min(w, int(np.ceil(x1 / scale))), min(h, int(np.ceil(y1 / scale))))
+
 def detect_text_boxes(image, method='auto'):
+    dcfg = cfg['detector']
+    ox, oy = 0, 0
+    if dcfg.get('predetect', True):
+        region = find_text_region(image, max_side=dcfg.get('predetect_max_side', 800),
+                                  grad_thresh=dcfg.get('predetect_grad_thresh', 40),
+                                  min_components=dcfg.get('predetect_min_components', 1),
+                                  min_char=dcfg.get('predetect_min_char', 7),
+                                  margin=dcfg.get('predetect_margin', 0.02))
+        if region is None:
+            logging.info("Pre-detector found an empty page; skipping detection")
+            return []
+        ox, oy, x1, y1 = region
+        image = image[oy:y1, ox:x1]
+    boxes = detect_raw_boxes(image, method)
+    lines = postprocess_boxes(boxes)
+    logging.info(f"{len(boxes)} detector boxes -> {len(lines)} crops")
+    return [(x0 + ox, y0 + oy, x1 + ox, y1 + oy) for (x0, y0, x1, y1) in lines]
+
+def detect_raw_boxes(image, method='auto'):
     method = method.lower()
     if method == 'east':
         try:
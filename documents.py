@@ -0,0 +1,114 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+from .pipeline import process_array
+from .parser import parse_contact_fields, merge_parsed
+from .utils import ensure_dir, save_json, load_config
+import logging
+
+cfg = load_config()
+
+# Multi-page inputs (PDF, multi-frame TIFF) are rendered one page at a time, so a 500-page
+# document never sits in memory; each page goes through pipeline.process_array.
+
+PDF_EXTS = ('.pdf',)
+MULTIFRAME_EXTS = ('.tif', '.tiff', '.gif')
+DOCUMENT_EXTS = PDF_EXTS + MULTIFRAME_EXTS
+
+
+def is_document(path):
+    # PDFs, and TIFF/GIF files with more than one frame; a single-frame TIFF stays a plain image
+    # (one <stem>.json, no per-page files or document summary)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTS:
+        return True
+    if ext in MULTIFRAME_EXTS:
+        with Image.open(path) as im:
+            return getattr(im, 'n_frames', 1) > 1
+    return False
+
+
+def iter_pages(path, dpi=200):
+    """
+    Yield (page_number, BGR ndarray) lazily. PDFs are rasterised with PyMuPDF (local MuPDF,
+    no external binaries); TIFF frames are decoded one by one through PIL; anything else is a
+    single-page image.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTS:
+        try:
+            import pymupdf
+        except ImportError as e:
+            raise ImportError("PDF input needs PyMuPDF: pip install pymupdf (see requirements.txt)") from e
+        with pymupdf.open(path) as doc:
+            for i in range(doc.page_count):
+                pix = doc.load_page(i).get_pixmap(dpi=dpi, colorspace=pymupdf.csRGB, alpha=False)
+                rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                yield i + 1, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    elif ext in MULTIFRAME_EXTS:
+        with Image.open(path) as im:
+            for i, frame in enumerate(ImageSequence.Iterator(im)):
+                yield i + 1, cv2.cvtColor(np.asarray(frame.convert('RGB')), cv2.COLOR_RGB2BGR)
+    else:
+        img = cv2.imread(path)
+        if img is None:
+            raise FileNotFoundError(f"Cannot read image: {path}")
+        yield 1, img
+
+
+def _run_page(page_no, img, stem, output_dir):
+    info = {}
+    results = process_array(img, f"{stem}_p{page_no:03d}", output_dir, info=info)
+    return dict({"page": page_no, "results": results, "parsed": parse_contact_fields(results)}, **info)
+
+
+def iter_document_results(path, output_dir, workers=0, dpi=200):
+    """
+    Per-page {"page", "results", "parsed"} (plus "deskew" for rotated pages) in page order. workers > 1 runs pages on a thread pool
+    (OCR and OpenCV release the GIL) with at most 2 x workers pages rendered ahead.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    pages = iter_pages(path, dpi=dpi)
+    if workers <= 1:
+        for page_no, img in pages:
+            yield _run_page(page_no, img, stem, output_dir)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for page_no, img in pages:
+            pending.append(pool.submit(_run_page, page_no, img, stem, output_dir))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def process_document(path, output_dir, workers=None, dpi=None):
+    """
+    Run every page of a PDF/TIFF through the pipeline (one JSON per page, as for images) and
+    write <name>.document.json with the per-page parsed fields plus a merged document summary.
+    """
+    ensure_dir(output_dir)
+    dcfg = cfg.get('documents') or {}
+    workers = dcfg.get('page_workers', 0) if workers is None else workers
+    dpi = dcfg.get('pdf_dpi', 200) if dpi is None else dpi
+    pages = []
+    for page in iter_document_results(path, output_dir, workers=workers, dpi=dpi):
+        logging.info(f"{os.path.basename(path)} page {page['page']}: {len(page['results'])} text elements")
+        entry = {"page": page["page"], "elements": len(page["results"]), "parsed": page["parsed"]}
+        if "deskew" in page:
+            entry["deskew"] = page["deskew"]
+        pages.append(entry)
+    summary = {
+        "document": os.path.basename(path),
+        "pages": len(pages),
+        "parsed": merge_parsed([p["parsed"] for p in pages]),
+        "page_results": pages,
+    }
+    if cfg['output'].get('export_json', True):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        save_json(summary, os.path.join(output_dir, stem + ".document.json"))
+    return summary
@@ -1,3 +1,4 @@
+import time
 import Levenshtein as Lev
 
 def cer(pred, target):
@@ -9,3 +10,61 @@ def wer(pred, target):
     p = pred.split()
     t = target.split()
     return Lev.distance(' '.join(p), ' '.join(t)) / max(1, len(t))
+
+def evaluate(model, dataset, tokenizer, n_samples=None, batch_size=32, device='cpu'):
+    # mean CER and samples/sec of greedy decoding over (the first n_samples of) a dataset
+    import torch
+    from .decoding import ctc_greedy_decode
+    n = len(dataset) if n_samples is None else min(n_samples, len(dataset))
+    # true widths, as the recognizers pass them: padding is packed out and not decoded
+    all_widths = torch.as_tensor(dataset.sample_widths(), dtype=torch.long)
+    total_cer, elapsed = 0.0, 0.0
+    was_training = model.training
+    model.eval()
+    with torch.inference_mode():
+        for start in range(0, n, batch_size):
+            idxs = range(start, min(n, start + batch_size))
+            images = torch.stack([dataset[i][0] for i in idxs]).to(device)
+            widths = all_widths[start:start + len(idxs)]
+            t0 = time.perf_counter()
+            probs = model(images, widths.to(device)).float().softmax(2).cpu().numpy()
+            decoded = ctc_greedy_decode(probs, tokenizer, lengths=model.output_lengths(widths).numpy())
+            elapsed += time.perf_counter() - t0
+            for i, dec in zip(idxs, decoded):
+                # plain id -> char join; Tokenizer.decode would CTC-collapse doubled letters
+                target = ''.join(tokenizer.idx2char[t] for t in dataset[i][1].tolist())
+                total_cer += cer(dec.text, target)
+    model.train(was_training)
+    return {"cer": total_cer / max(1, n), "samples_per_s": n / max(elapsed, 1e-9)}
+
+def compare_archs(checkpoints, annotations_file, img_root, n_samples=None, batch_size=32):
+    # {name: checkpoint} -> params, MFLOPs/crop, CPU ms per batch and CER on the same data
+    from .dataset import OCRDataset
+    from .model import build_model, count_params, count_flops, cpu_latency_ms
+    from .utils import Tokenizer, load_checkpoint
+    rows = []
+    for name, path in checkpoints.items():
+        ckpt = load_checkpoint(path, 'cpu')
+        tokenizer = Tokenizer(ckpt['tokenizer']['chars'])
+        model = build_model(ckpt.get('arch'), len(tokenizer.idx2char))
+        model.load_state_dict(ckpt['model_state'])
+        dataset = OCRDataset(annotations_file, img_root, tokenizer)
+        res = evaluate(model, dataset, tokenizer, n_samples=n_samples, batch_size=batch_size)
+        rows.append({"name": name, "arch": ckpt.get('arch', 'crnn'),
+                     "params_m": count_params(model) / 1e6, "mflops": count_flops(model) / 1e6,
+                     "latency_ms": cpu_latency_ms(model, batch_size), **res})
+    return rows
+
+if __name__ == '__main__':
+    # python -m src.eval --annotations val.csv --img_root data/ crnn=ckpt_a.pth lite_gru=ckpt_b.pth
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare trained recognizer checkpoints: size, speed and CER")
+    parser.add_argument("checkpoints", nargs="+", help="name=path pairs")
+    parser.add_argument("--annotations", required=True)
+    parser.add_argument("--img_root", required=True)
+    parser.add_argument("--samples", type=int, default=None)
+    args = parser.parse_args()
+    pairs = dict(c.split("=", 1) if "=" in c else (c, c) for c in args.checkpoints)
+    for r in compare_archs(pairs, args.annotations, args.img_root, args.samples):
+        print(f"{r['name']:>12} ({r['arch']}): {r['params_m']:.2f} M params, {r['mflops']:.0f} MFLOPs/crop, "
+              f"{r['latency_ms']:.1f} ms/batch, {r['samples_per_s']:.0f} samples/s, CER {r['cer']:.4f}")
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import torch
+from .utils import Tokenizer, load_checkpoint, ensure_dir
+from .model import build_model
+import logging
+
+
+def load_model_from_checkpoint(checkpoint, chars=None):
+    ckpt = load_checkpoint(checkpoint, 'cpu')
+    if chars is None:
+        chars = ckpt['tokenizer']['chars']
+    tokenizer = Tokenizer(chars)
+    model = build_model(ckpt.get('arch'), len(tokenizer.idx2char))
+    model.load_state_dict(ckpt['model_state'])
+    return model.eval(), tokenizer
+
+
+def write_model_meta(out_path, tokenizer, target_h=32, max_w=320, **extra):
+    # sidecar read by runtime.load_model_meta, so serving needs neither torch nor the checkpoint
+    meta = {"chars": tokenizer.chars, "target_h": target_h, "max_w": max_w}
+    meta.update(extra)
+    with open(os.path.splitext(out_path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def export_onnx(model, out_path, target_h=32, max_w=320, opset=17):
+    dummy = torch.zeros(1, 1, target_h, max_w)
+    torch.onnx.export(
+        model, dummy, out_path,
+        input_names=["image"], output_names=["logits"],
+        dynamic_axes={"image": {0: "batch", 3: "width"}, "logits": {0: "time", 1: "batch"}},
+        opset_version=opset, dynamo=False,
+    )
+
+
+def export_torchscript(model, out_path, target_h=32, max_w=320):
+    try:
+        scripted = torch.jit.script(model)
+    except Exception as e:
+        logging.warning(f"torch.jit.script failed ({e}); tracing instead")
+        scripted = torch.jit.trace(model, torch.zeros(1, 1, target_h, max_w))
+    scripted.save(out_path)
+
+
+def export_checkpoint(checkpoint, out_path, fmt='onnx', chars=None, target_h=32, max_w=320):
+    ensure_dir(os.path.dirname(out_path) or ".")
+    model, tokenizer = load_model_from_checkpoint(checkpoint, chars)
+    if fmt == 'onnx':
+        export_onnx(model, out_path, target_h=target_h, max_w=max_w)
+    elif fmt == 'torchscript':
+        export_torchscript(model, out_path, target_h=target_h, max_w=max_w)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    write_model_meta(out_path, tokenizer, target_h=target_h, max_w=max_w, format=fmt)
+    logging.info(f"Exported {checkpoint} -> {out_path} ({fmt})")
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a CRNN checkpoint for torch-free serving")
+    parser.add_argument("--checkpoint", required=True, help="Checkpoint written by train.py")
+    parser.add_argument("--out", required=True, help="Output model path (.onnx or .pt)")
+    parser.add_argument("--format", choices=["onnx", "torchscript"], default="onnx")
+    parser.add_argument("--chars", default=None, help="Charset (default: taken from the checkpoint)")
+    args = parser.parse_args()
+    export_checkpoint(args.checkpoint, args.out, fmt=args.format, chars=args.chars)
+
+if __name__ == "__main__":
+    main()
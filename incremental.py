@@ -0,0 +1,55 @@
+import copy
+from typing import List, Dict, Any
+from .parser import (group_lines_by_vertical_position, lines_from_rows, line_features,
+                     results_confidence, assemble_fields)
+
+
+class IncrementalParser:
+    """
+    Parser state for interactive review: keeps the grouped rows, lines and per-line features
+    of one card so that correcting a single OCR box only re-scores the line it belongs to.
+    `parsed` always equals parse_contact_fields(self.results).
+    """
+
+    def __init__(self, results: List[Dict[str,Any]], y_margin: int = 12):
+        # private copies so edits never leak into the caller's results
+        self.results = [dict(r) for r in results or []]
+        self.y_margin = y_margin
+        self.full_rebuilds = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.rows = group_lines_by_vertical_position(self.results, y_margin=self.y_margin)
+        self.lines = lines_from_rows(self.rows)
+        self.features = [line_features(ln) for ln in self.lines]
+        # result index -> row index (rows hold the same dict objects as self.results)
+        row_of = {id(r): i for i, (_, items) in enumerate(self.rows) for r in items}
+        self.row_of_result = [row_of.get(id(r)) for r in self.results]
+        self.confidence = results_confidence(self.results)
+        self.parsed = assemble_fields(self.lines, self.features, self.confidence)
+        self.full_rebuilds += 1
+
+    def update_box(self, index: int, text_clean: str = None, confidence=None) -> Dict[str,Any]:
+        # apply an operator correction to results[index] and return the refreshed parse
+        r = self.results[index]
+        if text_clean is not None:
+            was_present = bool((r.get("text_clean") or "").strip())
+            now_present = bool((text_clean or "").strip())
+            r["text_clean"] = text_clean
+            if was_present != now_present:
+                # box enters or leaves the layout: row grouping itself changes
+                self._rebuild()
+                return self.parsed
+            row_idx = self.row_of_result[index]
+            line = lines_from_rows([self.rows[row_idx]])[0]
+            if line != self.lines[row_idx]:
+                self.lines[row_idx] = line
+                self.features[row_idx] = line_features(line)
+        if confidence is not None and confidence != r.get("confidence"):
+            r["confidence"] = confidence
+            self.confidence = results_confidence(self.results)
+        self.parsed = assemble_fields(self.lines, self.features, self.confidence)
+        return self.parsed
+
+    def snapshot(self) -> Dict[str,Any]:
+        return copy.deepcopy(self.parsed)
@@ -1,28 +1,71 @@
+import numpy as np
 import torch
-from .utils import Tokenizer, load_image_gray, resize_and_pad, load_checkpoint
-from .model import CRNN
+from .utils import load_image_gray, load_checkpoint
+from .model import build_model
+from .runtime import BucketedRecognizer
 import sys
 
 
+class CRNNRecognizer(BucketedRecognizer):
+    """
+    Loads a CRNN checkpoint once and recognizes many crops per call (torch backend).
+    Batching by width bucket and CTC decoding come from runtime.BucketedRecognizer.
+    """
+
+    def __init__(self, checkpoint=None, chars=None, device='cpu', arch=None, **kwargs):
+        ckpt = load_checkpoint(checkpoint, device) if checkpoint else None
+        if chars is None and ckpt is not None and ckpt.get('tokenizer'):
+            chars = ckpt['tokenizer']['chars']
+        if chars is None:
+            raise ValueError("CRNNRecognizer needs `chars` when the checkpoint does not store a tokenizer")
+        super().__init__(chars, **kwargs)
+        if ckpt is not None and ckpt.get('quantization'):
+            # int8 checkpoint from quantize.py (CPU only)
+            from .quantize import load_quantized_checkpoint
+            self.model = load_quantized_checkpoint(ckpt, len(self.tokenizer.idx2char))
+            device = 'cpu'
+        else:
+            # arch: stored by train.py; the argument only matters for checkpoint-less (random) models
+            if ckpt is not None:
+                arch = ckpt.get('arch', 'crnn')
+            self.model = build_model(arch, len(self.tokenizer.idx2char))
+            if ckpt is not None:
+                self.model.load_state_dict(ckpt['model_state'])
+        self.device = device
+        self.model.to(device).eval()
+
+    # the CRNN packs its LSTM input by true width, so padded columns don't change the result
+    supports_lengths = True
+
+    def forward(self, batch, widths=None):
+        with torch.inference_mode():
+            if widths is not None:
+                widths = torch.from_numpy(np.asarray(widths, dtype=np.int64))
+            logits = self.model(torch.from_numpy(batch).to(self.device), widths)  # T x B x C
+            return logits.softmax(2).cpu().numpy()
+
+
+_RECOGNIZERS = {}
+
+
+def get_recognizer(checkpoint, chars=None, device='cpu', **kwargs):
+    # process-wide cache so callers never reload the checkpoint per image
+    key = (checkpoint, chars, device, tuple(sorted(kwargs.items())))
+    rec = _RECOGNIZERS.get(key)
+    if rec is None:
+        rec = CRNNRecognizer(checkpoint, chars=chars, device=device, **kwargs)
+        _RECOGNIZERS[key] = rec
+    return rec
+
+
 def infer(image_path, checkpoint, chars, device='cpu'):
-    tokenizer = Tokenizer(chars)
-    ckpt = load_checkpoint(checkpoint, device)
-    model = CRNN(num_classes=len(tokenizer.idx2char))
-    model.load_state_dict(ckpt['model_state'])
-    model.to(device).eval()
-
-    img = load_image_gray(image_path)
-    arr = resize_and_pad(img)
-    tensor = torch.from_numpy(arr).unsqueeze(0).unsqueeze(0).float().to(device)
-    with torch.no_grad():
-        logits = model(tensor)
-        probs = logits.softmax(2)  # T x B x C
-        _, max_idxs = probs.max(2)
-        max_idxs = max_idxs.squeeze(1).cpu().numpy().tolist()
-        text = tokenizer.decode(max_idxs)
-        return text
+    recognizer = get_recognizer(checkpoint, chars=chars, device=device, bucket_step=320)
+    text, _ = recognizer.recognize_one(load_image_gray(image_path))
+    return text
+
 
 if __name__ == '__main__':
+    # python -m src.infer <image> <checkpoint>
     img = sys.argv[1]
     ckpt = sys.argv[2]
     print(infer(img, ckpt, chars='abcdefghijklmnopqrstuvwxyz0123456789'))
@@ -0,0 +1,98 @@
+import os
+import re
+import logging
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+KEYWORDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keywords")
+TOKEN_RE = re.compile(r'\w+')
+_END = ""  # trie key holding the categories of a phrase ending at this node (never a token)
+
+KeywordMatch = namedtuple("KeywordMatch", ["category", "start", "end", "keyword"])
+
+
+class KeywordMatcher:
+    """
+    Word-level trie over keyword phrases. Lines are tokenized once into words and every
+    phrase is matched on whole-word boundaries, so 'st' matches "MG St" but not "Analyst".
+    Multi-word phrases ("h no", "private limited") are supported.
+    """
+
+    def __init__(self):
+        self._root = {}
+        self.max_words = 0
+        self.size = 0
+
+    def add(self, phrase: str, category: str):
+        words = [w.lower() for w in TOKEN_RE.findall(phrase)]
+        if not words:
+            return
+        node = self._root
+        for w in words:
+            node = node.setdefault(w, {})
+        cats = node.setdefault(_END, {})
+        if category not in cats:
+            cats[category] = " ".join(words)
+            self.size += 1
+        self.max_words = max(self.max_words, len(words))
+
+    def add_many(self, phrases: Iterable[str], category: str):
+        for p in phrases:
+            self.add(p, category)
+
+    def load_file(self, path: str, category: Optional[str] = None):
+        # one keyword per line, '#' starts a comment; category defaults to the file stem
+        if category is None:
+            category = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    self.add(line, category)
+        return self
+
+    @classmethod
+    def from_dir(cls, path: str = KEYWORDS_DIR):
+        matcher = cls()
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith('.txt'):
+                matcher.load_file(os.path.join(path, name))
+        return matcher
+
+    def match(self, line: str) -> List[KeywordMatch]:
+        # all keyword occurrences in the line, as (category, start, end, keyword) with char offsets
+        if not line:
+            return []
+        tokens = [(m.group(0).lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(line)]
+        out = []
+        for i in range(len(tokens)):
+            node = self._root
+            for j in range(i, min(len(tokens), i + self.max_words)):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                cats = node.get(_END)
+                if cats:
+                    for category, keyword in cats.items():
+                        out.append(KeywordMatch(category, tokens[i][1], tokens[j][2], keyword))
+        return out
+
+    def classify(self, line: str) -> Dict[str, List[Tuple[int, int]]]:
+        # category -> list of (start, end) spans, computed in a single pass over the line
+        hits = {}
+        for m in self.match(line):
+            hits.setdefault(m.category, []).append((m.start, m.end))
+        return hits
+
+
+def load_keyword_matcher(path: Optional[str] = None, fallback: Optional[Dict[str, Iterable[str]]] = None) -> KeywordMatcher:
+    path = path or KEYWORDS_DIR
+    if os.path.isdir(path):
+        matcher = KeywordMatcher.from_dir(path)
+        if matcher.size:
+            return matcher
+    logging.warning(f"No keyword files found in {path}; using built-in keyword lists")
+    matcher = KeywordMatcher()
+    for category, phrases in (fallback or {}).items():
+        matcher.add_many(phrases, category)
+    return matcher
@@ -1,7 +1,10 @@
 import argparse
 import os
-from .pipeline import process_image
-from .utils import ensure_dir, load_config
+import cv2
+from .pipeline import process_array
+from .documents import process_document, is_document
+from .dedup import index_from_config
+from .utils import ensure_dir, load_config, save_json
 import logging
 
 cfg = load_config()
@@ -10,22 +13,61 @@ def main():
     parser = argparse.ArgumentParser(description="OCR Text Detection - pipeline runner")
     parser.add_argument("--input_dir", required=True, help="Directory with images to process")
     parser.add_argument("--output_dir", required=True, help="Directory to save outputs")
+    parser.add_argument("--page_workers", type=int, default=None,
+                        help="Pages processed in parallel for PDF/TIFF inputs (default: documents.page_workers)")
     args = parser.parse_args()
 
     ensure_dir(args.output_dir)
-    images = [os.path.join(args.input_dir, f) for f in os.listdir(args.input_dir)
-              if f.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp'))]
-    if not images:
-        logging.error("No images found in input_dir")
+    images, documents = [], []
+    for f in os.listdir(args.input_dir):
+        path = os.path.join(args.input_dir, f)
+        if f.lower().endswith(('.pdf', '.tif', '.tiff')) and is_document(path):
+            # multi-page inputs are streamed page by page
+            documents.append(path)
+        elif f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')):
+            images.append(path)
+    if not images and not documents:
+        logging.error("No images or documents found in input_dir")
         return
 
+    for doc_path in documents:
+        logging.info(f"Processing document: {doc_path}")
+        try:
+            summary = process_document(doc_path, args.output_dir, workers=args.page_workers)
+            logging.info(f"{doc_path}: {summary['pages']} pages")
+        except Exception as e:
+            logging.exception(f"Failed to process {doc_path}: {e}")
+
+    # repeated inputs reuse the first copy's results instead of re-running OCR (dedup.enabled)
+    dedup = index_from_config(cfg)
     for img_path in images:
         logging.info(f"Processing: {img_path}")
         try:
-            res = process_image(img_path, args.output_dir)
+            # decoded once: the same array is fingerprinted and run through the pipeline
+            img = cv2.imread(img_path)
+            if img is None:
+                raise FileNotFoundError(f"Cannot read image: {img_path}")
+            fp = None
+            if dedup is not None:
+                fp = dedup.fingerprint(img)
+                hit = dedup.lookup(fp)
+                if hit is not None:
+                    first, res, info = hit
+                    logging.info(f"{img_path} is a duplicate of {first}; reusing its {len(res)} results")
+                    if cfg['output'].get('export_json', True):
+                        json_path = os.path.join(args.output_dir, os.path.splitext(os.path.basename(img_path))[0] + ".json")
+                        save_json(dict({"image": os.path.basename(img_path), "duplicate_of": os.path.basename(first),
+                                        "results": res}, **info), json_path)
+                    continue
+            info = {}
+            res = process_array(img, os.path.basename(img_path), args.output_dir, info=info)
+            if fp is not None:
+                dedup.add(fp, (img_path, res, info))
             logging.info(f"Found {len(res)} text elements in {img_path}")
         except Exception as e:
             logging.exception(f"Failed to process {img_path}: {e}")
+    if dedup is not None:
+        logging.info(f"Duplicate index: {dedup.stats()}")
 
 if __name__ == "__main__":
     main()
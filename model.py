@@ -1,5 +1,8 @@
 import torch.nn as nn
+import torch.nn.functional as F
 import torch
+from typing import Final, Optional
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
 
 class CRNN(nn.Module):
     def __init__(self, num_classes, input_channels=1):
@@ -16,8 +19,11 @@ class CRNN(nn.Module):
             nn.ReLU(inplace=True),
             nn.BatchNorm2d(256),
         )
-        # compute LSTM input dim: depends on output channels and height reduction
-        rnn_input_size = 256 * 8  # if height=32 and two poolings reduce to ~8
+        # collapse any input height to 8 rows (a no-op for the usual 32 px input, so existing
+        # checkpoints load unchanged); width is left alone and becomes the sequence axis. Pooled
+        # with F.adaptive_avg_pool2d in head(): nn.AdaptiveAvgPool2d((8, None)) cannot be scripted
+        self.pool_h = 8
+        rnn_input_size = 256 * self.pool_h
         self.rnn = nn.Sequential(
             nn.Linear(rnn_input_size, 512),
             nn.ReLU(inplace=True),
@@ -25,11 +31,20 @@ class CRNN(nn.Module):
         )
         self.fc = nn.Linear(256*2, num_classes)  # bidirectional
 
-    def forward(self, x):
-        # x: B x C x H x W
-        b, c, h, w = x.size()
-        feat = self.cnn(x)
+    @staticmethod
+    def output_lengths(widths):
+        # CTC time steps produced for an input of `widths` pixels (the one 2x2 pooling halves width)
+        return torch.clamp(torch.as_tensor(widths, dtype=torch.long) // 2, min=1)
+
+    def forward(self, x, widths: Optional[torch.Tensor] = None):
+        # x: B x C x H x W (any H, any W); widths: optional true (unpadded) width per sample,
+        # which packs the LSTM input so padding never leaks into the bidirectional state
+        return self.head(self.cnn(x), widths)
+
+    def head(self, feat, widths: Optional[torch.Tensor] = None):
         # feat: B x C' x H' x W'
+        if feat.size(2) != self.pool_h:
+            feat = F.adaptive_avg_pool2d(feat, [self.pool_h, feat.size(3)])
         b, c2, h2, w2 = feat.size()
         # collapse height -> feature vector along width
         feat = feat.permute(0, 3, 1, 2).contiguous()  # B, W', C', H'
@@ -37,7 +52,167 @@ class CRNN(nn.Module):
         # pass through linear then LSTM
         lin = self.rnn[0](feat)
         lin = self.rnn[1](lin)
-        rnn_out, _ = self.rnn[2](lin)
+        if widths is None:
+            rnn_out, _ = self.rnn[2](lin)
+        else:
+            lengths = self.output_lengths(widths).clamp(max=w2).cpu()
+            packed = pack_padded_sequence(lin, lengths, batch_first=True, enforce_sorted=False)
+            rnn_out, _ = self.rnn[2](packed)
+            rnn_out, _ = pad_packed_sequence(rnn_out, batch_first=True, total_length=w2)
         logits = self.fc(rnn_out)  # B, W', num_classes
         # for CTC we want T x B x C
         return logits.permute(1, 0, 2)
+
+
+def ds_block(cin, cout, pool=None):
+    # depthwise 3x3 + pointwise 1x1 (MobileNet style), ~8-9x fewer MACs than a full 3x3 conv
+    layers = [
+        nn.Conv2d(cin, cin, 3, 1, 1, groups=cin, bias=False),
+        nn.BatchNorm2d(cin),
+        nn.ReLU(inplace=True),
+        nn.Conv2d(cin, cout, 1, bias=False),
+        nn.BatchNorm2d(cout),
+        nn.ReLU(inplace=True),
+    ]
+    if pool:
+        layers.append(nn.MaxPool2d(pool))
+    return layers
+
+
+class LiteCRNN(nn.Module):
+    """
+    Light recognizer for 32 px text lines: depthwise-separable conv backbone, height averaged
+    away, then either a single-layer biGRU ('gru') or a stack of 1-D convs ('conv', no recurrence).
+    Same interface and time resolution (W/2 steps) as CRNN, so training, CTC decoding and the
+    recognizers work unchanged.
+    """
+
+    # a scripting constant: torch.jit.script then only compiles the branch that matches self.rnn
+    recurrent: Final[bool]
+
+    def __init__(self, num_classes, input_channels=1, head='gru', channels=(32, 64, 128, 160), hidden=128):
+        super().__init__()
+        c1, c2, c3, c4 = channels
+        self.cnn = nn.Sequential(
+            nn.Conv2d(input_channels, c1, 3, 1, 1, bias=False),
+            nn.BatchNorm2d(c1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d((2, 2)),
+            *ds_block(c1, c2, pool=(2, 1)),
+            *ds_block(c2, c3, pool=(2, 1)),
+            *ds_block(c3, c4),
+        )
+        self.head_type = head
+        self.recurrent = head == 'gru'
+        if head == 'gru':
+            self.rnn = nn.GRU(c4, hidden, num_layers=1, bidirectional=True, batch_first=True)
+            out_dim = hidden * 2
+        elif head == 'conv':
+            self.rnn = nn.Sequential(
+                nn.Conv1d(c4, hidden * 2, 3, 1, 1),
+                nn.ReLU(inplace=True),
+                nn.Conv1d(hidden * 2, hidden * 2, 3, 1, 1),
+                nn.ReLU(inplace=True),
+            )
+            out_dim = hidden * 2
+        else:
+            raise ValueError(f"Unknown LiteCRNN head: {head}")
+        self.fc = nn.Linear(out_dim, num_classes)
+
+    output_lengths = staticmethod(CRNN.output_lengths)
+
+    def forward(self, x, widths: Optional[torch.Tensor] = None):
+        feat = self.cnn(x).mean(2)  # average over (any) height -> B, C, W'
+        w2 = feat.size(2)
+        if not self.recurrent:
+            # receptive field is local, padding only touches the last couple of valid steps
+            seq = self.rnn(feat).permute(0, 2, 1)  # B, W', D
+        elif widths is None:
+            seq, _ = self.rnn(feat.permute(0, 2, 1))
+        else:
+            lengths = self.output_lengths(widths).clamp(max=w2).cpu()
+            packed = pack_padded_sequence(feat.permute(0, 2, 1), lengths, batch_first=True, enforce_sorted=False)
+            seq, _ = self.rnn(packed)
+            seq, _ = pad_packed_sequence(seq, batch_first=True, total_length=w2)
+        return self.fc(seq).permute(1, 0, 2)  # T x B x C
+
+
+MODEL_ARCHS = {
+    'crnn': lambda n: CRNN(n),
+    'lite_gru': lambda n: LiteCRNN(n, head='gru'),
+    'lite_conv': lambda n: LiteCRNN(n, head='conv'),
+}
+
+
+def build_model(arch, num_classes):
+    # checkpoints store 'arch'; older ones without it are the original CRNN
+    arch = arch or 'crnn'
+    if arch not in MODEL_ARCHS:
+        raise ValueError(f"Unknown model arch: {arch} (choose from {', '.join(MODEL_ARCHS)})")
+    return MODEL_ARCHS[arch](num_classes)
+
+
+def count_params(model):
+    return sum(p.numel() for p in model.parameters())
+
+
+def count_flops(model, h=32, w=320):
+    # multiply-adds x2 for one h x w crop, counted with forward hooks on conv/linear/recurrent layers
+    flops = [0]
+
+    def conv_hook(m, inp, out):
+        k = m.kernel_size[0] * (m.kernel_size[1] if len(m.kernel_size) > 1 else 1)
+        flops[0] += 2 * out.numel() * (m.in_channels // m.groups) * k
+
+    def linear_hook(m, inp, out):
+        flops[0] += 2 * out.numel() * m.in_features
+
+    def rnn_hook(m, inp, out):
+        gates = 4 if isinstance(m, nn.LSTM) else 3
+        steps = inp[0].size(0) * inp[0].size(1)
+        dirs = 2 if m.bidirectional else 1
+        size_in = m.input_size
+        for _ in range(m.num_layers):
+            flops[0] += 2 * steps * dirs * gates * (size_in + m.hidden_size) * m.hidden_size
+            size_in = m.hidden_size * dirs
+
+    hooks = []
+    for m in model.modules():
+        if isinstance(m, (nn.Conv1d, nn.Conv2d)):
+            hooks.append(m.register_forward_hook(conv_hook))
+        elif isinstance(m, nn.Linear):
+            hooks.append(m.register_forward_hook(linear_hook))
+        elif isinstance(m, (nn.LSTM, nn.GRU)):
+            hooks.append(m.register_forward_hook(rnn_hook))
+    was_training = model.training
+    model.eval()
+    with torch.no_grad():
+        model(torch.zeros(1, 1, h, w))
+    model.train(was_training)
+    for hk in hooks:
+        hk.remove()
+    return flops[0]
+
+
+def cpu_latency_ms(model, batch_size=1, h=32, w=320, repeat=20):
+    # median forward latency of a batch on CPU
+    import time
+    model = model.eval()
+    x = torch.randn(batch_size, 1, h, w)
+    times = []
+    with torch.inference_mode():
+        model(x)
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            model(x)
+            times.append(time.perf_counter() - t0)
+    return 1000.0 * sorted(times)[len(times) // 2]
+
+
+if __name__ == '__main__':
+    # python -m src.model: params / FLOPs / CPU latency for every arch (CER: eval.compare_archs)
+    n_classes = 37
+    for name in MODEL_ARCHS:
+        m = build_model(name, n_classes)
+        print(f"{name:>10}: {count_params(m) / 1e6:6.2f} M params, {count_flops(m) / 1e6:7.1f} MFLOPs/crop, "
+              f"{cpu_latency_ms(m):6.2f} ms (bs 1), {cpu_latency_ms(m, 32):7.2f} ms (bs 32)")
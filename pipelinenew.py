@@ -1,45 +1,145 @@
 import os
+import time
 import cv2
 from .detector import detect_text_boxes
-from .recognizer import recognize_from_crop
-from .cleaner import preprocess_image, final_clean, expand_box
+from .recognizer import recognize_crops_with_lang
+from .cleaner import preprocess_image, final_clean_many, expand_box, deskew_image
+from .parser import CONTACT_FIELDS, normalize_fields, line_features, contact_fields_in
 from .utils import ensure_dir, save_json, load_config
 import logging
 
 cfg = load_config()
 
-def process_image(image_path, output_dir):
-    ensure_dir(output_dir)
+def process_image(image_path, output_dir, fields=None):
+    t = time.perf_counter()
     img = cv2.imread(image_path)
     if img is None:
         raise FileNotFoundError(f"Cannot read image: {image_path}")
+    return process_array(img, os.path.basename(image_path), output_dir,
+                         timings={'load': time.perf_counter() - t}, fields=fields)
+
+def box_priority(box, shape):
+    """
+    Higher for boxes that look like contact lines: emails, phone numbers and URLs on cards are
+    long single lines of small text, mostly in the lower half, while names and logos are the
+    tall text near the top.
+    """
+    x0, y0, x1, y1 = box
+    h = max(1, y1 - y0)
+    aspect = (x1 - x0) / float(h)
+    return (y0 + y1) / (2.0 * shape[0]) + min(aspect, 12.0) / 12.0 - 4.0 * h / shape[0]
+
+def recognize_until(crops, boxes, shape, fields, lang):
+    """
+    Early-exit recognition for requested contact fields: crops are read in box_priority order,
+    pipeline.early_exit_chunk at a time (batched backends still get batches), and reading stops
+    once every requested field has been seen on a line recognized with at least
+    pipeline.early_exit_min_conf. Returns {crop index: (text, conf, lang)} for the crops read.
+    """
+    pcfg = cfg.get('pipeline') or {}
+    chunk = max(1, pcfg.get('early_exit_chunk', 4))
+    min_conf = pcfg.get('early_exit_min_conf', 60)
+    order = sorted(range(len(crops)), key=lambda i: -box_priority(boxes[i], shape))
+    done, found = {}, set()
+    for start in range(0, len(order), chunk):
+        idxs = order[start:start + chunk]
+        recognized = recognize_crops_with_lang([crops[i] for i in idxs], lang=lang)
+        cleaned = final_clean_many([text for text, _, _ in recognized])
+        for i, rec, text in zip(idxs, recognized, cleaned):
+            done[i] = rec
+            if rec[1] >= min_conf:
+                found |= contact_fields_in(line_features(text, layout=False))
+        if fields <= found:
+            break
+    return done
+
+def process_array(img, image_name, output_dir, timings=None, fields=None, info=None):
+    # the pipeline on an already decoded BGR page; image_name names the crops/JSON (documents.py
+    # passes e.g. "scan_p003" for page 3 of scan.pdf). fields (e.g. "email,mobile") limits the
+    # work to what those parsed fields need: crops that are never read are left out of the results.
+    # info, when given, is filled with page-level output next to the results (see "deskew" below)
+    ensure_dir(output_dir)
+    fields = normalize_fields(fields)
+    timings = {} if timings is None else timings
+    info = {} if info is None else info
+    stem = os.path.splitext(image_name)[0]
+    # one affine deskew so detection, crops and line grouping all see level text; boxes below
+    # are in the deskewed page's coordinates, and a rotated page gets info["deskew"] = {angle,
+    # matrix (input -> deskewed page), size} in the JSON so callers can map them back (cleaner.unskew_box)
+    t = time.perf_counter()
+    if cfg['preprocess'].get('deskew', True):
+        img, skew = deskew_image(img, cfg)
+        if skew['angle']:
+            info["deskew"] = {k: skew[k] for k in ("angle", "matrix", "size")}
+            logging.info(f"Deskewed {image_name} by {skew['angle']} deg ({skew})")
+    timings['deskew'] = time.perf_counter() - t
     # preprocessing (not destructive)
+    t = time.perf_counter()
     pre = preprocess_image(img, cfg)
+    timings['preprocess'] = time.perf_counter() - t
     # detection
+    t = time.perf_counter()
     boxes = detect_text_boxes(img, method=cfg['detector'].get('method','auto'))
+    timings['detect'] = time.perf_counter() - t
+    t = time.perf_counter()
+    # recognizers work on gray uint8: convert the page once, then every crop is a view into it.
+    # Only tesserocr reads the view in place; pytesseract still writes each crop to a temp file
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
     results = []
-    idx = 0
+    crops = []
     for box in boxes:
-        idx += 1
         x0, y0, x1, y1 = expand_box(box, img.shape, pad=6)
-        crop = img[y0:y1, x0:x1]
-        text, conf = recognize_from_crop(crop, lang=cfg['recognizer'].get('lang','eng'))
-        clean_text = final_clean(text)
-        # optionally save crop
-        crop_path = None
-        if cfg['output'].get('save_crops', True):
-            crop_name = os.path.splitext(os.path.basename(image_path))[0] + f"_crop_{idx}.png"
-            crop_path = os.path.join(output_dir, crop_name)
-            cv2.imwrite(crop_path, crop)
+        crops.append(gray[y0:y1, x0:x1])
         results.append({
             "box": [int(x0), int(y0), int(x1), int(y1)],
-            "text_raw": text,
-            "text_clean": clean_text,
-            "confidence": conf,
-            "crop_path": crop_path
+            "text_raw": None,
+            "text_clean": None,  # filled in one batch below
+            "confidence": None,
+            "crop_path": None
         })
+    timings['crop'] = time.perf_counter() - t
+    # recognition runs once per page so batched backends (crnn) see every crop together
+    t = time.perf_counter()
+    lang = cfg['recognizer'].get('lang','eng')
+    if fields is not None and fields <= set(CONTACT_FIELDS):
+        # only contact fields wanted: read the likely contact lines first and stop when they are found
+        done = recognize_until(crops, [r["box"] for r in results], img.shape, fields, lang)
+        kept = sorted(done)
+        recognized = [done[i] for i in kept]
+        if len(kept) < len(results):
+            logging.info(f"{image_name}: requested fields {sorted(fields)} found, "
+                         f"{len(results) - len(kept)} crops not read")
+    else:
+        kept = list(range(len(results)))
+        recognized = recognize_crops_with_lang(crops, lang=lang)
+    results = [results[i] for i in kept]
+    for r, (text, conf, lang) in zip(results, recognized):
+        r["text_raw"] = text
+        r["confidence"] = conf
+        r["lang"] = lang
+    timings['recognize'] = time.perf_counter() - t
+    # optionally save the crops that were read (the colour view, encoded exactly once); crop
+    # numbers follow detection order, so an early exit leaves gaps rather than renumbering
+    if cfg['output'].get('save_crops', True):
+        t = time.perf_counter()
+        for i, r in zip(kept, results):
+            x0, y0, x1, y1 = r["box"]
+            r["crop_path"] = os.path.join(output_dir, stem + f"_crop_{i + 1}.png")
+            cv2.imwrite(r["crop_path"], img[y0:y1, x0:x1])
+        timings['save_crops'] = time.perf_counter() - t
+    timings['recognize'] = time.perf_counter() - t
+    t = time.perf_counter()
+    for r, clean_text in zip(results, final_clean_many([r["text_raw"] for r in results])):
+        r["text_clean"] = clean_text
+    timings['clean'] = time.perf_counter() - t
     # export json
     if cfg['output'].get('export_json', True):
-        json_path = os.path.join(output_dir, os.path.splitext(os.path.basename(image_path))[0] + ".json")
-        save_json({"image": os.path.basename(image_path), "results": results}, json_path)
+        json_path = os.path.join(output_dir, stem + ".json")
+        out = {"image": image_name, "results": results}
+        out.update(info)
+        if fields is not None:
+            out["fields"] = sorted(fields)
+        save_json(out, json_path)
+    logging.info(f"{image_name} stage timings: "
+                 + ", ".join(f"{k} {1000 * v:.1f}ms" for k, v in timings.items()))
     return results
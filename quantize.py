@@ -0,0 +1,148 @@
+import argparse
+import os
+import torch
+import torch.nn as nn
+from torch.ao.quantization import QuantStub, DeQuantStub, get_default_qconfig, prepare, convert, fuse_modules, quantize_dynamic
+from .dataset import OCRDataset
+from .eval import evaluate
+from .model import CRNN, build_model
+from .utils import Tokenizer, save_checkpoint, load_checkpoint, ensure_dir
+import logging
+
+QUANT_MODES = ("dynamic", "static")
+
+
+class QuantizableCRNN(CRNN):
+    # CRNN with quant/dequant stubs around the conv stack; the LSTM head stays float (or dynamic int8)
+    def __init__(self, num_classes, input_channels=1):
+        super().__init__(num_classes, input_channels=input_channels)
+        self.quant = QuantStub()
+        self.dequant = DeQuantStub()
+
+    def forward(self, x, widths=None):
+        return self.head(self.dequant(self.cnn(self.quant(x))), widths)
+
+
+def quant_engine():
+    engines = torch.backends.quantized.supported_engines
+    for name in ("x86", "fbgemm", "qnnpack"):
+        if name in engines:
+            return name
+    return engines[0]
+
+
+def quantize_head(model):
+    # dynamic int8 for the Linear/LSTM layers that dominate CPU time
+    return quantize_dynamic(model, {nn.Linear, nn.LSTM, nn.GRU}, dtype=torch.qint8)
+
+
+def build_quantized_model(num_classes, mode, float_state=None, calib_batches=(), arch='crnn'):
+    """
+    mode 'dynamic': int8 Linear/LSTM weights, activations quantized on the fly.
+    mode 'static' : additionally int8 conv stack, activation ranges observed on calib_batches.
+    With no float_state/calibration this just builds the module structure for load_state_dict.
+    The lite archs only support 'dynamic' (their GRU/Linear head).
+    """
+    if mode not in QUANT_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    arch = arch or 'crnn'
+    if mode == "static" and arch != 'crnn':
+        raise ValueError(f"Static quantization is only implemented for the 'crnn' arch, not {arch}")
+    torch.backends.quantized.engine = quant_engine()
+    if mode == "dynamic":
+        model = build_model(arch, num_classes)
+        if float_state is not None:
+            model.load_state_dict(float_state)
+        return quantize_head(model.eval())
+    model = QuantizableCRNN(num_classes)
+    if float_state is not None:
+        model.load_state_dict(float_state, strict=False)
+    model.eval()
+    fuse_modules(model.cnn, [["0", "1"], ["3", "4"], ["6", "7"]], inplace=True)
+    model.qconfig = None
+    for m in (model.quant, model.cnn, model.dequant):
+        m.qconfig = get_default_qconfig(torch.backends.quantized.engine)
+    prepare(model, inplace=True)
+    with torch.inference_mode():
+        for images in calib_batches:
+            model(images)
+    convert(model, inplace=True)
+    return quantize_head(model)
+
+
+def load_quantized_checkpoint(ckpt, num_classes):
+    model = build_quantized_model(num_classes, ckpt['quantization'], arch=ckpt.get('arch'))
+    model.load_state_dict(ckpt['model_state'])
+    return model.eval()
+
+
+def calibration_batches(dataset, n_samples=256, batch_size=32):
+    n = min(n_samples, len(dataset))
+    for start in range(0, n, batch_size):
+        items = [dataset[i][0] for i in range(start, min(n, start + batch_size))]
+        yield torch.stack(items)
+
+
+def file_size_mb(path):
+    return os.path.getsize(path) / (1024.0 * 1024.0)
+
+
+def quantize_checkpoint(checkpoint, annotations_file, img_root, out_dir='checkpoints', modes=QUANT_MODES,
+                        calib_samples=256, eval_annotations=None, eval_samples=None):
+    ensure_dir(out_dir)
+    ckpt = load_checkpoint(checkpoint, 'cpu')
+    tokenizer = Tokenizer(ckpt['tokenizer']['chars'])
+    num_classes = len(tokenizer.idx2char)
+    calib_set = OCRDataset(annotations_file, img_root, tokenizer)
+    eval_set = OCRDataset(eval_annotations, img_root, tokenizer) if eval_annotations else calib_set
+
+    arch = ckpt.get('arch', 'crnn')
+    if arch != 'crnn':
+        modes = [m for m in modes if m == 'dynamic']
+    fp32 = build_model(arch, num_classes)
+    fp32.load_state_dict(ckpt['model_state'])
+    fp32.eval()
+    report = [dict(mode="fp32", path=checkpoint, size_mb=file_size_mb(checkpoint),
+                   **evaluate(fp32, eval_set, tokenizer, eval_samples))]
+
+    base = os.path.splitext(os.path.basename(checkpoint))[0]
+    for mode in modes:
+        model = build_quantized_model(num_classes, mode, float_state=ckpt['model_state'],
+                                      calib_batches=calibration_batches(calib_set, calib_samples), arch=arch)
+        path = os.path.join(out_dir, f"{base}_int8_{mode}.pth")
+        save_checkpoint(path, {
+            'epoch': ckpt.get('epoch'),
+            'quantization': mode,
+            'arch': arch,
+            'model_state': model.state_dict(),
+            'tokenizer': ckpt['tokenizer'],
+        })
+        report.append(dict(mode=mode, path=path, size_mb=file_size_mb(path),
+                           **evaluate(model, eval_set, tokenizer, eval_samples)))
+    for row in report:
+        row["cer_delta"] = row["cer"] - report[0]["cer"]
+        row["speedup"] = row["samples_per_s"] / max(report[0]["samples_per_s"], 1e-9)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post-training int8 quantization of a CRNN checkpoint")
+    parser.add_argument("--checkpoint", required=True, help="fp32 checkpoint written by train.py")
+    parser.add_argument("--annotations", required=True, help="OCRDataset CSV used for calibration")
+    parser.add_argument("--img_root", required=True)
+    parser.add_argument("--out_dir", default="checkpoints")
+    parser.add_argument("--modes", default="dynamic,static", help="Comma separated: dynamic,static")
+    parser.add_argument("--calib_samples", type=int, default=256)
+    parser.add_argument("--eval_annotations", default=None, help="Held-out CSV for CER (default: calibration CSV)")
+    parser.add_argument("--eval_samples", type=int, default=None)
+    args = parser.parse_args()
+    report = quantize_checkpoint(args.checkpoint, args.annotations, args.img_root, args.out_dir,
+                                 modes=[m.strip() for m in args.modes.split(',') if m.strip()],
+                                 calib_samples=args.calib_samples, eval_annotations=args.eval_annotations,
+                                 eval_samples=args.eval_samples)
+    for row in report:
+        logging.info(f"{row['mode']:>8}: {row['size_mb']:.1f} MB, {row['samples_per_s']:.1f} samples/s "
+                     f"(x{row['speedup']:.2f}), CER {row['cer']:.4f} ({row['cer_delta']:+.4f})")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,171 @@
+import threading
 import pytesseract
-from PIL import Image
 import cv2
 import numpy as np
 from .utils import load_config
+from .scripts import SCRIPT_LANGS, dominant_scripts, lang_scripts
 import logging
 
+try:  # optional: in-process Tesseract fed raw pixel buffers (no temp files, no subprocess)
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 cfg = load_config()
 
-def recognize_from_crop(crop, lang=None):
+_TESS = threading.local()
+
+def _tess_api(lang, psm=6):
+    # PyTessBaseAPI is not thread-safe: one per thread, language and page segmentation mode
+    apis = getattr(_TESS, 'apis', None)
+    if apis is None:
+        apis = _TESS.apis = {}
+    api = apis.get((lang, psm))
+    if api is None:
+        api = apis[(lang, psm)] = tesserocr.PyTessBaseAPI(lang=lang, psm=psm)
+    return api
+
+def words_to_text(data):
+    # image_to_data rows -> text with one line per (block, par, line), like image_to_string
+    lines = {}
+    for i, word in enumerate(data['text']):
+        if str(word).strip():
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(str(word).strip())
+    return '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+
+def recognize_from_crop(crop, lang=None, psm=6):
+    """
+    (text, mean word confidence or -1) for one crop. Gray uint8 arrays (views are fine) go in as
+    they are; BGR arrays are converted once. With tesserocr installed the pixels are handed to an
+    in-process API as a raw buffer; otherwise one pytesseract image_to_data call gives both the
+    words and their confidences. psm is Tesseract's page segmentation mode (6 = uniform block).
+    """
     if lang is None:
         lang = cfg['recognizer'].get('lang','eng')
-    # ensure crop is in correct format for pytesseract
-    if isinstance(crop, np.ndarray):
-        pil = Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+    if isinstance(crop, np.ndarray) and crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    if tesserocr is not None and isinstance(crop, np.ndarray):
+        api = _tess_api(lang, psm)
+        h, w = crop.shape[:2]
+        api.SetImageBytes(crop.tobytes(), w, h, 1, w)
+        text = api.GetUTF8Text()
+        mean_conf = int(api.MeanTextConf()) if text.strip() else -1
     else:
-        pil = crop
-    custom_config = r'--oem 3 --psm 6'  # good general config
-    text = pytesseract.image_to_string(pil, lang=lang, config=custom_config)
-    conf_data = pytesseract.image_to_data(pil, lang=lang, output_type=pytesseract.Output.DICT)
-    # compute mean confidence for non-empty words
-    confs = [int(c) for c in conf_data['conf'] if c.isdigit()]
-    mean_conf = int(sum(confs)/len(confs)) if confs else -1
+        custom_config = f'--oem 3 --psm {psm}'  # psm 6 is a good general config
+        conf_data = pytesseract.image_to_data(crop, lang=lang, config=custom_config,
+                                              output_type=pytesseract.Output.DICT)
+        text = words_to_text(conf_data)
+        # compute mean confidence for non-empty words
+        confs = [int(float(c)) for c, t in zip(conf_data['conf'], conf_data['text'])
+                 if str(t).strip() and float(c) >= 0]
+        mean_conf = int(sum(confs)/len(confs)) if confs else -1
     logging.debug(f"Recognized text: {text.strip()} (conf={mean_conf})")
     return text.strip(), mean_conf
+
+_CRNN = None
+
+def get_crnn_recognizer():
+    # built once per process; imported lazily so the tesseract backend never pulls in torch
+    global _CRNN
+    if _CRNN is not None:
+        return _CRNN
+    rcfg = cfg['recognizer']
+    runtime = rcfg.get('crnn_runtime', 'torch').lower()
+    kwargs = dict(batch_size=rcfg.get('crnn_batch_size', 32),
+                  bucket_step=rcfg.get('crnn_bucket_step', 32),
+                  decoder=rcfg.get('crnn_decoder', 'greedy'),
+                  beam_width=rcfg.get('crnn_beam_width', 8),
+                  lexicon=rcfg.get('crnn_lexicon'))
+    if rcfg.get('crnn_max_w'):
+        kwargs['max_w'] = rcfg['crnn_max_w']
+    if runtime == 'torch':
+        from .infer import get_recognizer
+        _CRNN = get_recognizer(rcfg.get('crnn_checkpoint'), chars=rcfg.get('crnn_chars'),
+                               device=rcfg.get('device', 'cpu'), **kwargs)
+    else:
+        # exported model (export.py): onnx / opencv run without torch
+        from .runtime import make_recognizer
+        _CRNN = make_recognizer(runtime, rcfg.get('crnn_model_path'), device=rcfg.get('device', 'cpu'), **kwargs)
+    return _CRNN
+
+def osd_script(crop):
+    # Tesseract's script detection (needs osd.traineddata); None when it cannot tell
+    try:
+        if tesserocr is not None and isinstance(crop, np.ndarray):
+            api = _tess_api('osd', 0)  # PSM.OSD_ONLY
+            api.SetImageBytes(crop.tobytes(), crop.shape[1], crop.shape[0], 1, crop.shape[1])
+            res = api.DetectOrientationScript() or {}
+            return res.get('script_name')
+        osd = pytesseract.image_to_osd(crop, output_type=pytesseract.Output.DICT)
+        return osd.get('script') if float(osd.get('script_conf', 0)) > 0 else None
+    except Exception as e:
+        logging.debug(f"OSD script detection failed: {e}")
+        return None
+
+def route_lang(text, conf, primary, crop=None, rcfg=None):
+    """
+    Language set for a second pass, or None to keep the first pass (primary). A crop is only
+    re-read on evidence of a script primary does not cover: letters of that script in the
+    first-pass text or, for a read below route_min_conf, Tesseract OSD on the crop; the second
+    pass then uses primary plus just those languages. Empty reads (no text or conf -1), reads
+    in covered scripts and low confidence without any script evidence all keep the first result.
+    """
+    rcfg = cfg['recognizer'] if rcfg is None else rcfg
+    if not (text or '').strip() or conf < 0:
+        return None
+    covered = lang_scripts(primary)
+    missing = set(dominant_scripts(text)) - covered
+    if not missing and conf < rcfg.get('route_min_conf', 60) and crop is not None:
+        osd = osd_script(crop)
+        if osd and osd not in covered:
+            missing = {osd}
+    codes = [SCRIPT_LANGS[sc] for sc in sorted(missing) if sc in SCRIPT_LANGS]
+    return '+'.join([primary] + codes) if codes else None
+
+def recognize_routed(crop, primary=None):
+    # (text, conf, lang used) with per-crop language routing
+    primary = primary or cfg['recognizer'].get('lang', 'eng')
+    text, conf = recognize_from_crop(crop, lang=primary)
+    lang = route_lang(text, conf, primary, crop)
+    if lang is None:
+        return text, conf, primary
+    text2, conf2 = recognize_from_crop(crop, lang=lang)
+    if conf2 > conf:
+        return text2, conf2, lang
+    return text, conf, primary
+
+_PRELOADED = set()
+
+def preload_languages(langs):
+    # create the tesserocr engine for each language set up front (they stay resident per thread);
+    # a no-op under pytesseract, which starts a fresh tesseract process for every call anyway
+    if tesserocr is None:
+        return
+    for lang in langs or []:
+        if lang in _PRELOADED:
+            continue
+        try:
+            _tess_api(lang)
+            _PRELOADED.add(lang)
+        except Exception as e:
+            logging.warning(f"Could not preload Tesseract language '{lang}': {e}")
+
+def recognize_crops_with_lang(crops, lang=None):
+    # [(text, conf, lang)] in order; lang is the language set that produced the text
+    rcfg = cfg['recognizer']
+    backend = rcfg.get('backend', 'tesseract').lower()
+    primary = lang or rcfg.get('lang', 'eng')
+    if rcfg.get('cascade', False):
+        from .cascade import cascade_recognize
+        return [(t, c, l) for t, c, l, _ in cascade_recognize(crops, primary)]
+    if backend == 'crnn':
+        return [(t, c, 'crnn') for t, c in get_crnn_recognizer().recognize(crops)]
+    if not rcfg.get('lang_routing', False):
+        return [recognize_from_crop(c, lang=primary) + (primary,) for c in crops]
+    preload_languages(rcfg.get('preload_langs') or [primary])
+    return [recognize_routed(c, primary) for c in crops]
+
+def recognize_crops(crops, lang=None):
+    # recognize a page's crops with the configured backend; returns [(text, conf)] in order
+    return [(t, c) for t, c, _ in recognize_crops_with_lang(crops, lang=lang)]
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from .parser import parse_many
+from .utils import ensure_dir, save_json
+import logging
+
+
+def iter_records(input_path):
+    # yields {"image": ..., "results": [...]} from a JSON-Lines file, a single JSON file
+    # or a directory of per-image JSON outputs written by process_image
+    if os.path.isdir(input_path):
+        names = sorted(f for f in os.listdir(input_path) if f.lower().endswith('.json'))
+        for name in names:
+            yield from iter_records(os.path.join(input_path, name))
+        return
+    if input_path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield normalize_record(json.loads(line), f"{input_path}:{line_no}")
+                except ValueError as e:
+                    logging.warning(f"Skipping bad JSON line {input_path}:{line_no}: {e}")
+        return
+    try:
+        with open(input_path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+    except ValueError as e:
+        logging.warning(f"Skipping unreadable JSON {input_path}: {e}")
+        return
+    yield normalize_record(obj, input_path)
+
+
+def normalize_record(obj, source):
+    # old pipeline outputs were a bare list of results; newer ones are {"image", "results", "parsed"}
+    if isinstance(obj, list):
+        image = os.path.splitext(os.path.basename(source.split(':')[0]))[0]
+        return {"image": image, "results": obj}
+    return {"image": obj.get("image") or os.path.basename(source), "results": obj.get("results") or []}
+
+
+def reparse(input_path, output_path, workers=0, chunksize=64, keep_results=False):
+    pending = deque()
+
+    def results_of(records):
+        for rec in records:
+            pending.append(rec)
+            yield rec["results"]
+
+    to_jsonl = output_path.lower().endswith(('.jsonl', '.ndjson'))
+    if to_jsonl:
+        ensure_dir(os.path.dirname(output_path) or ".")
+        out_f = open(output_path, "w", encoding="utf-8")
+    else:
+        ensure_dir(output_path)
+        out_f = None
+
+    count = 0
+    start = time.perf_counter()
+    try:
+        for parsed in parse_many(results_of(iter_records(input_path)), workers=workers, chunksize=chunksize):
+            rec = pending.popleft()
+            out = {"image": rec["image"]}
+            if keep_results:
+                out["results"] = rec["results"]
+            out["parsed"] = parsed
+            if out_f is not None:
+                out_f.write(json.dumps(out, ensure_ascii=False) + "\n")
+            else:
+                json_name = os.path.splitext(os.path.basename(str(rec["image"])))[0] + ".json"
+                save_json(out, os.path.join(output_path, json_name))
+            count += 1
+    finally:
+        if out_f is not None:
+            out_f.close()
+    elapsed = time.perf_counter() - start
+    logging.info(f"Re-parsed {count} records in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f}/s)")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run contact field parsing over saved OCR outputs")
+    parser.add_argument("--input", required=True, help="Directory of per-image JSON outputs, a JSON file or a JSON-Lines file")
+    parser.add_argument("--output", required=True, help="Output directory (per-image JSON) or a .jsonl file")
+    parser.add_argument("--workers", type=int, default=0, help="Parser processes (0/1 = in-process)")
+    parser.add_argument("--chunksize", type=int, default=64, help="Records per task sent to each worker")
+    parser.add_argument("--keep_results", action="store_true", help="Copy low-level results into the output")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        logging.error(f"Input not found: {args.input}")
+        return
+    reparse(args.input, args.output, workers=args.workers, chunksize=args.chunksize,
+            keep_results=args.keep_results)
+
+if __name__ == "__main__":
+    main()
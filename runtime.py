@@ -0,0 +1,184 @@
+import json
+import math
+import os
+import threading
+import cv2
+import numpy as np
+from PIL import Image
+from .utils import Tokenizer, resize_and_pad
+from .decoding import ctc_greedy_decode, ctc_beam_decode, LexiconScorer, softmax
+
+# Torch-free CRNN serving: exported ONNX models run through onnxruntime or cv2.dnn,
+# so API/worker processes never import torch. infer.CRNNRecognizer shares the base class.
+
+
+def to_gray_pil(crop):
+    # crops from the pipeline are BGR/gray numpy arrays; the training transforms expect PIL 'L'
+    if isinstance(crop, Image.Image):
+        return crop.convert('L')
+    arr = np.asarray(crop)
+    if arr.ndim == 3:
+        arr = cv2.cvtColor(arr, cv2.COLOR_BGR2GRAY)
+    return Image.fromarray(arr)
+
+
+class BucketedRecognizer:
+    """
+    Shared batching/decoding for every CRNN backend. Crops are bucketed by their resized width
+    (aspect ratio) so each batch is padded only to its bucket width instead of max_w; set
+    bucket_step=max_w for the old pad-to-320 behaviour. Subclasses implement forward().
+    Every backend gets each crop's true width and each sample is decoded only over its own
+    output_lengths steps, so padded columns in a bucket are never read as text. Backends with
+    supports_lengths also pack the padding out of the LSTM, so their results do not depend on
+    the other crops in the bucket at all.
+    """
+
+    supports_lengths = False
+
+    def __init__(self, chars, batch_size=32, bucket_step=32, target_h=32, max_w=320,
+                 decoder='greedy', beam_width=8, lexicon=None):
+        self.tokenizer = Tokenizer(chars)
+        self.batch_size = max(1, int(batch_size))
+        self.bucket_step = max(1, int(bucket_step))
+        self.target_h = target_h
+        self.max_w = max_w
+        self.decoder = decoder
+        self.beam_width = beam_width
+        # lexicon: path to a word list, or an already built LexiconScorer
+        if isinstance(lexicon, str):
+            lexicon = LexiconScorer.from_file(lexicon)
+        self.scorer = lexicon
+
+    def forward(self, batch, widths=None):
+        # batch: B x 1 x H x W float32 numpy, widths: true width per sample
+        # -> T x B x C probabilities (numpy)
+        raise NotImplementedError
+
+    def output_lengths(self, widths):
+        # valid CTC steps per sample: every model halves the width once (model.CRNN.output_lengths)
+        return np.maximum(np.asarray(widths, dtype=np.int64) // 2, 1)
+
+    def resized_width(self, img):
+        w, h = img.size
+        return max(1, int(w * (self.target_h / float(max(1, h)))))
+
+    def bucket_width(self, img):
+        step = self.bucket_step
+        return min(self.max_w, int(math.ceil(self.resized_width(img) / float(step))) * step)
+
+    def plan_batches(self, images):
+        # group crop indices by bucket width, then cut each bucket into batches
+        buckets = {}
+        for i, img in enumerate(images):
+            buckets.setdefault(self.bucket_width(img), []).append(i)
+        batches = []
+        for width in sorted(buckets):
+            idxs = buckets[width]
+            for k in range(0, len(idxs), self.batch_size):
+                batches.append((width, idxs[k:k + self.batch_size]))
+        return batches
+
+    def decode(self, probs, lengths=None):
+        if self.decoder == 'beam':
+            return ctc_beam_decode(probs, self.tokenizer, lengths=lengths,
+                                   beam_width=self.beam_width, scorer=self.scorer)
+        return ctc_greedy_decode(probs, self.tokenizer, lengths=lengths)
+
+    def recognize_detailed(self, crops):
+        # [Decoded(text, char_confidences, confidence)] in input order
+        images = [to_gray_pil(c) for c in crops]
+        out = [None] * len(images)
+        for width, idxs in self.plan_batches(images):
+            arrs = [resize_and_pad(images[i], target_h=self.target_h, max_w=width) for i in idxs]
+            widths = np.array([min(width, self.resized_width(images[i])) for i in idxs])
+            probs = self.forward(np.stack(arrs)[:, None, :, :], widths)
+            lengths = np.minimum(self.output_lengths(widths), probs.shape[0])
+            for i, dec in zip(idxs, self.decode(probs, lengths)):
+                out[i] = dec
+        return out
+
+    def recognize(self, crops):
+        # [(text, confidence 0-100)] in input order, same shape as recognize_from_crop
+        return [(d.text, d.confidence) for d in self.recognize_detailed(crops)]
+
+    def recognize_one(self, crop):
+        return self.recognize([crop])[0]
+
+
+def load_model_meta(model_path):
+    # sidecar written by export.py next to the exported model
+    with open(os.path.splitext(model_path)[0] + ".json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class OnnxCRNNRecognizer(BucketedRecognizer):
+    # the exported graph has no widths input: padding reaches the LSTM, the decode skips it
+    def __init__(self, model_path, threads=0, **kwargs):
+        import onnxruntime as ort
+        meta = load_model_meta(model_path)
+        kwargs.setdefault('target_h', meta.get('target_h', 32))
+        kwargs.setdefault('max_w', meta.get('max_w', 320))
+        super().__init__(meta['chars'], **kwargs)
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, batch, widths=None):
+        logits = self.session.run(None, {self.input_name: batch.astype(np.float32)})[0]
+        return softmax(logits, axis=2)
+
+
+class DnnCRNNRecognizer(BucketedRecognizer):
+    # OpenCV's dnn module (already used for EAST); works for ONNX graphs its importer supports
+    def __init__(self, model_path, **kwargs):
+        meta = load_model_meta(model_path)
+        kwargs.setdefault('target_h', meta.get('target_h', 32))
+        kwargs.setdefault('max_w', meta.get('max_w', 320))
+        super().__init__(meta['chars'], **kwargs)
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.lock = threading.Lock()  # cv2.dnn.Net is not safe for concurrent forwards
+
+    def forward(self, batch, widths=None):
+        with self.lock:
+            self.net.setInput(batch.astype(np.float32))
+            logits = self.net.forward()
+        return softmax(logits, axis=2)
+
+
+class TorchScriptCRNNRecognizer(BucketedRecognizer):
+    def __init__(self, model_path, device='cpu', **kwargs):
+        import torch
+        meta = load_model_meta(model_path)
+        kwargs.setdefault('target_h', meta.get('target_h', 32))
+        kwargs.setdefault('max_w', meta.get('max_w', 320))
+        super().__init__(meta['chars'], **kwargs)
+        self.torch = torch
+        self.device = device
+        self.model = torch.jit.load(model_path, map_location=device).eval()
+        # scripted models keep forward(x, widths) and pack the padding like the eager model;
+        # traced ones (export fell back to torch.jit.trace) only take x
+        self.supports_lengths = len(self.model.forward.schema.arguments) > 2
+
+    def forward(self, batch, widths=None):
+        torch = self.torch
+        with torch.inference_mode():
+            x = torch.from_numpy(batch).to(self.device)
+            if self.supports_lengths and widths is not None:
+                logits = self.model(x, torch.from_numpy(np.asarray(widths, dtype=np.int64)))
+            else:
+                logits = self.model(x)
+            return logits.softmax(2).cpu().numpy()
+
+
+def make_recognizer(runtime, model_path, device='cpu', **kwargs):
+    runtime = (runtime or 'torch').lower()
+    if runtime == 'onnx':
+        return OnnxCRNNRecognizer(model_path, **kwargs)
+    if runtime in ('opencv', 'dnn'):
+        return DnnCRNNRecognizer(model_path, **kwargs)
+    if runtime == 'torchscript':
+        return TorchScriptCRNNRecognizer(model_path, device=device, **kwargs)
+    from .infer import CRNNRecognizer
+    return CRNNRecognizer(model_path, device=device, **kwargs)
@@ -0,0 +1,62 @@
+from collections import Counter
+
+# Unicode-script classification used for per-crop language routing (recognizer.py) and for
+# parser's language_detected. Only the scripts seen on our cards are listed.
+
+SCRIPT_RANGES = [
+    ("Devanagari", 0x0900, 0x097F),
+    ("Bengali", 0x0980, 0x09FF),
+    ("Gurmukhi", 0x0A00, 0x0A7F),
+    ("Gujarati", 0x0A80, 0x0AFF),
+    ("Oriya", 0x0B00, 0x0B7F),
+    ("Tamil", 0x0B80, 0x0BFF),
+    ("Telugu", 0x0C00, 0x0C7F),
+    ("Kannada", 0x0C80, 0x0CFF),
+    ("Malayalam", 0x0D00, 0x0D7F),
+]
+
+# script -> Tesseract traineddata name
+SCRIPT_LANGS = {
+    "Latin": "eng",
+    "Devanagari": "hin",
+    "Bengali": "ben",
+    "Gurmukhi": "pan",
+    "Gujarati": "guj",
+    "Oriya": "ori",
+    "Tamil": "tam",
+    "Telugu": "tel",
+    "Kannada": "kan",
+    "Malayalam": "mal",
+}
+
+
+def char_script(ch):
+    cp = ord(ch)
+    if ch.isalpha() and (cp < 0x0250 or 0x1E00 <= cp <= 0x1EFF):
+        return "Latin"
+    for name, lo, hi in SCRIPT_RANGES:
+        if lo <= cp <= hi:
+            return name
+    return None
+
+
+def script_counts(text):
+    return Counter(s for s in map(char_script, text or "") if s)
+
+
+def dominant_scripts(text, min_share=0.15):
+    # scripts making up at least min_share of the classified letters, most frequent first
+    counts = script_counts(text)
+    total = sum(counts.values())
+    return [s for s, n in counts.most_common() if n >= min_share * total] if total else []
+
+
+def languages_for(text, script_langs=SCRIPT_LANGS, min_share=0.15):
+    # Tesseract language codes for the scripts present in text, e.g. ["eng", "tam"]
+    return [script_langs[s] for s in dominant_scripts(text, min_share) if s in script_langs]
+
+
+def lang_scripts(lang, script_langs=SCRIPT_LANGS):
+    # scripts a Tesseract language set such as "eng+tam" covers
+    codes = set(lang.split("+"))
+    return {s for s, code in script_langs.items() if code in codes}
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import src.cascade as cascade
+from src.cascade import cascade_recognize, cascade_stats, escalate, fast_pass
+
+def ccfg(**kw):
+    out = {"fast": "tesseract", "fast_max_height": 32, "fast_psm": 7, "min_conf": 75, "psms": [6, 7, 11],
+           "binarize": True, "routing": False}
+    out.update(kw)
+    return out
+
+def crop(h=40, w=160, value=0):
+    # the pixel value tags the crop so the fake OCR knows which one it is reading
+    img = np.full((h, w, 3), 255, np.uint8)
+    img[10:30, 10:150] = value
+    return img
+
+class FakeOCR:
+    """recognize_from_crop stand-in: reads come from table(tag, psm, binarized, lang); binarized copies have tag -1."""
+
+    def __init__(self, table):
+        self.table = table
+        self.calls = []
+
+    def __call__(self, img, lang=None, psm=None):
+        binarized = img.ndim == 2
+        tag = -1 if binarized else int(img[20, 20].min())
+        self.calls.append((tag, img.shape, lang, psm, binarized))
+        return self.table(tag, psm, binarized, lang)
+
+@pytest.fixture
+def ocr(monkeypatch):
+    def install(table):
+        fake = FakeOCR(table)
+        monkeypatch.setattr(cascade, "recognize_from_crop", fake)
+        return fake
+    return install
+
+def test_fast_pass_shrinks_tall_crops(ocr):
+    fake = ocr(lambda tag, psm, binarized, lang: ("word", 90))
+    out = fast_pass([crop(h=64, w=200), crop(h=24, w=80)], "eng", ccfg())
+    assert out == [("word", 90), ("word", 90)]
+    assert [c[1][:2] for c in fake.calls] == [(32, 100), (24, 80)]
+    assert all(c[3] == 7 for c in fake.calls)
+
+def test_confident_crops_skip_escalation(ocr):
+    fake = ocr(lambda tag, psm, binarized, lang: (f"t{tag}", 95 if tag == 0 else 40))
+    before = cascade_stats()
+    results = cascade_recognize([crop(value=0), crop(value=1), crop(value=0)], lang="eng", ccfg=ccfg(binarize=False))
+    assert [r[3] for r in results] == ["fast", "escalated", "fast"]
+    assert [r[0] for r in results] == ["t0", "t1", "t0"]
+    # 3 fast reads + one escalated crop read at each of the 3 PSMs
+    assert len(fake.calls) == 6 and [c[3] for c in fake.calls[3:]] == [6, 7, 11]
+    after = cascade_stats()
+    assert after["crops"] - before["crops"] == 3 and after["escalated"] - before["escalated"] == 1
+    assert 0.0 <= after["escalation_rate"] <= 1.0
+
+def test_escalate_picks_most_confident_reading(ocr):
+    def table(tag, psm, binarized, lang):
+        if binarized and psm == 11:
+            return "Acme Ltd", 88
+        return "Acrne", 50 + psm
+    fake = ocr(table)
+    text, conf, lang = escalate(crop(value=3), "eng", ccfg())
+    assert (text, conf, lang) == ("Acme Ltd", 88, "eng")
+    assert sum(c[4] for c in fake.calls) == 3  # every PSM on the binarized copy too
+
+def test_escalation_never_lowers_confidence(ocr):
+    # the fast pass beat every expensive reading: keep it, but report the crop as escalated
+    ocr(lambda tag, psm, binarized, lang: ("fast", 70) if psm == 7 and not binarized else ("slow", 20))
+    results = cascade_recognize([crop(value=5)], lang="eng", ccfg=ccfg(psms=[6, 11]))
+    assert results == [("fast", 70, "eng", "escalated")]
+
+def test_routing_rereads_winner(ocr, monkeypatch):
+    ocr(lambda tag, psm, binarized, lang: ("नमस्ते", 80) if lang == "eng+hin" else ("?", 30))
+    monkeypatch.setattr(cascade, "route_lang", lambda text, conf, lang, crop: "eng+hin")
+    assert escalate(crop(value=7), "eng", ccfg(routing=True, binarize=False)) == ("नमस्ते", 80, "eng+hin")
+    monkeypatch.setattr(cascade, "route_lang", lambda text, conf, lang, crop: None)
+    assert escalate(crop(value=7), "eng", ccfg(routing=True, binarize=False)) == ("?", 30, "eng")
+
+def test_crnn_fast_pass_labels_language(ocr, monkeypatch):
+    class FakeCRNN:
+        def recognize(self, crops):
+            return [("abc", 99)] * len(crops)
+    monkeypatch.setattr(cascade, "get_crnn_recognizer", lambda: FakeCRNN())
+    fake = ocr(lambda tag, psm, binarized, lang: ("x", 0))
+    assert cascade_recognize([crop(), crop()], lang="eng", ccfg=ccfg(fast="crnn")) == [("abc", 99, "crnn", "fast")] * 2
+    assert not fake.calls
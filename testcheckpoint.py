@@ -0,0 +1,81 @@
+import os
+import pytest
+import torch
+import src.checkpoint as checkpoint
+from src.checkpoint import CheckpointManager
+from src.utils import Tokenizer, load_checkpoint
+
+def model_and_optimizer(seed=0):
+    torch.manual_seed(seed)
+    model = torch.nn.Sequential(torch.nn.Linear(4, 8), torch.nn.ReLU(), torch.nn.Linear(8, 3))
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-2)
+    model(torch.randn(5, 4)).sum().backward()
+    optimizer.step()
+    return model, optimizer
+
+@pytest.mark.parametrize("async_save", [True, False])
+def test_rotation_and_best(tmp_path, async_save):
+    out = str(tmp_path)
+    model, opt = model_and_optimizer()
+    ckpts = CheckpointManager(out, keep_last=2, async_save=async_save)
+    for epoch, cer in enumerate([0.5, 0.3, 0.4, 0.35, 0.6], start=1):
+        ckpts.save(epoch, model, opt, Tokenizer("abc"), metric=cer)
+    ckpts.close()
+    assert ckpts.epochs_on_disk() == [4, 5]
+    assert sorted(os.listdir(out)) == ["best.pth", "ckpt_epoch_4.pth", "ckpt_epoch_5.pth"]
+    best = load_checkpoint(os.path.join(out, "best.pth"))
+    assert best["epoch"] == 2 and best["val_cer"] == 0.3
+    last = load_checkpoint(ckpts.latest())
+    assert last["best_cer"] == 0.3 and last["tokenizer"]["chars"] == "abc"
+
+def test_async_save_snapshots_weights(tmp_path):
+    model, opt = model_and_optimizer()
+    before = {k: v.clone() for k, v in model.state_dict().items()}
+    ckpts = CheckpointManager(str(tmp_path))
+    ckpts.save(1, model, opt)
+    with torch.no_grad():
+        for p in model.parameters():
+            p.add_(1.0)  # training goes on while the writer thread runs
+    ckpts.close()
+    saved = load_checkpoint(ckpts.path_for(1))["model_state"]
+    assert all(torch.equal(saved[k], before[k]) for k in before)
+
+def test_resume_restores_model_optimizer_and_best(tmp_path):
+    model, opt = model_and_optimizer(seed=0)
+    ckpts = CheckpointManager(str(tmp_path), async_save=False)
+    ckpts.save(3, model, opt, metric=0.25, extra={'arch': 'crnn'})
+    fresh, fresh_opt = model_and_optimizer(seed=1)
+    resumed = CheckpointManager(str(tmp_path), async_save=False)
+    assert resumed.resume(fresh, fresh_opt) == 4
+    assert resumed.best_metric == 0.25
+    assert all(torch.equal(a, b) for a, b in zip(fresh.state_dict().values(), model.state_dict().values()))
+    assert fresh_opt.state_dict()["state"][0]["step"] == opt.state_dict()["state"][0]["step"]
+
+def test_resume_without_checkpoint(tmp_path):
+    model, opt = model_and_optimizer()
+    assert CheckpointManager(str(tmp_path), async_save=False).resume(model, opt) == 1
+
+def test_weights_only_resume_starts_optimizer_fresh(tmp_path, caplog):
+    model, opt = model_and_optimizer()
+    ckpts = CheckpointManager(str(tmp_path), weights_only=True, async_save=False)
+    ckpts.save(1, model, opt)
+    assert "optim_state" not in load_checkpoint(ckpts.path_for(1))
+    fresh, fresh_opt = model_and_optimizer(seed=1)
+    assert ckpts.resume(fresh, fresh_opt) == 2
+    assert "no optimizer state" in caplog.text
+    assert fresh_opt.state_dict()["state"][0]["step"] == 1  # untouched
+
+def test_failed_background_write_is_raised(tmp_path, monkeypatch):
+    def broken(state, path):
+        raise OSError("disk full")
+    monkeypatch.setattr(checkpoint, "atomic_save", broken)
+    model, opt = model_and_optimizer()
+    ckpts = CheckpointManager(str(tmp_path))
+    ckpts.save(1, model, opt)
+    with pytest.raises(RuntimeError, match="checkpoint write failed"):
+        ckpts.wait()
+    with pytest.raises(RuntimeError):
+        ckpts.save(2, model, opt)
+    with pytest.raises(RuntimeError):
+        ckpts.close()
+    assert not [n for n in os.listdir(tmp_path) if ".tmp." in n]
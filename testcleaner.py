@@ -0,0 +1,82 @@
+import random
+import cv2
+import numpy as np
+import src.cleaner as cleaner
+from src.cleaner import (final_clean, final_clean_many, final_clean_reference, estimate_skew, deskew_image, rotate_image,
+                         unskew_box)
+import pytest
+
+SAMPLES = [
+    None, "", "   ", "\t\r\n", "  Ravi  Kumar\t", "Mob: +91 98O76 543210 ,",
+    "“Acme” Pvt. Ltd .", "‘quoted’", "ravi@acme.c0m", "a0O5", "10O0O1",
+    "No. 12 , MG Road\r\nChennai - 6OOO01", "\x0cSenior Manager ;", "a \n b", "x​0​y",
+]
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_final_clean_matches_reference(text):
+    assert final_clean(text) == final_clean_reference(text)
+
+def test_final_clean_random_equivalence():
+    rng = random.Random(0)
+    alphabet = list("O0o19aA \t\r\n ‘’“”,.;:!?%-\x0c​\x00é५")
+    texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))) for _ in range(20000)]
+    expected = [final_clean_reference(t) for t in texts]
+    assert [final_clean(t) for t in texts] == expected
+    assert final_clean_many(texts) == expected
+
+def text_page(w=900, h=600):
+    page = np.full((h, w, 3), 255, np.uint8)
+    for i, line in enumerate(["Ravi Kumar", "Managing Director", "Acme Pvt Ltd", "ravi@acme.com", "+91 98765 43210"]):
+        cv2.putText(page, line, (60, 90 + 90 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (0, 0, 0), 3)
+    return page
+
+@pytest.mark.parametrize("skew", [-7.0, -2.5, 1.5, 4.0, 12.0])
+def test_estimate_skew_recovers_rotation(skew):
+    angle, vertical, confidence = estimate_skew(rotate_image(text_page(), skew))
+    assert abs(angle + skew) <= 0.3 and not vertical and confidence > 1.5
+
+def test_deskew_straightens_page():
+    cfg = {'preprocess': {}}
+    skewed = rotate_image(text_page(), 6.0)
+    fixed, info = deskew_image(skewed, cfg)
+    assert abs(info["angle"] + 6.0) <= 0.3 and info["osd"] is None
+    assert abs(estimate_skew(fixed)[0]) <= 0.3
+    assert info["size"] == [fixed.shape[1], fixed.shape[0]]
+    # the recorded affine takes input pixels onto the deskewed page, and unskew_box undoes it
+    M = np.asarray(info["matrix"])
+    h, w = skewed.shape[:2]
+    x, y = M @ [w / 2.0, h / 2.0, 1.0]
+    assert abs(x - fixed.shape[1] / 2.0) < 1 and abs(y - fixed.shape[0] / 2.0) < 1
+    x0, y0, x1, y1 = unskew_box([x - 5, y - 5, x + 5, y + 5], info)
+    assert x0 <= w / 2.0 <= x1 and y0 <= h / 2.0 <= y1 and x1 - x0 < 16
+
+def test_deskew_leaves_straight_and_blank_pages_alone():
+    page = text_page()
+    out, info = deskew_image(page, {'preprocess': {}})
+    assert out is page and info["angle"] == 0.0 and "matrix" not in info
+    blank = np.full((300, 400, 3), 255, np.uint8)
+    assert deskew_image(blank)[0] is blank and estimate_skew(blank) == (0.0, False, 0.0)
+
+def test_vertical_page_asks_osd(monkeypatch):
+    calls = []
+    def fake_osd(img):
+        calls.append(img.shape)
+        return 90
+    monkeypatch.setattr(cleaner, "osd_rotation", fake_osd)
+    page = cv2.rotate(text_page(), cv2.ROTATE_90_COUNTERCLOCKWISE)
+    assert estimate_skew(page)[1]
+    out, info = deskew_image(page, {'preprocess': {'deskew_osd': True}})
+    assert calls and info["osd"] == 90 and info["angle"] == -90.0
+    assert out.shape[:2] == page.shape[1::-1] and not estimate_skew(out)[1]
+    # a clearly horizontal page never pays for OSD
+    calls.clear()
+    deskew_image(rotate_image(text_page(), 3.0), {'preprocess': {'deskew_osd': True}})
+    assert not calls
+
+def test_osd_failure_falls_back_to_profile(monkeypatch, caplog):
+    def broken(img):
+        raise RuntimeError("no tesseract")
+    monkeypatch.setattr(cleaner, "osd_rotation", broken)
+    _, info = deskew_image(rotate_image(text_page(), 4.0), {'preprocess': {'deskew_osd': True, 'deskew_min_confidence': 1e9}})
+    assert info["osd"] is None and abs(info["angle"] + 4.0) <= 0.3
+    assert "OSD failed" in caplog.text
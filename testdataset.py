@@ -0,0 +1,110 @@
+import os
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from src.dataset import (OCRDataset, CachedOCRDataset, build_dataset_cache, BucketBatchSampler, TrimCollate,
+                         WithWidths, ocr_collate)
+from src.train import build_loader
+from src.utils import Tokenizer
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+WORDS = ['acme', 'ravi kumar', 'sales', 'x', 'pune 411001', 'mumbai', 'ceo', 'managing director']
+
+def make_dataset(root, words=WORDS):
+    os.makedirs(root, exist_ok=True)
+    rows = []
+    for i, word in enumerate(words):
+        (tw, th), base = cv2.getTextSize(word, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+        img = np.full((th + base + 10, tw + 10), 255, np.uint8)
+        cv2.putText(img, word, (5, th + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.imwrite(os.path.join(root, f"{i}.png"), img)
+        rows.append({"image_path": f"{i}.png", "transcription": word})
+    csv = os.path.join(root, "ann.csv")
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    return csv
+
+@pytest.mark.parametrize("dtype, atol", [("float32", 0.0), ("float16", 1e-3)])
+def test_cache_matches_decoded_dataset(tmp_path, dtype, atol):
+    root = str(tmp_path / "data")
+    csv = make_dataset(root)
+    tok = Tokenizer(CHARS)
+    cache = build_dataset_cache(csv, root, tok, str(tmp_path / "cache"), dtype=dtype)
+    src, cached = OCRDataset(csv, root, tok), CachedOCRDataset(cache)
+    assert len(cached) == len(src) == len(WORDS)
+    assert cached.meta["chars"] == CHARS and cached.meta["dtype"] == dtype
+    for i in range(len(src)):
+        (img_a, lab_a), (img_b, lab_b) = src[i], cached[i]
+        assert img_b.dtype == torch.float32 and img_b.shape == img_a.shape == (1, 32, 320)
+        assert torch.allclose(img_a, img_b, atol=atol)
+        assert torch.equal(lab_a, lab_b)
+    assert cached.label_lengths().tolist() == [len(tok.encode(w)) for w in WORDS]
+    np.testing.assert_array_equal(cached.sample_widths(), src.sample_widths())
+
+def test_cached_items_are_writable_views(tmp_path):
+    # copy-on-write mmap: a transform writing into an item must not touch the cache on disk
+    root = str(tmp_path / "data")
+    cache = build_dataset_cache(make_dataset(root), root, Tokenizer(CHARS), str(tmp_path / "cache"))
+    img, _ = CachedOCRDataset(cache)[0]
+    img.zero_()
+    assert CachedOCRDataset(cache)[0][0].max() > 0
+
+def test_bucket_sampler_covers_every_sample_once():
+    widths = np.random.default_rng(0).integers(8, 321, size=103)
+    sampler = BucketBatchSampler(widths, batch_size=8, bucket_step=32)
+    for _ in range(2):
+        batches = list(sampler)
+        assert len(batches) == len(sampler)
+        assert sorted(i for b in batches for i in b) == list(range(103))
+        for b in batches:
+            assert 1 <= len(b) <= 8
+            assert len({(int(widths[i]) + 31) // 32 for i in b}) == 1  # one bucket per batch
+
+def test_bucket_sampler_reshuffles_per_epoch_and_drop_last():
+    widths = np.full(40, 100)
+    sampler = BucketBatchSampler(widths, batch_size=6, bucket_step=32, seed=1)
+    assert list(sampler) != list(sampler)
+    sampler = BucketBatchSampler(widths, batch_size=6, drop_last=True)
+    batches = list(sampler)
+    assert len(batches) == len(sampler) == 6 and all(len(b) == 6 for b in batches)
+    assert list(BucketBatchSampler(widths, 6, shuffle=False)) == [list(range(k, min(40, k + 6))) for k in range(0, 40, 6)]
+
+def test_trim_collate_cuts_shared_padding():
+    def item(used):
+        img = torch.ones(1, 32, 320)
+        img[..., :used] = 0.2
+        return img, torch.tensor([2, 3])
+    images, labels, lengths, widths = TrimCollate(32)([item(40), item(70)])
+    assert images.shape == (2, 1, 32, 96)
+    assert labels.tolist() == [2, 3, 2, 3] and lengths.tolist() == [2, 2]
+    assert widths.tolist() == [96, 96]  # items without widths count as fully used
+    assert TrimCollate(32)([item(0)])[0].shape[-1] == 32
+    # true widths pass through, clamped to the trimmed batch
+    _, _, _, widths = TrimCollate(32)([item(40) + (40,), item(70) + (300,)])
+    assert widths.tolist() == [40, 96]
+
+def test_with_widths_items(tmp_path):
+    root = str(tmp_path / "data")
+    ds = OCRDataset(make_dataset(root), root, Tokenizer(CHARS))
+    wrapped = WithWidths(ds)
+    assert len(wrapped) == len(ds)
+    np.testing.assert_array_equal(wrapped.sample_widths(), ds.sample_widths())
+    images, labels, lengths, widths = ocr_collate([wrapped[i] for i in range(3)])
+    assert widths.tolist() == ds.sample_widths()[:3].tolist()
+    assert torch.equal(images[0], ds[0][0])
+
+def test_bucketed_loader_batches(tmp_path):
+    root = str(tmp_path / "data")
+    ds = OCRDataset(make_dataset(root), root, Tokenizer(CHARS))
+    loader = build_loader(ds, batch_size=3, bucket_step=32)
+    seen = 0
+    expected = sorted(ds.sample_widths().tolist())
+    got = []
+    for images, labels, lengths, widths in loader:
+        assert images.shape[-1] % 32 == 0 and images.shape[-1] <= 320
+        assert int(lengths.sum()) == labels.numel()
+        assert int(widths.max()) <= images.shape[-1]
+        got.extend(widths.tolist())
+        seen += images.size(0)
+    assert seen == len(WORDS) and sorted(got) == expected
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from src.decoding import ctc_greedy_decode, ctc_beam_decode, LexiconScorer, softmax
+from src.utils import Tokenizer
+
+TOK = Tokenizer("abco")  # 0 pad, 1 blank, 2 a, 3 b, 4 c, 5 o
+C = len(TOK.idx2char)
+
+def frames(*rows):
+    # rows of {char or '-' (blank): prob}; the rest of each frame's mass is spread evenly -> T x 1 x C
+    out = np.zeros((len(rows), 1, C), np.float32)
+    for t, row in enumerate(rows):
+        if isinstance(row, str):
+            row = {row: 0.9}
+        rest = (1.0 - sum(row.values())) / (C - len(row))
+        out[t, 0, :] = rest
+        for ch, p in row.items():
+            out[t, 0, TOK.blank_idx if ch == '-' else TOK.char2idx[ch]] = p
+    return out
+
+def reference_greedy(probs_b, tokenizer):
+    # per-sample loop: collapse repeats, drop blanks, max prob per run
+    text, confs, prev = [], [], None
+    for t in range(probs_b.shape[0]):
+        k = int(probs_b[t].argmax())
+        p = float(probs_b[t, k])
+        if k != prev and k not in (tokenizer.blank_idx, tokenizer.pad_idx):
+            text.append(tokenizer.idx2char[k])
+            confs.append(p)
+        elif k == prev and k not in (tokenizer.blank_idx, tokenizer.pad_idx):
+            confs[-1] = max(confs[-1], p)
+        prev = k
+    return ''.join(text), confs
+
+def test_greedy_collapses_runs_and_blanks():
+    dec = ctc_greedy_decode(frames('c', 'c', '-', 'a', '-', 'a', 'b', 'b'), TOK)[0]
+    assert dec.text == "caab"
+    assert dec.char_confidences == [0.9, 0.9, 0.9, 0.9]
+    assert dec.confidence == 90
+
+def test_greedy_char_confidence_is_max_of_run():
+    dec = ctc_greedy_decode(frames({'a': 0.6}, {'a': 0.8}, '-'), TOK)[0]
+    assert dec.text == "a" and dec.char_confidences == [0.8]
+
+def test_greedy_empty_and_all_blank():
+    assert ctc_greedy_decode(frames('-', '-'), TOK)[0] == ("", [], -1)
+    assert ctc_greedy_decode(np.zeros((0, 2, C), np.float32), TOK) == [("", [], -1)] * 2
+
+def test_greedy_batch_matches_reference():
+    rng = np.random.default_rng(0)
+    probs = softmax(rng.normal(0, 2, size=(40, 16, C)), axis=2)
+    lengths = rng.integers(1, 41, size=16)
+    batch = ctc_greedy_decode(probs, TOK, lengths=lengths)
+    for b in range(16):
+        text, confs = reference_greedy(probs[:lengths[b], b], TOK)
+        assert batch[b].text == text
+        assert batch[b].char_confidences == pytest.approx(confs, abs=1e-4)
+
+def test_greedy_lengths_mask_padding():
+    probs = np.concatenate([frames('a', '-'), frames('b', 'b')], axis=0)  # steps 2-3 are padding
+    assert ctc_greedy_decode(probs, TOK, lengths=[2])[0].text == "a"
+    assert ctc_greedy_decode(probs, TOK)[0].text == "ab"
+
+def test_beam_equals_greedy_on_peaked_frames():
+    probs = frames('c', 'o', 'o', '-', 'b')
+    assert ctc_beam_decode(probs, TOK)[0].text == ctc_greedy_decode(probs, TOK)[0].text == "cob"
+
+def test_beam_sums_over_alignments():
+    # best path is "--" (0.36) but "a" has 0.4*0.6 + 0.6*0.4 + 0.4*0.4 = 0.64
+    probs = frames({'-': 0.6, 'a': 0.4}, {'-': 0.6, 'a': 0.4})
+    assert ctc_greedy_decode(probs, TOK)[0].text == ""
+    dec = ctc_beam_decode(probs, TOK, beam_width=4)[0]
+    assert dec.text == "a" and dec.char_confidences == [pytest.approx(0.4)]
+
+def test_beam_lengths_and_batch():
+    probs = np.concatenate([frames('a', 'b', 'c'), frames('c', 'b', 'a')], axis=1)
+    assert [d.text for d in ctc_beam_decode(probs, TOK, lengths=[3, 2])] == ["abc", "cb"]
+
+def test_beam_survives_frames_below_prune():
+    # large charset, flat frames: no class reaches `prune`, yet every frame still expands its argmax
+    tok = Tokenizer("".join(chr(c) for c in range(0x4e00, 0x4e00 + 3000)))
+    n = len(tok.idx2char)
+    probs = np.full((6, 2, n), 1.0 / n, np.float32)
+    probs[2, 0, tok.char2idx["\u4e01"]] = 3.0 / n  # a faint peak on one frame of sample 0
+    probs /= probs.sum(2, keepdims=True)
+    decoded = ctc_beam_decode(probs, tok, lengths=[6, 4], beam_width=4, prune=1e-3)
+    assert len(decoded) == 2
+    assert decoded[0].text == "\u4e01" and decoded[0].text == ctc_greedy_decode(probs, tok)[0].text
+    # ties everywhere: the blank wins the argmax, an empty read instead of an exception
+    assert decoded[1] == ("", [], -1)
+
+def test_lexicon_breaks_ties_toward_known_words():
+    probs = frames('c', {'o': 0.5, 'a': 0.45}, 'b')
+    assert ctc_beam_decode(probs, TOK)[0].text == "cob"
+    assert ctc_beam_decode(probs, TOK, scorer=LexiconScorer(["cab"]))[0].text == "cab"
+
+def test_lexicon_scores():
+    scorer = LexiconScorer(["Acme", "sales"], word_bonus=2.0, prefix_bonus=0.5, pattern_bonus=1.0)
+    assert scorer.score("ACME") == 2.0
+    assert scorer.score("the sal") == 0.5
+    assert scorer.score("ravi@acme.co") == 1.0
+    assert scorer.score("+91-98765") == 1.0
+    assert scorer.score("zzz") == 0.0
+    assert scorer.score("") == 0.0
+
+def test_lexicon_from_file(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("acme  # company\n\nsales\n", encoding="utf-8")
+    scorer = LexiconScorer.from_file(str(path))
+    assert scorer.words == {"acme", "sales"}
@@ -0,0 +1,95 @@
+import random
+import cv2
+import numpy as np
+import pytest
+from src.dedup import BKTree, NearDuplicateIndex, hamming, phash, dhash
+
+def card(name, phone="+91 98765 43210", noise_seed=None):
+    # one company template, different people
+    img = np.full((600, 1000, 3), 250, np.uint8)
+    cv2.rectangle(img, (0, 0), (1000, 80), (120, 60, 20), -1)
+    cv2.putText(img, "ACME PVT LTD", (40, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (255, 255, 255), 3)
+    cv2.putText(img, name, (40, 220), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 0, 0), 2)
+    cv2.putText(img, phone, (40, 450), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    if noise_seed is not None:
+        img = np.clip(img + np.random.default_rng(noise_seed).normal(0, 4, img.shape), 0, 255).astype(np.uint8)
+    return img
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+    for q in hashes[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_dist in (0, 8, 24):
+            expected = sorted(i for i, h in enumerate(hashes) if hamming(q, h) <= max_dist)
+            assert sorted(v for _, _, v in tree.search(q, max_dist)) == expected
+
+def test_template_cards_share_perceptual_hash():
+    # the reason a perceptual hit alone must never be trusted
+    a, b = card("Ravi Kumar"), card("Anil Kumar")
+    assert hamming(phash(a), phash(b)) <= 10
+    assert hamming(dhash(a), dhash(b)) <= 10
+
+@pytest.mark.parametrize("method", ["exact", "phash", "dhash"])
+def test_different_people_on_one_template_do_not_match(method):
+    index = NearDuplicateIndex(method=method)
+    index.add(index.fingerprint(card("Ravi Kumar")), "ravi")
+    assert index.lookup(index.fingerprint(card("Anil Kumar"))) is None
+    assert index.lookup(index.fingerprint(card("Ravi Kumar", phone="+91 98765 43218"))) is None
+    assert index.lookup(index.fingerprint(card("Ravi Kumar"))) == "ravi"
+
+def test_perceptual_mode_accepts_reencoded_copy():
+    index = NearDuplicateIndex(method="phash")
+    original = card("Ravi Kumar")
+    index.add(index.fingerprint(original), "ravi")
+    _, enc = cv2.imencode(".jpg", original, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    assert index.lookup(index.fingerprint(cv2.imdecode(enc, cv2.IMREAD_COLOR))) == "ravi"
+    assert index.lookup(index.fingerprint(card("Ravi Kumar", noise_seed=1))) == "ravi"
+    # the exact mode only reuses identical pixels
+    exact = NearDuplicateIndex(method="exact")
+    exact.add(exact.fingerprint(original), "ravi")
+    assert exact.lookup(exact.fingerprint(cv2.imdecode(enc, cv2.IMREAD_COLOR))) is None
+
+def test_scopes_are_isolated():
+    index = NearDuplicateIndex()
+    img = card("Ravi Kumar")
+    index.add(index.fingerprint(img), "client a", scope="a")
+    assert index.lookup(index.fingerprint(img), scope="b") is None
+    assert index.lookup(index.fingerprint(img), scope="a") == "client a"
+
+def test_api_reuse_is_per_client_and_respects_fields(monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from src import api
+    calls = []
+
+    async def fake_pipeline(img, image_name, out_dir, fields=None):
+        calls.append(fields)
+        return ([{"box": [10, 10, 300, 40], "text_clean": "Ravi Kumar", "confidence": 90},
+                 {"box": [10, 60, 300, 90], "text_clean": "ravi@acme.com", "confidence": 90}],
+                {"deskew": {"angle": 2.0, "matrix": [[1, 0, 0], [0, 1, 0]], "size": [400, 200]}})
+
+    monkeypatch.setattr(api, "run_pipeline", fake_pipeline)
+    monkeypatch.setattr(api, "DEDUP", NearDuplicateIndex())
+    _, png = cv2.imencode(".png", card("Ravi Kumar"))
+    client = TestClient(api.app)
+
+    def post(client_id=None, fields=None):
+        headers = {"X-Client-Id": client_id} if client_id else {}
+        url = "/ocr/file" + (f"?fields={fields}" if fields else "")
+        r = client.post(url, files={"file": ("c.png", png.tobytes(), "image/png")}, headers=headers)
+        assert r.status_code == 200
+        return r.json()
+
+    first = post("a")
+    assert "duplicate_of" not in first and first["deskew"]["angle"] == 2.0
+    again = post("a")
+    assert "duplicate_of" in again and again["deskew"] == first["deskew"]
+    assert "duplicate_of" not in post("b")  # another client never sees a's result
+    assert "duplicate_of" not in post()  # no key, no reuse
+    hit = post("a", fields="email")
+    assert "duplicate_of" in hit and set(hit["parsed"]) >= {"email"} and "name" not in hit["parsed"]
+    assert len(calls) == 3
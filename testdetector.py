@@ -0,0 +1,157 @@
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+import src.detector as detector
+from src.detector import (find_text_region, get_east_net, plan_tiles, round32, nms_boxes, decode_predictions,
+                          east_detect_tiled, remove_nested_boxes, merge_boxes_to_lines, postprocess_boxes)
+
+def text_image(text, size=(400, 200), scale=2.0, thickness=3, org=None):
+    w, h = size
+    img = np.full((h, w, 3), 255, np.uint8)
+    cv2.putText(img, text, org or (10, h // 2), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness)
+    return img
+
+def blank_scan(size=(1240, 1754), seed=0):
+    # off-white paper with sensor noise, uneven lighting and a few dust specks
+    rng = np.random.default_rng(seed)
+    w, h = size
+    page = 238 + np.linspace(-8, 8, w, dtype=np.float32)[None, :] + rng.normal(0, 3, (h, w)).astype(np.float32)
+    for _ in range(12):
+        cv2.circle(page, (int(rng.integers(0, w)), int(rng.integers(0, h))), 1, 178, -1)
+    return cv2.cvtColor(np.clip(page, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+@pytest.mark.parametrize("img", [
+    text_image("TEST 123"),
+    text_image("CEO", size=(600, 350), scale=0.8, thickness=2),
+    text_image("Ravi Kumar", size=(600, 350), scale=0.8, thickness=2),
+    text_image("ravi@acme.com", size=(1000, 600), scale=0.7, thickness=1, org=(300, 300)),
+    text_image("CEO", size=(1240, 1754), scale=0.6, thickness=1, org=(600, 900)),
+], ids=["fixture", "one-word", "one-line", "email", "tiny-word-on-page"])
+def test_sparse_pages_are_not_blank(img):
+    region = find_text_region(img)
+    assert region is not None
+    x0, y0, x1, y1 = region
+    ys, xs = np.nonzero(img[:, :, 0] < 128)
+    assert x0 <= xs.min() and y0 <= ys.min() and x1 >= xs.max() and y1 >= ys.max()
+
+@pytest.mark.parametrize("seed", range(4))
+def test_blank_scans_are_skipped(seed):
+    assert find_text_region(blank_scan(seed=seed)) is None
+    assert find_text_region(blank_scan(size=(600, 350), seed=seed)) is None
+
+def test_region_crops_to_text():
+    img = text_image("Ravi Kumar", size=(1200, 800), scale=1.0, thickness=2, org=(700, 600))
+    x0, y0, x1, y1 = find_text_region(img)
+    assert x0 > 600 and y0 > 500
+
+def test_east_net_read_once_under_concurrency(monkeypatch):
+    reads = []
+    def slow_read(path):
+        reads.append(path)
+        time.sleep(0.05)
+        return object()
+    monkeypatch.setattr(detector, "_EAST_NETS", {})
+    monkeypatch.setattr(detector.cv2.dnn, "readNet", slow_read)
+    nets = []
+    threads = [threading.Thread(target=lambda: nets.append(get_east_net("east.pb"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert reads == ["east.pb"]
+    assert len(nets) == 8 and all(n is nets[0] for n in nets)
+
+@pytest.mark.parametrize("length, tile, overlap", [(100, 640, 96), (640, 640, 96), (1000, 640, 96), (2560, 640, 96),
+                                                   (3000, 512, 200)])
+def test_plan_tiles_cover_axis_with_full_tiles(length, tile, overlap):
+    starts = plan_tiles(length, tile, overlap)
+    if length <= tile:
+        assert starts == [0]
+        return
+    assert starts[0] == 0 and starts[-1] + tile == length
+    assert all(0 <= s <= length - tile for s in starts)
+    # consecutive tiles overlap by at least `overlap`, so text on a seam is whole in one tile
+    assert all(b - a <= tile - overlap for a, b in zip(starts, starts[1:]))
+
+def test_round32():
+    assert [round32(v) for v in (1, 31, 48, 50, 640, 655)] == [32, 32, 64, 64, 640, 640]
+
+def test_nms_keeps_the_strongest_of_overlapping_boxes():
+    boxes = [(0, 0, 100, 20), (2, 1, 101, 21), (200, 0, 300, 20)]
+    kept, confs = nms_boxes(boxes, [0.7, 0.9, 0.8])
+    assert sorted(kept) == [(2, 1, 101, 21), (200, 0, 300, 20)] and sorted(confs) == [0.8, 0.9]
+    assert nms_boxes([], []) == ([], [])
+
+class FakeEAST:
+    """
+    Stand-in for the EAST cv2.dnn.Net: every 4x4 cell of a tile that contains dark pixels scores
+    1.0 with a 2 px box around the cell origin (angle 0), so boxes trace the dark pixels.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def setInput(self, blob):
+        self.blob = blob
+
+    def forward(self, names):
+        n, _, h, w = self.blob.shape
+        self.batches.append((n, h, w))
+        dark = (self.blob + np.array([123.68, 116.78, 103.94], np.float32).reshape(1, 3, 1, 1)).mean(1) < 128
+        cells = dark.reshape(n, h // 4, 4, w // 4, 4).any(axis=(2, 4))
+        scores = cells[:, None].astype(np.float32)
+        geometry = np.zeros((n, 5, h // 4, w // 4), np.float32)
+        geometry[:, :4] = 2.0
+        return scores, geometry
+
+def test_decode_predictions_maps_cells_to_boxes():
+    net = FakeEAST()
+    blob = np.full((1, 3, 32, 32), 255.0, np.float32) - 120.0
+    blob[0, :, 8:12, 16:20] = -120.0
+    net.setInput(blob)
+    rects, confs = decode_predictions(*net.forward(None))
+    assert rects == [(14, 6, 18, 10)] and confs == [1.0]
+
+@pytest.mark.parametrize("size, rect", [((3000, 1000), (1400, 300, 1900, 380)),   # wide page, downscaled
+                                        ((900, 1400), (100, 600, 800, 660)),      # crosses tile seams
+                                        ((200, 120), (20, 30, 150, 70))])         # single small tile
+def test_tiled_east_maps_tile_boxes_to_image(size, rect):
+    w, h = size
+    img = np.full((h, w, 3), 255, np.uint8)
+    x0, y0, x1, y1 = rect
+    img[y0:y1, x0:x1] = 0
+    net = FakeEAST()
+    boxes = east_detect_tiled(img, net, max_side=2560, tile=640, overlap=96)
+    n, th, tw = net.batches[0]
+    assert len(net.batches) == 1  # all tiles in one batched forward
+    assert th % 32 == 0 and tw % 32 == 0 and th <= 640 and tw <= 640
+    arr = np.array(boxes)
+    scale = max(1.0, max(w, h) / 2560.0)
+    tol = 8 * scale
+    assert abs(arr[:, 0].min() - x0) <= tol and abs(arr[:, 1].min() - y0) <= tol
+    assert abs(arr[:, 2].max() - x1) <= tol and abs(arr[:, 3].max() - y1) <= tol
+    assert arr[:, 2].max() < w and arr[:, 3].max() < h
+
+def test_remove_nested_boxes():
+    outer, inner, dup, partial = (0, 0, 200, 40), (10, 5, 60, 35), (0, 0, 200, 40), (150, 20, 300, 60)
+    assert remove_nested_boxes([inner, outer, dup, partial]) == [outer, partial]
+    assert remove_nested_boxes([]) == []
+    # a fragment only half inside is kept unless the threshold says otherwise
+    half = (180, 0, 220, 40)
+    assert remove_nested_boxes([outer, half]) == [outer, half]
+    assert remove_nested_boxes([outer, half], overlap=0.5) == [outer]
+
+def test_merge_boxes_to_lines():
+    words = [(100, 12, 160, 32), (10, 10, 90, 30), (170, 11, 230, 31),   # one line, unsorted
+             (10, 60, 80, 80), (400, 60, 470, 80)]                       # same baseline, far apart
+    assert merge_boxes_to_lines(words) == [(10, 10, 230, 32), (10, 60, 80, 80), (400, 60, 470, 80)]
+    # a tall gap tolerance joins the far word; little vertical overlap never joins
+    assert merge_boxes_to_lines(words[3:], gap=20.0) == [(10, 60, 470, 80)]
+    assert merge_boxes_to_lines([(0, 0, 50, 20), (55, 15, 100, 35)]) == [(0, 0, 50, 20), (55, 15, 100, 35)]
+
+def test_postprocess_boxes():
+    words = [(10, 10, 90, 30), (95, 10, 150, 30), (20, 12, 40, 28), (10, 60, 150, 80)]
+    assert postprocess_boxes(words, {'merge_lines': True}) == [(10, 10, 150, 30), (10, 60, 150, 80)]
+    assert postprocess_boxes(words, {'merge_lines': False}) is words
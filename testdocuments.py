@@ -0,0 +1,128 @@
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+import pytest
+from PIL import Image
+import src.documents as documents
+from src.documents import iter_pages, iter_document_results, process_document, is_document
+from src.parser import merge_parsed
+
+def page_parsed(**kw):
+    parsed = {"name": None, "designation": None, "company": None, "mobile": [], "email": [],
+              "website": [], "social": {}, "extras": {}, "confidence": None, "raw_text": "",
+              "raw_lines": [], "notes": []}
+    parsed.update(kw)
+    parsed["notes"] = [f"{f}_not_detected" for f in ("name", "email", "mobile") if not parsed[f]]
+    return parsed
+
+def test_merge_parsed_recomputes_notes():
+    p1 = page_parsed(name="Ravi Kumar", mobile=["+919876543210"], confidence=80.0,
+                     raw_text="Ravi Kumar\n+91 98765 43210", raw_lines=["Ravi Kumar", "+91 98765 43210"])
+    p2 = page_parsed(email=["ravi@acme.com"], mobile=["+919876543210", "+912224567890"], confidence=70.0,
+                     raw_text="ravi@acme.com\nRavi Kumar", raw_lines=["ravi@acme.com", "Ravi Kumar"])
+    assert "email_not_detected" in p1["notes"] and "name_not_detected" in p2["notes"]
+    merged = merge_parsed([p1, p2])
+    assert merged["notes"] == []
+    assert merged["name"] == "Ravi Kumar"
+    assert merged["email"] == ["ravi@acme.com"]
+    assert merged["mobile"] == ["+919876543210", "+912224567890"]
+    assert merged["confidence"] == 75.0
+    # page by page, repeated lines kept, same content as raw_text
+    assert merged["raw_lines"] == ["Ravi Kumar", "+91 98765 43210", "ravi@acme.com", "Ravi Kumar"]
+    assert merged["raw_text"] == "Ravi Kumar\n+91 98765 43210\n\f\nravi@acme.com\nRavi Kumar"
+
+def test_merge_parsed_keeps_notes_for_fields_missing_everywhere():
+    merged = merge_parsed([page_parsed(name="A B"), page_parsed()])
+    assert merged["notes"] == ["email_not_detected", "mobile_not_detected"]
+    # field-filtered pages only carry their own fields and notes
+    merged = merge_parsed([{"email": [], "notes": ["email_not_detected"], "confidence": None}])
+    assert merged["notes"] == ["email_not_detected"]
+
+def test_merge_parsed_empty():
+    assert merge_parsed([]) == {"confidence": None}
+
+def make_pdf(path, n_pages):
+    pymupdf = pytest.importorskip("pymupdf")
+    doc = pymupdf.open()
+    for i in range(n_pages):
+        page = doc.new_page(width=300, height=200)
+        page.insert_text((30, 60), f"Page {i + 1}", fontsize=24)
+    doc.save(path)
+    doc.close()
+
+def test_iter_pages_pdf_is_lazy(tmp_path):
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path, 3)
+    pages = iter_pages(path, dpi=72)
+    page_no, img = next(pages)
+    assert page_no == 1 and img.dtype == np.uint8 and img.shape == (200, 300, 3)
+    assert [n for n, _ in pages] == [2, 3]
+
+def test_iter_pages_tiff_frames(tmp_path):
+    path = str(tmp_path / "scan.tif")
+    frames = [Image.new("RGB", (64, 48), (v, v, v)) for v in (0, 128, 255)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    got = list(iter_pages(path))
+    assert [n for n, _ in got] == [1, 2, 3]
+    assert [int(img[0, 0, 0]) for _, img in got] == [0, 128, 255]
+
+def fake_process_array(img, image_name, output_dir, **kw):
+    # pages finish out of order on the thread pool
+    time.sleep(random.uniform(0, 0.02))
+    return [{"box": [0, 0, 10, 10], "text_clean": image_name, "confidence": 90}]
+
+@pytest.mark.parametrize("workers", [0, 3])
+def test_document_results_in_page_order(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(documents, "process_array", fake_process_array)
+    path = str(tmp_path / "scan.tif")
+    frames = [Image.new("RGB", (32, 32)) for _ in range(9)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    pages = list(iter_document_results(path, str(tmp_path), workers=workers))
+    assert [p["page"] for p in pages] == list(range(1, 10))
+    assert [p["results"][0]["text_clean"] for p in pages] == [f"scan_p{i:03d}" for i in range(1, 10)]
+
+def test_process_document_writes_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "process_array", fake_process_array)
+    path = str(tmp_path / "doc.pdf")
+    make_pdf(path, 2)
+    out = str(tmp_path / "out")
+    summary = process_document(path, out, workers=0, dpi=72)
+    assert summary["pages"] == 2 and [p["page"] for p in summary["page_results"]] == [1, 2]
+    with open(os.path.join(out, "doc.document.json"), encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["parsed"]["raw_lines"] == ["doc_p001", "doc_p002"]
+
+def test_only_multipage_files_are_documents(tmp_path):
+    single, multi, png = str(tmp_path / "one.tif"), str(tmp_path / "many.tiff"), str(tmp_path / "card.png")
+    Image.new("RGB", (32, 32)).save(single)
+    frames = [Image.new("RGB", (32, 32)) for _ in range(2)]
+    frames[0].save(multi, save_all=True, append_images=frames[1:])
+    Image.new("RGB", (32, 32)).save(png)
+    assert not is_document(single) and is_document(multi) and not is_document(png)
+    pdf = str(tmp_path / "doc.pdf")
+    make_pdf(pdf, 1)
+    assert is_document(pdf)
+
+def test_main_keeps_single_frame_tiff_on_the_image_path(tmp_path, monkeypatch):
+    import src.main as main
+    inp, out = tmp_path / "in", tmp_path / "out"
+    inp.mkdir()
+    Image.new("RGB", (64, 48), (255, 255, 255)).save(inp / "card.tif")
+    frames = [Image.new("RGB", (64, 48)) for _ in range(3)]
+    frames[0].save(inp / "scan.tif", save_all=True, append_images=frames[1:])
+    seen = {"images": [], "documents": []}
+    monkeypatch.setattr(main, "process_array",
+                        lambda img, name, output_dir, **kw: seen["images"].append(name) or [])
+    monkeypatch.setattr(main, "process_document",
+                        lambda path, output_dir, workers=None: seen["documents"].append(os.path.basename(path)) or {"pages": 3})
+    monkeypatch.setattr(sys, "argv", ["main", "--input_dir", str(inp), "--output_dir", str(out)])
+    main.main()
+    assert seen == {"images": ["card.tif"], "documents": ["scan.tif"]}
+
+def test_pdf_without_pymupdf_explains_dependency(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pymupdf", None)
+    with pytest.raises(ImportError, match="pymupdf"):
+        next(iter_pages(str(tmp_path / "doc.pdf")))
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import torch
+from src.export import export_checkpoint
+from src.infer import CRNNRecognizer
+from src.model import build_model
+from src.runtime import make_recognizer
+from src.utils import save_checkpoint
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    # one random-weight checkpoint exported to every format
+    root = tmp_path_factory.mktemp("export")
+    torch.manual_seed(0)
+    model = build_model('crnn', len(CHARS) + 2)
+    ckpt = str(root / "crnn.pth")
+    save_checkpoint(ckpt, {'model_state': model.state_dict(), 'tokenizer': {'chars': CHARS}, 'arch': 'crnn'})
+    paths = {'torch': ckpt,
+             'onnx': export_checkpoint(ckpt, str(root / "crnn.onnx"), fmt='onnx'),
+             'torchscript': export_checkpoint(ckpt, str(root / "crnn_ts.pt"), fmt='torchscript')}
+    paths['opencv'] = paths['onnx']
+    return paths
+
+def crops(n=8, seed=0):
+    # 32 px tall, widths on the 32 px bucket grid: no padding, so masking cannot differ between backends
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, size=(32, 32 * int(rng.integers(1, 10))), dtype=np.uint8) for _ in range(n)]
+
+def test_meta_sidecar(exported):
+    with open(os.path.splitext(exported['onnx'])[0] + ".json", encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta == {"chars": CHARS, "target_h": 32, "max_w": 320, "format": "onnx"}
+
+@pytest.mark.parametrize("runtime", ["onnx", "torchscript", "opencv"])
+def test_backends_match_torch(exported, runtime):
+    if runtime == "onnx":
+        pytest.importorskip("onnxruntime")
+    batch = crops()
+    ref = CRNNRecognizer(exported['torch']).recognize_detailed(batch)
+    got = make_recognizer(runtime, exported[runtime]).recognize_detailed(batch)
+    assert [d.text for d in got] == [d.text for d in ref]
+    for g, r in zip(got, ref):
+        np.testing.assert_allclose(g.char_confidences, r.char_confidences, atol=1e-3)
+
+def test_onnx_backend_does_not_import_torch(exported):
+    pytest.importorskip("onnxruntime")
+    code = ("import sys, numpy as np\n"
+            "from src.runtime import make_recognizer\n"
+            f"rec = make_recognizer('onnx', {exported['onnx']!r})\n"
+            "rec.recognize([np.zeros((32, 64), np.uint8)])\n"
+            "print('torch' in sys.modules)\n")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+def test_unknown_format(exported, tmp_path):
+    with pytest.raises(ValueError):
+        export_checkpoint(exported['torch'], str(tmp_path / "x.bin"), fmt='tflite')
+
+def test_scripted_model_packs_padding(exported):
+    # off the bucket grid: padded columns inside a bucket must not change a crop's result
+    rng = np.random.default_rng(1)
+    batch = [rng.integers(0, 255, size=(32, int(w)), dtype=np.uint8) for w in (40, 50, 60, 90, 120, 200)]
+    rec = make_recognizer('torchscript', exported['torchscript'], bucket_step=128)
+    assert rec.supports_lengths
+    ref = CRNNRecognizer(exported['torch'], bucket_step=128).recognize_detailed(batch)
+    got = rec.recognize_detailed(batch)
+    assert [d.text for d in got] == [d.text for d in ref] == [rec.recognize_one(c)[0] for c in batch]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from src.infer import CRNNRecognizer, get_recognizer
+from src.runtime import BucketedRecognizer
+from src.model import build_model
+from src.utils import save_checkpoint
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+def crops(n=12, seed=0):
+    # gray crops from short words to long lines, 24-40 px tall
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        h = int(rng.integers(24, 40))
+        out.append(rng.integers(0, 255, size=(h, int(h * rng.uniform(1.0, 12.0))), dtype=np.uint8))
+    return out
+
+def recognizer(**kw):
+    torch.manual_seed(0)
+    return CRNNRecognizer(chars=CHARS, **kw)
+
+def test_batched_matches_one_by_one():
+    rec = recognizer(batch_size=4, bucket_step=32)
+    batch = crops()
+    # true widths are packed, so neighbours in a padded bucket do not change a crop's result
+    assert rec.recognize(batch) == [rec.recognize_one(c) for c in batch]
+
+def test_bucketing_keeps_input_order():
+    rec = recognizer(batch_size=3, bucket_step=32)
+    batch = crops()
+    assert rec.recognize(batch[::-1]) == rec.recognize(batch)[::-1]
+
+def test_plan_batches():
+    rec = recognizer(batch_size=2, bucket_step=32, max_w=320)
+    images = [Image.new('L', (w, 32)) for w in (20, 30, 40, 500, 33, 64)]
+    batches = rec.plan_batches(images)
+    assert batches == [(32, [0, 1]), (64, [2, 4]), (64, [5]), (320, [3])]
+    assert sorted(i for _, idxs in batches for i in idxs) == list(range(len(images)))
+
+def test_bgr_and_gray_crops_agree():
+    rec = recognizer()
+    gray = crops(3)
+    bgr = [np.repeat(c[:, :, None], 3, axis=2) for c in gray]
+    assert rec.recognize(bgr) == rec.recognize(gray)
+
+def test_chars_required_without_checkpoint():
+    with pytest.raises(ValueError):
+        CRNNRecognizer()
+
+def test_checkpoint_round_trip_and_cache(tmp_path):
+    model = build_model('lite_gru', len(CHARS) + 2)
+    path = str(tmp_path / "ckpt.pth")
+    save_checkpoint(path, {'model_state': model.state_dict(), 'tokenizer': {'chars': CHARS}, 'arch': 'lite_gru'})
+    rec = get_recognizer(path)
+    assert rec.tokenizer.chars == CHARS
+    assert type(rec.model).__name__ == 'LiteCRNN'
+    assert get_recognizer(path) is rec
+    assert get_recognizer(path, bucket_step=320) is not rec
+
+class PaddingShouter(BucketedRecognizer):
+    # stands in for a backend without widths support: every step reads 'a', padded steps read 'z'
+    def __init__(self, **kw):
+        super().__init__(CHARS, **kw)
+        self.seen = []
+
+    def forward(self, batch, widths=None):
+        self.seen.append((batch.shape[-1], list(widths)))
+        T = batch.shape[-1] // 2
+        probs = np.full((T, batch.shape[0], len(self.tokenizer.idx2char)), 1e-4, np.float32)
+        for b, w in enumerate(widths):
+            valid = max(1, w // 2)
+            probs[:valid, b, self.tokenizer.char2idx['a']] = 1.0
+            probs[valid:, b, self.tokenizer.char2idx['z']] = 1.0
+        return probs
+
+def test_every_backend_decodes_only_true_width():
+    rec = PaddingShouter(batch_size=8, bucket_step=64)
+    batch = [np.zeros((32, w), np.uint8) for w in (40, 64, 70, 100)]
+    assert [text for text, _ in rec.recognize(batch)] == ["a"] * 4
+    assert sorted(w for _, ws in rec.seen for w in ws) == [40, 64, 70, 100]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import torch
+from src.model import build_model, MODEL_ARCHS
+from src.export import export_onnx, export_torchscript
+
+def eager_model(arch='crnn', n_classes=37):
+    torch.manual_seed(0)
+    model = build_model(arch, n_classes).eval()
+    # non-trivial BatchNorm statistics so eval mode is not an identity
+    for m in model.modules():
+        if isinstance(m, torch.nn.BatchNorm2d):
+            m.running_mean.uniform_(-0.1, 0.1)
+            m.running_var.uniform_(0.5, 1.5)
+    return model
+
+def test_crnn_scripts():
+    model = eager_model()
+    scripted = torch.jit.script(model)
+    x = torch.randn(2, 1, 32, 160)
+    with torch.no_grad():
+        assert torch.allclose(scripted(x), model(x), atol=1e-5)
+        # other heights go through the adaptive pooling
+        x = torch.randn(2, 1, 48, 160)
+        assert torch.allclose(scripted(x), model(x), atol=1e-5)
+        widths = torch.tensor([160, 90])
+        assert torch.allclose(scripted(x, widths), model(x, widths), atol=1e-5)
+
+@pytest.mark.parametrize("width", [96, 320])
+def test_scripted_onnx_eager_outputs_match(tmp_path, width):
+    ort = pytest.importorskip("onnxruntime")
+    model = eager_model()
+    ts_path, onnx_path = str(tmp_path / "crnn.pt"), str(tmp_path / "crnn.onnx")
+    export_torchscript(model, ts_path)
+    export_onnx(model, onnx_path)
+    scripted = torch.jit.load(ts_path)
+    sess = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    x = torch.rand(3, 1, 32, width)
+    with torch.no_grad():
+        eager = model(x).numpy()
+        ts = scripted(x).numpy()
+    onnx_out = sess.run(None, {"image": x.numpy()})[0]
+    assert eager.shape == (width // 2, 3, 37)
+    np.testing.assert_allclose(ts, eager, atol=1e-5)
+    np.testing.assert_allclose(onnx_out, eager, atol=1e-4)
+
+def test_export_torchscript_does_not_trace_crnn(tmp_path, caplog):
+    export_torchscript(eager_model(), str(tmp_path / "crnn.pt"))
+    assert "tracing instead" not in caplog.text
+
+@pytest.mark.parametrize("arch", ["lite_gru", "lite_conv"])
+def test_lite_archs_script_with_widths(tmp_path, caplog, arch):
+    model = eager_model(arch)
+    export_torchscript(model, str(tmp_path / f"{arch}.pt"))
+    assert "tracing instead" not in caplog.text
+    scripted = torch.jit.load(str(tmp_path / f"{arch}.pt"))
+    x = torch.randn(2, 1, 32, 160)
+    widths = torch.tensor([160, 90])
+    with torch.no_grad():
+        assert torch.allclose(scripted(x), model(x), atol=1e-5)
+        assert torch.allclose(scripted(x, widths), model(x, widths), atol=1e-5)
+
+@pytest.mark.parametrize("arch", list(MODEL_ARCHS))
+def test_output_lengths_match_time_steps(arch):
+    model = eager_model(arch)
+    with torch.no_grad():
+        for w in (33, 96, 321):
+            out = model(torch.zeros(1, 1, 32, w))
+            assert out.size(0) == int(model.output_lengths([w])[0])
@@ -0,0 +1,81 @@
+import json
+from src.parser import parse_contact_fields, parse_many, normalize_fields
+from src.reparse import reparse
+import pytest
+
+def make_results(i):
+    return [
+        {"box": [10, 10, 200, 30], "text_clean": f"Ravi Kumar{'' if i % 2 else ' Iyer'}", "confidence": 91},
+        {"box": [10, 40, 200, 60], "text_clean": "Senior Manager", "confidence": 88},
+        {"box": [10, 70, 200, 90], "text_clean": "Acme Pvt Ltd", "confidence": 85},
+        {"box": [10, 100, 300, 120], "text_clean": f"ravi{i}@acme.com", "confidence": 90},
+        {"box": [10, 130, 300, 150], "text_clean": f"+91 98765 4{i:04d}", "confidence": 80},
+        {"box": [10, 160, 300, 180], "text_clean": "12 MG Road, Chennai 600001", "confidence": 70},
+    ]
+
+def test_parse_many_matches_single_calls():
+    batch = [make_results(i) for i in range(25)]
+    expected = [parse_contact_fields(r) for r in batch]
+    assert list(parse_many(iter(batch))) == expected
+    assert list(parse_many(iter(batch), workers=2, chunksize=3)) == expected
+
+def test_reparse_jsonl_roundtrip(tmp_path):
+    inp = tmp_path / "in.jsonl"
+    with open(inp, "w") as f:
+        for i in range(5):
+            f.write(json.dumps({"image": f"card{i}.png", "results": make_results(i)}) + "\n")
+    out = tmp_path / "out.jsonl"
+    assert reparse(str(inp), str(out)) == 5
+    rows = [json.loads(l) for l in open(out)]
+    assert [r["image"] for r in rows] == [f"card{i}.png" for i in range(5)]
+    assert rows[3]["parsed"]["email"] == ["ravi3@acme.com"]
+
+def test_keyword_matcher_word_boundaries():
+    from src.keywords import KeywordMatcher
+    m = KeywordMatcher()
+    m.add_many(["st", "h no", "road"], "address")
+    m.add("lead", "designation")
+    assert m.classify("Senior Analyst, Leadership") == {}
+    line = "H No 12, Gandhi St"
+    hits = m.classify(line)
+    assert [line[s:e] for s, e in hits["address"]] == ["H No", "St"]
+    assert m.classify("Team Lead")["designation"] == [(5, 9)]
+
+def test_default_keywords_loaded_from_files():
+    from src.parser import KEYWORDS, is_likely_address
+    assert set(KEYWORDS.classify("Chief Marketing Officer, Acme Pvt Ltd")) == {"designation", "company"}
+    assert not is_likely_address("Senior Analyst")
+    assert is_likely_address("Anna Salai Road")
+
+def test_incremental_parser_matches_full_reparse():
+    from src.incremental import IncrementalParser
+    results = make_results(7) + [{"box": [220, 10, 400, 30], "text_clean": "", "confidence": 60}]
+    state = IncrementalParser(results)
+    edits = [
+        (1, "Chief Technology Officer"),
+        (3, "ravi.k@acme.in"),
+        (6, "www.acme.in"),      # empty box gains text -> joins the first row
+        (0, "   "),              # box drops out of the layout
+        (5, "Plot 4, Anna Nagar, Chennai 600040"),
+    ]
+    work = [dict(r) for r in results]
+    for index, text in edits:
+        work[index]["text_clean"] = text
+        assert state.update_box(index, text) == parse_contact_fields(work)
+    assert results[1]["text_clean"] == "Senior Manager"
+
+@pytest.mark.parametrize("fields", ["email", "email,mobile", ["website", "social"], "name,company", "address"])
+def test_field_subset_matches_full_parse(fields):
+    results = make_results(7) + [{"box": [10, 190, 300, 210], "text_clean": "www.acme.com", "confidence": 90}]
+    full = parse_contact_fields(results)
+    part = parse_contact_fields(results, fields=fields)
+    wanted = normalize_fields(fields)
+    assert {k: part[k] for k in wanted} == {k: full[k] for k in wanted}
+    assert not set(part) & ({"name", "email", "mobile", "address"} - wanted)
+    assert all(n.split("_not_detected")[0] in wanted for n in part["notes"])
+
+def test_normalize_fields():
+    assert normalize_fields(None) is None and normalize_fields(" , ") is None
+    assert normalize_fields(" email, mobile ") == {"email", "mobile"}
+    with pytest.raises(ValueError, match="phone"):
+        normalize_fields("email,phone")
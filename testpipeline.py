@@ -1,6 +1,8 @@
 import os
 import tempfile
-from src.pipeline import process_image
+import json
+import src.pipeline as pipeline
+from src.pipeline import process_image, process_array, recognize_until, box_priority
 from src.utils import ensure_dir
 import pytest
 import cv2
@@ -27,3 +29,101 @@ def test_process_image_basic(tmp_path):
     for r in results:
         assert "text_clean" in r
         assert "box" in r
+
+@pytest.mark.parametrize("text", ["CEO", "ravi@acme.com"])
+def test_process_image_single_word_or_line(tmp_path, text):
+    # sparse cards must not be mistaken for blank pages by the pre-detector
+    img = np.ones((200, 600, 3), dtype=np.uint8) * 255
+    cv2.putText(img, text, (20, 110), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    img_p = tmp_path / "card.png"
+    cv2.imwrite(str(img_p), img)
+    results = process_image(str(img_p), str(tmp_path / "out"))
+    assert len(results) >= 1
+
+CARD = [((40, 20, 400, 80), "Ravi Kumar"), ((40, 90, 300, 115), "Managing Director"),
+        ((40, 130, 260, 155), "Acme Pvt Ltd"), ((40, 300, 560, 322), "ravi@acme.com"),
+        ((40, 330, 560, 352), "+91 98765 43210"), ((40, 360, 560, 382), "12 MG Road, Chennai")]
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    # crops are tagged by their top-left pixel value = index into CARD
+    calls = []
+    def recognize(crops, lang=None):
+        calls.append(len(crops))
+        return [(CARD[int(c[0, 0])][1], 90, "eng") for c in crops]
+    monkeypatch.setattr(pipeline, "recognize_crops_with_lang", recognize)
+    monkeypatch.setitem(pipeline.cfg, "pipeline", {"early_exit_chunk": 2, "early_exit_min_conf": 60})
+    return calls
+
+def card_crops():
+    return [np.full((10, 10), i, np.uint8) for i in range(len(CARD))], [b for b, _ in CARD]
+
+def test_box_priority_prefers_contact_lines():
+    shape = (400, 600)
+    order = sorted(range(len(CARD)), key=lambda i: -box_priority(CARD[i][0], shape))
+    assert set(order[:3]) == {3, 4, 5} and order[-1] == 0  # the tall name line is read last
+
+@pytest.mark.parametrize("fields, n_read", [({"mobile"}, 2), ({"email"}, 4), ({"email", "mobile"}, 4), ({"website"}, 6)])
+def test_recognize_until_stops_when_fields_found(fake_ocr, fields, n_read):
+    crops, boxes = card_crops()
+    done = recognize_until(crops, boxes, (400, 600), fields, "eng")
+    assert len(done) == n_read and all(n <= 2 for n in fake_ocr)
+    assert all(done[i][0] == CARD[i][1] for i in done)
+
+def test_low_confidence_lines_do_not_settle_fields(fake_ocr, monkeypatch):
+    monkeypatch.setitem(pipeline.cfg, "pipeline", {"early_exit_chunk": 2, "early_exit_min_conf": 95})
+    crops, boxes = card_crops()
+    assert len(recognize_until(crops, boxes, (400, 600), {"email"}, "eng")) == len(CARD)
+
+def test_process_array_with_fields(tmp_path, fake_ocr, monkeypatch):
+    img = np.full((400, 600, 3), 255, np.uint8)
+    for i, (box, _) in enumerate(CARD):
+        img[box[1]:box[3], box[0]:box[2]] = i  # expand_box pads by 6 px of white; keep the tag inside
+    monkeypatch.setattr(pipeline, "detect_text_boxes", lambda image, method=None: [b for b, _ in CARD])
+    monkeypatch.setattr(pipeline, "expand_box", lambda box, shape, pad=6: box)
+    monkeypatch.setitem(pipeline.cfg, "preprocess", dict(pipeline.cfg["preprocess"], deskew=False))
+    monkeypatch.setitem(pipeline.cfg, "output", dict(pipeline.cfg["output"], save_crops=True, export_json=True))
+    results = process_array(img, "card.png", str(tmp_path), fields="mobile")
+    assert [r["text_raw"] for r in results] == ["+91 98765 43210", "12 MG Road, Chennai"]  # page order
+    # only the crops that were read are written, under their detection-order numbers
+    assert sorted(p.name for p in tmp_path.glob("*.png")) == ["card_crop_5.png", "card_crop_6.png"]
+    assert [os.path.basename(r["crop_path"]) for r in results] == ["card_crop_5.png", "card_crop_6.png"]
+    saved = json.load(open(tmp_path / "card.json"))
+    assert saved["fields"] == ["mobile"] and len(saved["results"]) == 2
+    # a layout field needs every line
+    assert len(process_array(img, "card.png", str(tmp_path), fields="email,name")) == len(CARD)
+
+def test_crops_are_gray_views_of_one_page(tmp_path, monkeypatch):
+    seen = []
+    def recognize(crops, lang=None):
+        seen.extend(crops)
+        return [("x", 90, "eng")] * len(crops)
+    monkeypatch.setattr(pipeline, "recognize_crops_with_lang", recognize)
+    monkeypatch.setattr(pipeline, "detect_text_boxes", lambda image, method=None: [b for b, _ in CARD])
+    monkeypatch.setitem(pipeline.cfg, "preprocess", dict(pipeline.cfg["preprocess"], deskew=False))
+    process_array(np.full((400, 600, 3), 200, np.uint8), "card.png", str(tmp_path))
+    assert len(seen) == len(CARD)
+    assert all(c.ndim == 2 and c.dtype == np.uint8 and c.base is not None for c in seen)
+    assert all(c.base is seen[0].base for c in seen)  # one gray page, every crop a slice of it
+
+def test_deskew_is_recorded_in_json(tmp_path, monkeypatch):
+    from src.cleaner import rotate_image, unskew_box
+    img = np.full((300, 700, 3), 255, np.uint8)
+    for i, line in enumerate(["Ravi Kumar", "Managing Director", "ravi@acme.com"]):
+        cv2.putText(img, line, (40, 80 + 80 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+    skewed = rotate_image(img, 5.0)
+    monkeypatch.setattr(pipeline, "recognize_crops_with_lang", lambda crops, lang=None: [("x", 90, "eng")] * len(crops))
+    monkeypatch.setitem(pipeline.cfg, "preprocess", dict(pipeline.cfg["preprocess"], deskew=True))
+    monkeypatch.setitem(pipeline.cfg, "output", dict(pipeline.cfg["output"], export_json=True))
+    info = {}
+    results = process_array(skewed, "tilted.png", str(tmp_path), info=info)
+    saved = json.load(open(tmp_path / "tilted.json"))
+    assert abs(saved["deskew"]["angle"] + 5.0) <= 0.3 and saved["deskew"] == info["deskew"]
+    h, w = skewed.shape[:2]
+    for r in results:
+        x0, y0, x1, y1 = unskew_box(r["box"], saved["deskew"])
+        assert -8 <= x0 < x1 <= w + 8 and -8 <= y0 < y1 <= h + 8
+    # a level page keeps the old output: no deskew block
+    info = {}
+    process_array(img, "level.png", str(tmp_path), info=info)
+    assert info == {} and "deskew" not in json.load(open(tmp_path / "level.json"))
@@ -0,0 +1,76 @@
+import os
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from src.infer import CRNNRecognizer
+from src.model import build_model
+from src.quantize import build_quantized_model, load_quantized_checkpoint, quantize_checkpoint
+from src.utils import save_checkpoint, load_checkpoint
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+N_CLASSES = len(CHARS) + 2
+
+def float_model(arch='crnn'):
+    torch.manual_seed(0)
+    return build_model(arch, N_CLASSES).eval()
+
+def word_images(n=8):
+    # 1 x 32 x 128 tensors in [0, 1] with rendered words (calibration / eval input)
+    out = []
+    for i in range(n):
+        img = np.full((32, 128), 255, np.uint8)
+        cv2.putText(img, f"ab{i}cd", (4, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
+        out.append(torch.from_numpy(img).float().div(255.0)[None])
+    return torch.stack(out)
+
+@pytest.mark.parametrize("mode, arch", [("dynamic", "crnn"), ("static", "crnn"), ("dynamic", "lite_gru")])
+def test_quantized_close_to_float(mode, arch):
+    fp32 = float_model(arch)
+    x = word_images()
+    q = build_quantized_model(N_CLASSES, mode, float_state=fp32.state_dict(), calib_batches=[x], arch=arch)
+    with torch.inference_mode():
+        ref, got = fp32(x).softmax(2), q(x).softmax(2)
+    assert got.shape == ref.shape and torch.isfinite(got).all()
+    assert (got - ref).abs().max() < 0.05
+
+@pytest.mark.parametrize("mode", ["dynamic", "static"])
+def test_checkpoint_round_trip(tmp_path, mode):
+    fp32 = float_model()
+    x = word_images()
+    q = build_quantized_model(N_CLASSES, mode, float_state=fp32.state_dict(), calib_batches=[x])
+    path = str(tmp_path / f"int8_{mode}.pth")
+    save_checkpoint(path, {'quantization': mode, 'arch': 'crnn', 'model_state': q.state_dict(),
+                           'tokenizer': {'chars': CHARS}})
+    loaded = load_quantized_checkpoint(load_checkpoint(path), N_CLASSES)
+    with torch.inference_mode():
+        assert torch.equal(loaded(x), q(x))
+    # the recognizer picks up int8 checkpoints by their 'quantization' key
+    rec = CRNNRecognizer(path)
+    assert len(rec.recognize([np.full((32, 96), 255, np.uint8)])) == 1
+
+def test_invalid_modes():
+    with pytest.raises(ValueError):
+        build_quantized_model(N_CLASSES, "int4")
+    with pytest.raises(ValueError):
+        build_quantized_model(N_CLASSES, "static", arch="lite_gru")
+
+def test_quantize_checkpoint_report(tmp_path):
+    root = str(tmp_path)
+    rows = []
+    for i in range(6):
+        name = f"{i}.png"
+        img = np.full((40, 40 + 12 * i), 255, np.uint8)
+        cv2.putText(img, f"w{i}", (4, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+        cv2.imwrite(os.path.join(root, name), img)
+        rows.append({"image_path": name, "transcription": f"w{i}"})
+    csv = os.path.join(root, "ann.csv")
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    ckpt = os.path.join(root, "crnn.pth")
+    save_checkpoint(ckpt, {'model_state': float_model().state_dict(), 'tokenizer': {'chars': CHARS}, 'arch': 'crnn'})
+    report = quantize_checkpoint(ckpt, csv, root, out_dir=os.path.join(root, "q"), calib_samples=6)
+    assert [r["mode"] for r in report] == ["fp32", "dynamic", "static"]
+    for row in report[1:]:
+        assert os.path.exists(row["path"]) and row["size_mb"] < report[0]["size_mb"]
+    assert report[0]["cer_delta"] == 0 and report[0]["speedup"] == pytest.approx(1.0)
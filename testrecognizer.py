@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import yaml
+import pytest
+import src.recognizer as recognizer
+from src.recognizer import route_lang, recognize_routed
+
+RCFG = {'route_min_conf': 60}
+CROP = np.full((32, 96), 255, np.uint8)
+
+@pytest.fixture
+def osd(monkeypatch):
+    # OSD answer per test; records whether it was asked at all
+    state = {"script": None, "calls": 0}
+    def fake(crop):
+        state["calls"] += 1
+        return state["script"]
+    monkeypatch.setattr(recognizer, "osd_script", fake)
+    return state
+
+@pytest.mark.parametrize("text, conf, primary, osd_script, expected", [
+    # confident read in a covered script
+    ("Ravi Kumar", 91, "eng", "Tamil", None),
+    # foreign letters in the text route to primary + that script, whatever the confidence
+    ("Ravi रवि कुमार", 88, "eng", None, "eng+hin"),
+    ("ரவி Kumar", 40, "eng", None, "eng+tam"),
+    ("ரவி रवि", 30, "eng", None, "eng+hin+tam"),
+    # already covered by primary
+    ("ரவி Kumar", 40, "eng+tam", "Tamil", None),
+    # low confidence, Latin text: OSD decides
+    ("Rav1 Kvmar", 35, "eng", "Tamil", "eng+tam"),
+    ("Rav1 Kvmar", 35, "eng", "Latin", None),
+    ("Rav1 Kvmar", 35, "eng", None, None),
+    ("Rav1 Kvmar", 35, "eng+hin", "Devanagari", None),
+    # OSD names a script without traineddata mapping
+    ("Rav1 Kvmar", 35, "eng", "Han", None),
+    # empty reads are never routed
+    ("", -1, "eng", "Tamil", None),
+    ("   ", 20, "eng", "Tamil", None),
+    ("Ravi", -1, "eng", "Tamil", None),
+])
+def test_route_lang_table(osd, text, conf, primary, osd_script, expected):
+    osd["script"] = osd_script
+    assert route_lang(text, conf, primary, CROP, RCFG) == expected
+
+def test_osd_only_for_low_confidence_reads(osd):
+    osd["script"] = "Tamil"
+    assert route_lang("Ravi Kumar", 90, "eng", CROP, RCFG) is None
+    assert route_lang("", -1, "eng", CROP, RCFG) is None
+    assert osd["calls"] == 0
+    assert route_lang("Ravi Kumar", 50, "eng", CROP, RCFG) == "eng+tam"
+    assert osd["calls"] == 1
+
+def test_recognize_routed_keeps_the_better_pass(osd, monkeypatch):
+    reads = {"eng": ("Rav1", 30), "eng+tam": ("ரவி", 70)}
+    calls = []
+    def fake_recognize(crop, lang=None, psm=6):
+        calls.append(lang)
+        return reads[lang]
+    monkeypatch.setattr(recognizer, "recognize_from_crop", fake_recognize)
+    osd["script"] = "Tamil"
+    assert recognize_routed(CROP, "eng") == ("ரவி", 70, "eng+tam")
+    reads["eng+tam"] = ("R", 10)
+    assert recognize_routed(CROP, "eng") == ("Rav1", 30, "eng")
+    # no evidence: a single pass
+    osd["script"] = None
+    calls.clear()
+    assert recognize_routed(CROP, "eng") == ("Rav1", 30, "eng")
+    assert calls == ["eng"]
+
+def test_routing_is_off_by_default(osd, monkeypatch):
+    # the default English-only path reads each crop once and never pays for OSD
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml"), encoding="utf-8") as f:
+        shipped = yaml.safe_load(f)["recognizer"]
+    assert shipped["lang_routing"] is False and not shipped["cascade"]
+    monkeypatch.setitem(recognizer.cfg, "recognizer", dict(shipped, backend="tesseract"))
+    calls = []
+    monkeypatch.setattr(recognizer, "recognize_from_crop", lambda crop, lang=None, psm=6: calls.append(lang) or ("Rav1", 20))
+    assert recognizer.recognize_crops_with_lang([CROP, CROP]) == [("Rav1", 20, "eng")] * 2
+    assert calls == ["eng", "eng"] and osd["calls"] == 0
@@ -0,0 +1,129 @@
+import os
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+import src.train as train
+from src.utils import load_checkpoint
+
+CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+def tiny_dataset(root, words=('acme', 'ravi', 'kumar', 'sales', 'pune', 'mumbai', 'ceo', 'x42')):
+    os.makedirs(root, exist_ok=True)
+    rows = []
+    for i, word in enumerate(words):
+        (tw, th), base = cv2.getTextSize(word, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+        img = np.full((th + base + 10, tw + 10 + 6 * i), 255, np.uint8)
+        cv2.putText(img, word, (5, th + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        name = f"{i}.png"
+        cv2.imwrite(os.path.join(root, name), img)
+        rows.append({"image_path": name, "transcription": word})
+    csv = os.path.join(root, "ann.csv")
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    return csv
+
+class NaNOnCall(torch.nn.Module):
+    # wraps a model and returns NaN logits on the given forward calls
+    def __init__(self, model, bad_calls):
+        super().__init__()
+        self.model = model
+        self.bad_calls = set(bad_calls)
+        self.calls = 0
+
+    def output_lengths(self, widths):
+        return self.model.output_lengths(widths)
+
+    def forward(self, x, widths=None):
+        out = self.model(x, widths)
+        self.calls += 1
+        if self.calls in self.bad_calls:
+            out = out * float('nan')
+        return out
+
+def test_nonfinite_batches_skip_the_step(tmp_path, monkeypatch, capsys):
+    csv = tiny_dataset(str(tmp_path / "data"))
+    wrapped = []
+    build_model = train.build_model
+    def build(arch, n):
+        # second forward call = second batch (index 1)
+        wrapped.append(NaNOnCall(build_model(arch, n), bad_calls={2}))
+        return wrapped[-1]
+    monkeypatch.setattr(train, "build_model", build)
+    out = str(tmp_path / "ckpt")
+    train.train_main(csv, str(tmp_path / "data"), CHARS, out_dir=out, epochs=1, batch_size=2, device='cpu',
+                     async_ckpt=False, log_every=1)
+    printed = capsys.readouterr().out
+    assert "batch 1: non-finite loss or gradients, step skipped" in printed
+    assert "1 step(s) skipped" in printed
+    assert "time per stage" not in printed  # profile is opt-in
+    # the bad batch never reached the weights
+    assert all(torch.isfinite(p).all() for p in wrapped[0].parameters())
+    debug = load_checkpoint(os.path.join(out, "debug.pth"), 'cpu')
+    assert debug["batch"] == 1 and debug["images"].shape[0] == 2
+
+def test_profile_prints_stage_times(tmp_path, capsys):
+    csv = tiny_dataset(str(tmp_path / "data"))
+    train.train_main(csv, str(tmp_path / "data"), CHARS, out_dir=str(tmp_path / "ckpt"), epochs=1, batch_size=4,
+                     device='cpu', async_ckpt=False, profile=True)
+    printed = capsys.readouterr().out
+    assert "time per stage" in printed and "skipped" not in printed
+
+def test_cache_with_other_charset_fails_fast(tmp_path):
+    from src.dataset import build_dataset_cache
+    from src.utils import Tokenizer
+    csv = tiny_dataset(str(tmp_path / "data"))
+    cache = build_dataset_cache(csv, str(tmp_path / "data"), Tokenizer(CHARS), str(tmp_path / "cache"))
+    with pytest.raises(ValueError, match="charset"):
+        train.train_main(None, None, CHARS.upper(), out_dir=str(tmp_path / "ckpt"), epochs=1, cache_dir=cache,
+                         device='cpu', async_ckpt=False)
+    # same charset trains from the cache
+    train.train_main(None, None, CHARS, out_dir=str(tmp_path / "ckpt"), epochs=1, batch_size=4, cache_dir=cache,
+                     device='cpu', async_ckpt=False)
+    assert os.path.exists(tmp_path / "ckpt" / "ckpt_epoch_1.pth")
+
+def test_resume_auto_continues_after_last_epoch(tmp_path, capsys):
+    csv = tiny_dataset(str(tmp_path / "data"))
+    kw = dict(out_dir=str(tmp_path / "ckpt"), batch_size=4, device='cpu', async_ckpt=False, keep_last=1)
+    train.train_main(csv, str(tmp_path / "data"), CHARS, epochs=2, **kw)
+    capsys.readouterr()
+    train.train_main(csv, str(tmp_path / "data"), CHARS, epochs=3, resume='auto', **kw)
+    printed = capsys.readouterr().out
+    assert "Epoch 3 average loss" in printed and "Epoch 1 " not in printed and "Epoch 2 " not in printed
+    assert sorted(os.listdir(tmp_path / "ckpt")) == ["ckpt_epoch_3.pth"]
+    assert load_checkpoint(str(tmp_path / "ckpt" / "ckpt_epoch_3.pth"))["arch"] == "crnn"
+
+@pytest.mark.parametrize("bucket_step", [None, 32])
+def test_training_packs_padding_like_inference(tmp_path, monkeypatch, bucket_step):
+    from src.dataset import OCRDataset
+    from src.utils import Tokenizer
+    root = str(tmp_path / "data")
+    csv = tiny_dataset(root)
+    seen = []
+    build_model = train.build_model
+    def build(arch, n):
+        wrapped = NaNOnCall(build_model(arch, n), bad_calls=())
+        forward = wrapped.forward
+        def spy(x, widths=None):
+            seen.append((x.shape[-1], widths.tolist()))
+            return forward(x, widths)
+        wrapped.forward = spy
+        return wrapped
+    monkeypatch.setattr(train, "build_model", build)
+    ctc = []
+    criterion = torch.nn.CTCLoss
+    class SpyCTC(criterion):
+        def forward(self, log_probs, targets, input_lengths, target_lengths):
+            ctc.append(input_lengths.tolist())
+            return super().forward(log_probs, targets, input_lengths, target_lengths)
+    monkeypatch.setattr(train.nn, "CTCLoss", SpyCTC)
+    train.train_main(csv, root, CHARS, out_dir=str(tmp_path / "ckpt"), epochs=1, batch_size=3, device='cpu',
+                     async_ckpt=False, bucket_step=bucket_step)
+    expected = OCRDataset(csv, root, Tokenizer(CHARS)).sample_widths().tolist()
+    assert sum(len(ws) for _, ws in seen) == len(expected)
+    if bucket_step is None:
+        assert sorted(w for _, ws in seen for w in ws) == sorted(expected)
+    for (padded, widths), lengths in zip(seen, ctc):
+        # TrimCollate may cut a sample's own white right margin: its width is clamped to the batch
+        assert all(w in {min(e, padded) for e in expected} for w in widths)
+        assert lengths == [max(1, w // 2) for w in widths]
@@ -0,0 +1,57 @@
+import os
+import signal
+import time
+import numpy as np
+import pytest
+from src.workers import OCRWorkerPool
+
+def slow_task(img, seconds, *args):
+    # runs in the worker: hold the image for a while, then report what was received
+    time.sleep(float(seconds))
+    return int(img.sum())
+
+@pytest.fixture
+def shm_names():
+    before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    yield
+    if os.path.isdir('/dev/shm'):
+        leaked = {n for n in set(os.listdir('/dev/shm')) - before if n.startswith('psm_')}
+        assert not leaked
+
+@pytest.mark.parametrize("transport", ["shm", "pickle"])
+def test_results_match_inputs(transport, shm_names):
+    with OCRWorkerPool(processes=2, transport=transport, slots=2, slot_mb=1, kind='noop') as pool:
+        imgs = [np.full((20 + i, 30, 3), i, np.uint8) for i in range(6)]
+        futures = [pool.submit(img) for img in imgs]
+        assert [f.result(timeout=60) for f in futures] == [i * 3 + 20 + i for i in range(6)]
+
+def test_large_image_uses_oneoff_block(shm_names):
+    with OCRWorkerPool(processes=1, slots=1, slot_mb=0.01, kind='noop') as pool:
+        assert pool.submit(np.ones((100, 100, 3), np.uint8)).result(timeout=60) == 103
+        assert pool.oneoff_blocks == 1
+
+def test_task_error_is_reported(shm_names):
+    with OCRWorkerPool(processes=1, slots=1, slot_mb=1, kind='noop') as pool:
+        with pytest.raises(RuntimeError, match="IndexError"):
+            pool.submit(np.ones((4,), np.uint8)).result(timeout=60)
+        assert pool.submit(np.ones((4, 4), np.uint8)).result(timeout=60) == 5
+
+def test_worker_death_only_fails_its_own_requests(shm_names):
+    with OCRWorkerPool(processes=2, slots=4, slot_mb=1, kind='testworkers:slow_task') as pool:
+        pool.submit(np.zeros((2, 2), np.uint8), '0').result(timeout=60)  # both workers are up
+        doomed = pool.submit(np.ones((8, 8), np.uint8), '3')
+        healthy = pool.submit(np.full((8, 8), 2, np.uint8), '3')
+        time.sleep(1.0)
+        victim = pool.workers[pool.pending[doomed_id(pool, doomed)][2]][0]
+        os.kill(victim.pid, signal.SIGKILL)
+        with pytest.raises(RuntimeError, match="exited"):
+            doomed.result(timeout=30)
+        assert healthy.result(timeout=30) == 128
+        # a replacement worker serves new requests
+        assert [pool.submit(np.ones((2, 2), np.uint8), '0').result(timeout=60) for _ in range(4)] == [4] * 4
+        assert pool.respawned == 1
+        t0 = time.monotonic()
+    assert time.monotonic() - t0 < 30
+
+def doomed_id(pool, future):
+    return next(r for r, entry in pool.pending.items() if entry[0] is future)
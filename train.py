@@ -1,13 +1,34 @@
 import os
-import math
+import time
 import torch
 from torch.utils.data import DataLoader
 import torch.optim as optim
 import torch.nn as nn
 from tqdm import tqdm
-from .dataset import OCRDataset, ocr_collate
-from .utils import Tokenizer, save_checkpoint, load_checkpoint
-from .model import CRNN
+from .dataset import OCRDataset, CachedOCRDataset, BucketBatchSampler, TrimCollate, WithWidths, ocr_collate
+from .utils import Tokenizer, save_checkpoint
+from .model import build_model
+from .checkpoint import CheckpointManager
+from .eval import evaluate
+
+
+def build_loader(dataset, batch_size, num_workers=0, pin_memory=None, prefetch_factor=2, bucket_step=None, device='cpu'):
+    """
+    DataLoader for training. num_workers > 0 keeps workers alive across epochs and prefetches
+    `prefetch_factor` batches each. bucket_step groups samples of similar width so each batch is
+    padded only to its bucket width (None = plain shuffle, every sample padded to max_w).
+    Batches are (images, labels, label_lengths, widths), widths being each sample's true width.
+    """
+    dataset = WithWidths(dataset)
+    if pin_memory is None:
+        pin_memory = str(device).startswith('cuda')
+    kwargs = dict(num_workers=num_workers, pin_memory=pin_memory)
+    if num_workers > 0:
+        kwargs.update(persistent_workers=True, prefetch_factor=prefetch_factor)
+    if bucket_step:
+        sampler = BucketBatchSampler(dataset.sample_widths(), batch_size, bucket_step=bucket_step)
+        return DataLoader(dataset, batch_sampler=sampler, collate_fn=TrimCollate(bucket_step), **kwargs)
+    return DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=ocr_collate, **kwargs)
 
 
 def train_main(
@@ -17,49 +38,169 @@ def train_main(
     out_dir='checkpoints',
     epochs=50,
     batch_size=16,
-    device='cuda' if torch.cuda.is_available() else 'cpu'
+    device='cuda' if torch.cuda.is_available() else 'cpu',
+    num_workers=0,
+    pin_memory=None,
+    prefetch_factor=2,
+    bucket_step=None,
+    cache_dir=None,
+    amp_dtype=None,
+    accum_steps=1,
+    compile_model=False,
+    log_every=50,
+    val_annotations=None,
+    val_samples=None,
+    keep_last=3,
+    weights_only_ckpt=False,
+    async_ckpt=True,
+    resume=None,
+    arch='crnn',
+    profile=False,
 ):
+    """
+    Speed options: amp_dtype ('bfloat16' on CPU, 'float16'/'bfloat16' on CUDA) runs the forward
+    under autocast; accum_steps > 1 accumulates gradients for a larger effective batch;
+    compile_model wraps the model in torch.compile; the running loss stays on the device and is
+    only read back every `log_every` optimizer steps.
+
+    Checkpointing: CheckpointManager keeps the last `keep_last` epoch files plus best.pth (lowest
+    CER on val_annotations, when given) and writes them on a background thread. weights_only_ckpt
+    skips the optimizer state. resume='auto' continues from the newest epoch file in out_dir, or
+    pass a checkpoint path. arch picks the model from model.MODEL_ARCHS ('crnn', 'lite_gru',
+    'lite_conv') and is stored in every checkpoint.
+
+    Batches whose loss or gradients are not finite are skipped (no optimizer/scaler step) and each
+    one is saved to debug.pth. profile=True prints time per stage (data/forward/backward/step);
+    it synchronizes CUDA after every stage, so it is off for normal runs.
+    """
     os.makedirs(out_dir, exist_ok=True)
     tokenizer = Tokenizer(chars)
-    dataset = OCRDataset(annotations_file, img_root, tokenizer)
-    loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=ocr_collate)
+    # cache_dir: preprocessed arrays from dataset.build_dataset_cache instead of decoding images
+    if cache_dir:
+        dataset = CachedOCRDataset(cache_dir)
+        # the cached label ids are only valid for the charset the cache was built with
+        if list(dataset.meta['chars']) != list(chars):
+            raise ValueError(f"Dataset cache {cache_dir} was built for charset {dataset.meta['chars']!r}, "
+                             f"not {chars!r}; rebuild it with dataset.build_dataset_cache")
+    else:
+        dataset = OCRDataset(annotations_file, img_root, tokenizer)
+    loader = build_loader(dataset, batch_size, num_workers=num_workers, pin_memory=pin_memory,
+                          prefetch_factor=prefetch_factor, bucket_step=bucket_step, device=device)
 
-    model = CRNN(num_classes=len(tokenizer.idx2char)).to(device)
+    model = build_model(arch, len(tokenizer.idx2char)).to(device)
     criterion = nn.CTCLoss(blank=tokenizer.blank_idx, zero_infinity=True)
     optimizer = optim.Adam(model.parameters(), lr=1e-3)
+    # forward through the compiled wrapper, but checkpoint the plain module's weights;
+    # dynamic shapes so width-bucketed batches don't trigger a recompile per bucket
+    forward_model = torch.compile(model, dynamic=bool(bucket_step)) if compile_model else model
+    device_type = 'cuda' if str(device).startswith('cuda') else 'cpu'
+    autocast_dtype = getattr(torch, amp_dtype) if amp_dtype else None
+    scaler = torch.amp.GradScaler('cuda') if autocast_dtype == torch.float16 and device_type == 'cuda' else None
+    accum_steps = max(1, int(accum_steps))
+
+    ckpts = CheckpointManager(out_dir, keep_last=keep_last, weights_only=weights_only_ckpt, async_save=async_ckpt)
+    start_epoch = 1
+    if resume:
+        start_epoch = ckpts.resume(model, optimizer, path=None if resume == 'auto' else resume, device=device)
+    val_set = OCRDataset(val_annotations, img_root, tokenizer) if val_annotations else None
+
+    def sync():
+        # stage timing only: every call stalls the CUDA stream
+        if profile and device_type == 'cuda':
+            torch.cuda.synchronize()
 
-    for epoch in range(1, epochs+1):
+    for epoch in range(start_epoch, epochs+1):
         model.train()
-        total_loss = 0.0
-        for batch in tqdm(loader, desc=f'Epoch {epoch}'):
-            images, labels, label_lengths = batch
-            images = images.to(device)
-            labels = labels.to(device)
-            label_lengths = label_lengths.to(device)
+        running = torch.zeros((), device=device)
+        window_bad = torch.zeros((), dtype=torch.bool, device=device)  # non-finite loss since the last step
+        skipped = 0
+        seen = 0
+        steps = 0
+        stage = {'data': 0.0, 'forward': 0.0, 'backward': 0.0, 'step': 0.0}
+        epoch_start = time.perf_counter()
+        optimizer.zero_grad(set_to_none=True)
+        t_mark = time.perf_counter()
+        for i, batch in enumerate(tqdm(loader, desc=f'Epoch {epoch}')):
+            images, labels, label_lengths, widths = batch
+            images = images.to(device, non_blocking=True)
+            labels = labels.to(device, non_blocking=True)
+            label_lengths = label_lengths.to(device, non_blocking=True)
+            widths = widths.to(device, non_blocking=True)
+            seen += images.size(0)
+            t0 = time.perf_counter()
+            stage['data'] += t0 - t_mark
 
-            logits = model(images)  # T x B x C
-            input_lengths = torch.full((logits.size(1),), logits.size(0), dtype=torch.long).to(device)
+            with torch.autocast(device_type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+                # true widths pack the padding out of the LSTM, as at inference
+                logits = forward_model(images, widths)  # T x B x C
+            input_lengths = model.output_lengths(widths).clamp(max=logits.size(0)).to(device)
+            # CTC needs fp32 log-probs; this is the only full-size pass over the logits
+            loss = criterion(logits.float().log_softmax(2), labels, input_lengths, label_lengths)
+            # flagged on-device (no host sync) and checked once per optimizer step
+            finite = torch.isfinite(loss)
+            window_bad |= ~finite
+            sync()
+            t1 = time.perf_counter()
+            stage['forward'] += t1 - t0
 
-            loss = criterion(logits.log_softmax(2), labels, input_lengths, label_lengths)
-            if not torch.isfinite(loss):
-                print('Non-finite loss encountered; skipping batch and saving debug state')
-                save_checkpoint(os.path.join(out_dir, 'debug.pth'), {'epoch': epoch})
-                continue
+            scaled = loss / accum_steps
+            if scaler is not None:
+                scaler.scale(scaled).backward()
+            else:
+                scaled.backward()
+            running += torch.where(finite, loss.detach(), torch.zeros_like(loss))
+            sync()
+            t2 = time.perf_counter()
+            stage['backward'] += t2 - t1
 
-            optimizer.zero_grad()
-            loss.backward()
-            torch.nn.utils.clip_grad_norm_(model.parameters(), 5.0)
-            optimizer.step()
-            total_loss += loss.item()
+            if (i + 1) % accum_steps == 0 or (i + 1) == len(loader):
+                if scaler is not None:
+                    # inf/NaN gradients from a finite loss are fp16 overflow: scaler.step skips them
+                    # and scaler.update lowers the scale. A non-finite loss is a bad batch: neither.
+                    bad = bool(window_bad)
+                    if not bad:
+                        scaler.unscale_(optimizer)
+                        torch.nn.utils.clip_grad_norm_(model.parameters(), 5.0)
+                        scaler.step(optimizer)
+                        scaler.update()
+                else:
+                    grad_norm = torch.nn.utils.clip_grad_norm_(model.parameters(), 5.0)
+                    bad = bool(window_bad | ~torch.isfinite(grad_norm))
+                    if not bad:
+                        optimizer.step()
+                optimizer.zero_grad(set_to_none=True)
+                window_bad.zero_()
+                if bad:
+                    skipped += 1
+                    print(f'Epoch {epoch} batch {i}: non-finite loss or gradients, step skipped; saving debug.pth')
+                    save_checkpoint(os.path.join(out_dir, 'debug.pth'),
+                                    {'epoch': epoch, 'batch': i, 'images': images.cpu(), 'labels': labels.cpu(),
+                                     'label_lengths': label_lengths.cpu()})
+                else:
+                    steps += 1
+                    if log_every and steps % log_every == 0:
+                        print(f'Epoch {epoch} step {steps}: running loss {running.item() / (i + 1):.4f}')
+            sync()
+            t_mark = time.perf_counter()
+            stage['step'] += t_mark - t2
 
-        avg = total_loss / max(1, len(loader))
-        print(f'Epoch {epoch} average loss: {avg:.4f}')
-        save_checkpoint(os.path.join(out_dir, f'ckpt_epoch_{epoch}.pth'), {
-            'epoch': epoch,
-            'model_state': model.state_dict(),
-            'optim_state': optimizer.state_dict(),
-            'tokenizer': tokenizer.__dict__,
-        })
+        avg = running.item() / max(1, len(loader))
+        elapsed = time.perf_counter() - epoch_start
+        print(f'Epoch {epoch} average loss: {avg:.4f} ({seen / max(elapsed, 1e-9):.1f} samples/s)')
+        if profile:
+            print('  time per stage: ' + ', '.join(f'{k} {v:.2f}s ({100 * v / max(elapsed, 1e-9):.0f}%)'
+                                                   for k, v in stage.items()))
+        if skipped:
+            print(f'  {skipped} step(s) skipped for non-finite loss or gradients this epoch')
+        val_cer = None
+        if val_set is not None:
+            val_cer = evaluate(model, val_set, tokenizer, n_samples=val_samples, batch_size=batch_size, device=device)['cer']
+            print(f'  validation CER: {val_cer:.4f}')
+        t0 = time.perf_counter()
+        ckpts.save(epoch, model, optimizer, tokenizer, metric=val_cer, extra={'arch': arch})
+        print(f'  checkpoint snapshot: {time.perf_counter() - t0:.3f}s (written in background)' if async_ckpt
+              else f'  checkpoint saved: {time.perf_counter() - t0:.3f}s')
+    ckpts.close()
 
 if __name__ == '__main__':
     # example usage
@@ -3,7 +3,6 @@ import json
 import random
 from PIL import Image, ImageOps
 import numpy as np
-import torch
 
 class Tokenizer:
     def __init__(self, chars):
@@ -40,11 +39,14 @@ def load_image_gray(path):
 
 def resize_and_pad(img, target_h=32, max_w=320):
     # preserve aspect ratio by resizing to target_h then pad width to max_w
+    # (max_w=None: keep the natural width, for the width-agnostic CRNN)
     w, h = img.size
     new_h = target_h
     new_w = max(1, int(w * (new_h / float(h))))
     img = img.resize((new_w, new_h), Image.BILINEAR)
-    if new_w < max_w:
+    if max_w is None or new_w == max_w:
+        pass
+    elif new_w < max_w:
         result = Image.new('L', (max_w, new_h), color=255)
         result.paste(img, (0, 0))
         img = result
@@ -56,9 +58,14 @@ def resize_and_pad(img, target_h=32, max_w=320):
     return arr
 
 
+# torch is imported lazily so the exported-model runtime can use the helpers above without it
 def save_checkpoint(path, state):
+    import torch
     torch.save(state, path)
 
 
 def load_checkpoint(path, device='cpu'):
-    return torch.load(path, map_location
+    import torch
+    # int8 checkpoints (quantize.py) hold packed weights as ScriptObjects
+    with torch.serialization.safe_globals([torch.ScriptObject]):
+        return torch.load(path, map_location=device)
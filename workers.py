@@ -0,0 +1,244 @@
+import importlib
+import itertools
+import logging
+import queue
+import threading
+import time
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+import numpy as np
+from .utils import load_config
+
+cfg = load_config()
+
+# OCR in worker processes. Decoded pages are large (a 300 dpi A4 scan is ~26 MB of BGR), so with
+# transport="shm" the front-end copies each one into a pre-allocated shared-memory slot and sends
+# only (slot name, shape, dtype); the worker maps the slot and runs the pipeline on that view.
+# Slots go back to the pool when the result comes in, so steady-state traffic allocates nothing.
+
+
+def _ocr_task(img, image_name, output_dir, fields):
+    # (results, page info) as process_array fills them
+    from .pipeline import process_array
+    info = {}
+    return process_array(img, image_name, output_dir, fields=fields, info=info), info
+
+
+def _noop_task(img, *args):
+    # transport tests/benchmark: touch the pixels the worker received and return something tiny
+    return int(img[0, 0].sum()) + img.shape[0]
+
+
+TASKS = {'ocr': _ocr_task, 'noop': _noop_task}
+
+
+def resolve_task(kind):
+    # a name from TASKS or an importable "module:function"
+    if kind in TASKS:
+        return TASKS[kind]
+    module, _, name = kind.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker_main(tasks, results, kind):
+    fn = resolve_task(kind)
+    attached = {}  # slot name -> SharedMemory, mapped once per worker
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        req_id, transport, payload, args = task
+        shm = None
+        try:
+            if transport == 'shm':
+                name, shape, dtype, oneoff = payload
+                shm = attached.get(name) or shared_memory.SharedMemory(name=name)
+                if not oneoff:
+                    attached[name] = shm
+                img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            else:
+                img = payload
+            out = fn(img, *args)
+            del img  # the view must be gone before the slot is reused or closed
+            results.put((req_id, True, out))
+        except Exception as e:
+            results.put((req_id, False, f"{e!r}\n{traceback.format_exc()}"))
+        finally:
+            if shm is not None and payload[3]:
+                shm.close()
+    for shm in attached.values():
+        shm.close()
+
+
+class OCRWorkerPool:
+    """
+    Process pool with a shared-memory image handoff. submit(img, ...) returns a Future with the
+    task's result ((results, page info) from process_array for kind="ocr"; see resolve_task). With transport="shm" there are `slots` reusable
+    blocks of slot_mb each; submit blocks while all of them are in flight, which also bounds the
+    requests queued at the workers. Images bigger than a slot get a one-off block that is unlinked
+    when their result arrives. transport="pickle" sends the array through the queue instead.
+
+    Every worker has its own task queue, so the pool knows which worker holds which request and
+    slot. A worker that dies (crash, OOM killer) fails only its own requests, their slots go back
+    (nobody else can be reading them) and a fresh worker takes its place.
+    """
+
+    def __init__(self, processes=2, transport='shm', slots=8, slot_mb=64, kind='ocr', start_method='spawn'):
+        if transport not in ('shm', 'pickle'):
+            raise ValueError(f"Unknown transport: {transport} (choose from shm, pickle)")
+        self.ctx = mp.get_context(start_method)
+        self.kind = kind
+        self.transport = transport
+        self.slot_bytes = int(slot_mb * 1024 * 1024)
+        self.slots = []
+        self.free = queue.Queue()
+        if transport == 'shm':
+            for i in range(slots):
+                self.slots.append(shared_memory.SharedMemory(create=True, size=self.slot_bytes))
+                self.free.put(i)
+        self.results = self.ctx.Queue()
+        self.lock = threading.Lock()
+        self.workers = []  # [process, its task queue, ids of the requests it holds]
+        for _ in range(processes):
+            self.workers.append(self._spawn())
+        self.pending = {}  # req_id -> (future, slot index / one-off SharedMemory / None, worker index)
+        self.ids = itertools.count()
+        self.closing = False
+        self.oneoff_blocks = 0
+        self.respawned = 0
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def _spawn(self):
+        tasks = self.ctx.Queue()
+        proc = self.ctx.Process(target=_worker_main, args=(tasks, self.results, self.kind), daemon=True)
+        proc.start()
+        return [proc, tasks, set()]
+
+    def _stage(self, img):
+        # copy img into shared memory: (payload for the worker, what to release afterwards)
+        img = np.ascontiguousarray(img)
+        if img.nbytes <= self.slot_bytes:
+            slot = self.free.get()
+            shm, oneoff = self.slots[slot], False
+            release = slot
+        else:
+            shm, oneoff = shared_memory.SharedMemory(create=True, size=img.nbytes), True
+            release = shm
+            self.oneoff_blocks += 1
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+        return (shm.name, img.shape, img.dtype.str, oneoff), release
+
+    def submit(self, img, image_name='image', output_dir='outputs', fields=None):
+        # may block until a slot is free: call it off the event loop in async code
+        if self.closing:
+            raise RuntimeError("OCR worker pool is closed")
+        future = Future()
+        req_id = next(self.ids)
+        if self.transport == 'shm':
+            payload, release = self._stage(img)
+        else:
+            payload, release = img, None
+        with self.lock:
+            # least busy worker
+            wid = min(range(len(self.workers)), key=lambda i: len(self.workers[i][2]))
+            self.workers[wid][2].add(req_id)
+            self.pending[req_id] = (future, release, wid)
+            self.workers[wid][1].put((req_id, self.transport, payload, (image_name, output_dir, fields)))
+        return future
+
+    def _release(self, release):
+        if release is None:
+            return
+        if isinstance(release, int):
+            self.free.put(release)
+        else:
+            release.close()
+            release.unlink()
+
+    def _fail(self, req_ids, message):
+        # only for requests no live worker can still be reading
+        with self.lock:
+            entries = [self.pending.pop(r, None) for r in req_ids]
+        for entry in entries:
+            if entry is not None:
+                future, release, _ = entry
+                self._release(release)
+                future.set_exception(RuntimeError(message))
+
+    def _check_workers(self):
+        with self.lock:
+            dead = [(i, w) for i, w in enumerate(self.workers) if not w[0].is_alive()]
+            if self.closing or not dead:
+                return
+            for i, (proc, _, held) in dead:
+                logging.warning(f"OCR worker {proc.pid} exited with code {proc.exitcode}; "
+                                f"failing its {len(held)} requests and starting a new one")
+                self.workers[i] = self._spawn()
+                self.respawned += 1
+        for _, (proc, _, held) in dead:
+            self._fail(held, f"OCR worker exited with code {proc.exitcode}")
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while True:
+            try:
+                item = self.results.get(timeout=0.5)
+            except queue.Empty:
+                item = False
+            if time.monotonic() - last_check >= 0.5:
+                self._check_workers()
+                last_check = time.monotonic()
+            if item is None:
+                break
+            if item is False:
+                continue
+            req_id, ok, out = item
+            with self.lock:
+                entry = self.pending.pop(req_id, None)
+                if entry is not None:
+                    self.workers[entry[2]][2].discard(req_id)
+            if entry is None:  # already failed (its worker died after answering)
+                continue
+            future, release, _ = entry
+            self._release(release)
+            if ok:
+                future.set_result(out)
+            else:
+                future.set_exception(RuntimeError(f"OCR worker failed: {out}"))
+
+    def close(self, timeout=30):
+        self.closing = True
+        for proc, tasks, _ in self.workers:
+            if proc.is_alive():
+                tasks.put(None)
+        for proc, _, _ in self.workers:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout=5)
+        self.results.put(None)
+        self.collector.join(timeout=timeout)
+        # every worker has exited, so no slot is in use any more
+        self._fail(list(self.pending), "OCR worker pool closed")
+        for shm in self.slots:
+            shm.close()
+            shm.unlink()
+        self.slots = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pool_from_config(cfg):
+    # None when workers.processes is 0 (OCR runs in the calling process)
+    wcfg = cfg.get('workers') or {}
+    if wcfg.get('processes', 0) <= 0:
+        return None
+    return OCRWorkerPool(processes=wcfg['processes'], transport=wcfg.get('transport', 'shm'),
+                         slots=wcfg.get('slots', 8), slot_mb=wcfg.get('slot_mb', 64))